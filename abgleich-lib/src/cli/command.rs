@@ -1,6 +1,10 @@
-use crate::config::InsecureHost;
+use std::str::FromStr;
+use std::time::Duration;
 
-use clap::{Parser, Subcommand};
+use crate::config::{Codec, InsecureHost};
+use crate::property::SendValue;
+
+use clap::{Args, Parser, Subcommand};
 
 #[derive(Debug, Parser)] // requires `derive` feature
 #[command(name = "abgleich")]
@@ -16,8 +20,24 @@ pub struct Cli {
 /// `k`/`K` (× 1 024), `m`/`M` (× 1 024²), or `g`/`G` (× 1 024³).
 /// Examples: `"1048576"`, `"1m"`, `"500k"`, `"2g"`.
 pub fn parse_rate_limit(s: &str) -> Result<u64, String> {
+    parse_bytes(s, "rate limit")
+}
+
+/// Parse a human-readable buffer size string into bytes.
+///
+/// Accepts the same format as `parse_rate_limit`.  Zero is rejected.
+pub fn parse_buffer_size(s: &str) -> Result<usize, String> {
+    let size = usize::try_from(parse_bytes(s, "buffer size")?)
+        .map_err(|_| "buffer size value overflows usize".to_string())?;
+    if size == 0 {
+        return Err("buffer size must be at least 1 byte".to_string());
+    }
+    Ok(size)
+}
+
+fn parse_bytes(s: &str, what: &str) -> Result<u64, String> {
     if s.is_empty() {
-        return Err("rate limit cannot be empty".to_string());
+        return Err(format!("{what} cannot be empty"));
     }
     let split_at = s.find(|c: char| !c.is_ascii_digit()).unwrap_or(s.len());
     let (digits, suffix) = s.split_at(split_at);
@@ -35,7 +55,7 @@ pub fn parse_rate_limit(s: &str) -> Result<u64, String> {
         other => return Err(format!("unknown suffix '{other}'; use k, m, or g")),
     };
     base.checked_mul(mult)
-        .ok_or_else(|| "rate limit value overflows u64".to_string())
+        .ok_or_else(|| format!("{what} value overflows u64"))
 }
 
 /// Parse a `host:port` string into `InsecureHost`.
@@ -74,6 +94,179 @@ pub fn parse_compress_level(s: &str) -> Result<u8, String> {
     Ok(level)
 }
 
+/// Parse a stream codec of the form `name[:level]`.
+///
+/// Accepts `none`, `lz4`, `xz[:0-9]` and `zstd[:1-19]`.
+pub fn parse_codec(s: &str) -> Result<Codec, String> {
+    Codec::parse(s)
+}
+
+/// Parse a send profile, e.g. `raw,large-block`.
+pub fn parse_send(s: &str) -> Result<SendValue, String> {
+    SendValue::from_str(s).map_err(|_| {
+        format!("send profile must list raw, large-block, embedded, properties or none, got '{s}'")
+    })
+}
+
+/// Parse a number of compression threads into a `u16`; `0` uses all cores.
+pub fn parse_codec_threads(s: &str) -> Result<u16, String> {
+    s.parse()
+        .map_err(|_| format!("number of threads must be a non-negative integer, got '{s}'"))
+}
+
+/// Parse a number of parallel jobs into a `usize`.
+///
+/// Accepts any positive integer.  Zero is rejected because nothing would run.
+pub fn parse_jobs(s: &str) -> Result<usize, String> {
+    let jobs: usize = s
+        .parse()
+        .map_err(|_| format!("number of jobs must be a positive integer, got '{s}'"))?;
+    if jobs == 0 {
+        return Err("number of jobs must be at least 1".to_string());
+    }
+    Ok(jobs)
+}
+
+/// Parse a human-readable interval string into a `Duration`.
+///
+/// Accepts a plain integer of seconds or an integer followed by one of the
+/// suffixes `s`, `m` (× 60), `h` (× 3 600) or `d` (× 86 400).  Zero disables
+/// the respective cycle.  Examples: `"900"`, `"15m"`, `"1h"`.
+pub fn parse_interval(s: &str) -> Result<Duration, String> {
+    let split_at = s.find(|c: char| !c.is_ascii_digit()).unwrap_or(s.len());
+    let (digits, suffix) = s.split_at(split_at);
+    if digits.is_empty() {
+        return Err(format!("no numeric value in '{s}'"));
+    }
+    let base: u64 = digits
+        .parse()
+        .map_err(|_| format!("invalid number '{digits}'"))?;
+    let mult: u64 = match suffix {
+        "" | "s" => 1,
+        "m" => 60,
+        "h" => 3_600,
+        "d" => 86_400,
+        other => return Err(format!("unknown suffix '{other}'; use s, m, h or d")),
+    };
+    base.checked_mul(mult)
+        .map(Duration::from_secs)
+        .ok_or_else(|| "interval value overflows u64".to_string())
+}
+
+/// Options shared by all commands transferring snapshots.
+#[derive(Args, Debug)]
+pub struct TransferArgs {
+    /// run transfer pipe on common entry host, where bash is required
+    #[arg(short = 'd', long, required = false)]
+    pub direct: bool,
+
+    /// limit transfer bandwidth on the sending host via pv, or within abgleich
+    /// with --relay (e.g. 10m, 500k, 1g)
+    #[arg(short = 'r', long, required = false, value_parser = parse_rate_limit)]
+    pub rate_limit: Option<u64>,
+
+    /// xz compression level (0–9); suppresses `zfs send -c` because sending
+    /// pre-compressed blocks would reduce xz efficiency.  Omit the flag
+    /// entirely to disable xz (uses `zfs send -c` instead).  Pass `-x`
+    /// without a value for the default level 5.  Pass `-x N` or `-x=N`
+    /// for a specific level (0 = fastest, 9 = best compression).
+    #[arg(short = 'x', long, num_args = 0..=1, default_missing_value = "5",
+          value_parser = parse_compress_level, conflicts_with = "codec")]
+    pub compress: Option<u8>,
+
+    /// stream codec applied between `zfs send` and `zfs receive`: none, lz4,
+    /// xz[:LEVEL] or zstd[:LEVEL]; any codec but none suppresses `zfs send -c`.
+    /// `-x` is a shorthand for xz
+    #[arg(long, required = false, value_parser = parse_codec)]
+    pub codec: Option<Codec>,
+
+    /// number of compression threads for xz and zstd; 0 uses all cores
+    #[arg(long, required = false, value_parser = parse_codec_threads)]
+    pub codec_threads: Option<u16>,
+
+    /// send all pending snapshots of a dataset as a single `zfs send -I`
+    /// stream instead of one transfer per pair of adjacent snapshots
+    #[arg(long, required = false)]
+    pub range: bool,
+
+    /// additional `zfs send` flags for all datasets as a comma-separated list
+    /// of raw (-w), large-block (-L), embedded (-e) and properties (-p), or
+    /// none; overrides `abgleich:send` properties and `ABGLEICH_SEND`
+    #[arg(long, required = false, value_name = "PROFILE", value_parser = parse_send)]
+    pub send: Option<SendValue>,
+
+    /// spawn sender and receiver separately and relay the stream within
+    /// abgleich instead of piping through bash on this host; rate limit and
+    /// byte count are applied in-process (mutually exclusive with --direct and
+    /// --insecure)
+    #[arg(long, required = false)]
+    pub relay: bool,
+
+    /// buffer up to SIZE bytes in memory between sender and receiver to
+    /// absorb bursts on either side (e.g. 256m, 1g); implies --relay
+    #[arg(long, required = false, value_parser = parse_buffer_size)]
+    pub buffer: Option<usize>,
+
+    /// bypass SSH for data transfer: receiver uses `nc -l PORT | zfs receive`,
+    /// sender uses `zfs send | nc HOST PORT`; format: host:port
+    /// (mutually exclusive with --direct)
+    #[arg(long, required = false, value_parser = parse_insecure)]
+    pub insecure: Option<InsecureHost>,
+}
+
+/// Schedule and locations of `watch`.
+#[derive(Args, Debug)]
+pub struct WatchArgs {
+    /// interval of snap cycles on all sources (e.g. 900, 15m, 1h); 0 disables them
+    #[arg(long, default_value = "15m", value_parser = parse_interval)]
+    pub snap_every: Duration,
+
+    /// interval of sync cycles on all pairs; 0 disables them
+    #[arg(long, default_value = "15m", value_parser = parse_interval)]
+    pub sync_every: Duration,
+
+    /// interval of free cycles on all pairs; disabled unless given
+    #[arg(long, required = false, value_parser = parse_interval)]
+    pub free_every: Option<Duration>,
+
+    /// pairs of source and target, each an alias or [route:][user%]root
+    #[arg(required = true, num_args = 2.., value_names = ["SOURCE", "TARGET"])]
+    pub locations: Vec<String>,
+}
+
+/// Limits of parallel work, applied to the engine as a whole.
+#[derive(Args, Clone, Copy, Debug)]
+pub struct ConcurrencyArgs {
+    /// number of transactions running in parallel, and of change detections
+    /// (`zfs diff`) for snapshots; transactions on the same dataset as well as
+    /// the creation of nested datasets remain ordered
+    #[arg(long, default_value_t = 1, value_parser = parse_jobs)]
+    pub jobs: usize,
+
+    /// maximum number of parallel transactions involving the same host
+    #[arg(long, required = false, value_parser = parse_jobs)]
+    pub jobs_per_host: Option<usize>,
+}
+
+/// Selection of datasets below the root, pushed down into the inventory.
+#[derive(Args, Debug)]
+pub struct FilterArgs {
+    /// only datasets matching PATTERN relative to the root (e.g. `vm/web-*`),
+    /// their descendants and the datasets leading to them; `*` and `?` match
+    /// within one level; repeatable
+    #[arg(long, required = false, value_name = "PATTERN")]
+    pub include: Vec<String>,
+
+    /// skip datasets matching PATTERN relative to the root and their
+    /// descendants; repeatable
+    #[arg(long, required = false, value_name = "PATTERN")]
+    pub exclude: Vec<String>,
+
+    /// skip datasets nested deeper than DEPTH levels below the root
+    #[arg(long, required = false, value_name = "DEPTH")]
+    pub max_depth: Option<usize>,
+}
+
 #[allow(clippy::doc_markdown)]
 #[derive(Debug, Subcommand)]
 pub enum Commands {
@@ -93,6 +286,17 @@ pub enum Commands {
         #[arg(short, long, required = false)]
         force: bool,
 
+        #[command(flatten)]
+        concurrency: ConcurrencyArgs,
+
+        /// destroy the snapshots of each dataset in a single `zfs destroy` call,
+        /// collapsing consecutive snapshots into ranges
+        #[arg(long, required = false)]
+        batch: bool,
+
+        #[command(flatten)]
+        filter: FilterArgs,
+
         /// alias or [route:][user%]root
         #[arg(required = true)]
         source: String,
@@ -109,10 +313,44 @@ pub enum Commands {
         #[arg(short, long, required = false)]
         json: bool,
 
+        #[command(flatten)]
+        filter: FilterArgs,
+
         /// void, alias or [route:][user%]root
         location: Option<String>,
     },
 
+    /// sync the jobs of the configuration file, all of them or those named,
+    /// as a single plan; locations shared by several jobs are inventoried once
+    Run {
+        /// output as json
+        #[arg(short = 'j', long, required = false)]
+        json: bool,
+
+        /// answer all questions with yes
+        #[arg(short = 'y', long, required = false)]
+        yes: bool,
+
+        /// attempt all transactions even if some fail; exit non-zero if any failed;
+        /// force can be further increased by setting the environment variable ABGLEICH_FULLFORCE=1
+        #[arg(short = 'f', long, required = false)]
+        force: bool,
+
+        #[command(flatten)]
+        concurrency: ConcurrencyArgs,
+
+        /// estimate the size of every transfer with a dry run of `zfs send`
+        /// and show it in the plan, together with the total
+        #[arg(long, required = false)]
+        estimate: bool,
+
+        #[command(flatten)]
+        transfer: TransferArgs,
+
+        /// names of jobs; all jobs if omitted
+        names: Vec<String>,
+    },
+
     /// create snapshots of changed datasets for backups
     #[command(arg_required_else_help = true)]
     Snap {
@@ -129,6 +367,16 @@ pub enum Commands {
         #[arg(short, long, required = false)]
         force: bool,
 
+        #[command(flatten)]
+        concurrency: ConcurrencyArgs,
+
+        /// create all snapshots at once with a shared timestamp in a single `zfs snapshot` call
+        #[arg(long, required = false)]
+        batch: bool,
+
+        #[command(flatten)]
+        filter: FilterArgs,
+
         /// alias or [route:][user%]root
         #[arg(required = true)]
         location: String,
@@ -145,52 +393,78 @@ pub enum Commands {
         #[arg(short = 'y', long, required = false)]
         yes: bool,
 
-        /// run transfer pipe on common entry host, where bash is required
-        #[arg(short = 'd', long, required = false)]
-        direct: bool,
-
         /// attempt all transactions even if some fail; exit non-zero if any failed;
         /// force can be further increased by setting the environment variable ABGLEICH_FULLFORCE=1
         #[arg(short = 'f', long, required = false)]
         force: bool,
 
-        /// limit transfer bandwidth on the sending host via pv (e.g. 10m, 500k, 1g)
-        #[arg(short = 'r', long, required = false, value_parser = parse_rate_limit)]
-        rate_limit: Option<u64>,
-
-        /// xz compression level (0–9); suppresses `zfs send -c` because sending
-        /// pre-compressed blocks would reduce xz efficiency.  Omit the flag
-        /// entirely to disable xz (uses `zfs send -c` instead).  Pass `-x`
-        /// without a value for the default level 5.  Pass `-x N` or `-x=N`
-        /// for a specific level (0 = fastest, 9 = best compression).
-        #[arg(short = 'x', long, num_args = 0..=1, default_missing_value = "5",
-              value_parser = parse_compress_level)]
-        compress: Option<u8>,
-
-        /// bypass SSH for data transfer: receiver uses `nc -l PORT | zfs receive`,
-        /// sender uses `zfs send | nc HOST PORT`; format: host:port
-        /// (mutually exclusive with --direct)
-        #[arg(long, required = false, value_parser = parse_insecure)]
-        insecure: Option<InsecureHost>,
+        #[command(flatten)]
+        concurrency: ConcurrencyArgs,
+
+        /// estimate the size of every transfer with a dry run of `zfs send`
+        /// and show it in the plan, together with the total
+        #[arg(long, required = false)]
+        estimate: bool,
+
+        #[command(flatten)]
+        transfer: TransferArgs,
+
+        #[command(flatten)]
+        filter: FilterArgs,
 
         /// alias or [route:][user%]root
         #[arg(required = true)]
         source: String,
 
-        /// alias or [route:][user%]root
-        #[arg(required = true)]
-        target: String,
+        /// one or more, each alias or [route:][user%]root; with several targets,
+        /// transfers are relayed and identical streams are sent only once,
+        /// unless `--direct` or `--insecure` is given
+        #[arg(required = true, num_args = 1..)]
+        targets: Vec<String>,
     },
 
     /// show version
     Version {},
+
+    /// run snap, sync and free cycles on pairs of locations periodically,
+    /// keeping config, probes, inventories and ssh connections between cycles
+    #[command(arg_required_else_help = true)]
+    Watch {
+        /// output as json
+        #[arg(short = 'j', long, required = false)]
+        json: bool,
+
+        /// attempt all transactions even if some fail;
+        /// force can be further increased by setting the environment variable ABGLEICH_FULLFORCE=1
+        #[arg(short = 'f', long, required = false)]
+        force: bool,
+
+        #[command(flatten)]
+        concurrency: ConcurrencyArgs,
+
+        /// create and destroy snapshots in as few calls as possible, like
+        /// `snap --batch` and `free --batch`
+        #[arg(long, required = false)]
+        batch: bool,
+
+        #[command(flatten)]
+        transfer: TransferArgs,
+
+        #[command(flatten)]
+        watch: WatchArgs,
+    },
 }
 
 #[cfg(test)]
 mod tests {
-    use crate::config::InsecureHost;
+    use std::time::Duration;
 
-    use super::{parse_compress_level, parse_insecure, parse_rate_limit};
+    use crate::config::{Codec, InsecureHost};
+
+    use super::{
+        parse_buffer_size, parse_codec, parse_codec_threads, parse_compress_level, parse_insecure,
+        parse_interval, parse_jobs, parse_rate_limit, parse_send,
+    };
 
     #[test]
     fn plain_number() {
@@ -227,6 +501,18 @@ mod tests {
         assert!(parse_rate_limit("m").is_err());
     }
 
+    // ── parse_buffer_size ─────────────────────────────────────────────────
+
+    #[test]
+    fn buffer_size_suffix_m() {
+        assert_eq!(parse_buffer_size("256m"), Ok(256 * 1_024 * 1_024));
+    }
+
+    #[test]
+    fn buffer_size_zero_errors() {
+        assert!(parse_buffer_size("0").is_err());
+    }
+
     // ── parse_compress_level ──────────────────────────────────────────────
 
     #[test]
@@ -259,6 +545,55 @@ mod tests {
         assert!(parse_compress_level("").is_err());
     }
 
+    // ── parse_codec ───────────────────────────────────────────────────────
+
+    #[test]
+    fn codec_zstd_level() {
+        assert_eq!(parse_codec("zstd:7"), Ok(Codec::zstd(7)));
+    }
+
+    #[test]
+    fn codec_xz_default_level() {
+        assert_eq!(parse_codec("xz"), Ok(Codec::xz(Codec::XZ_LEVEL)));
+    }
+
+    #[test]
+    fn codec_unknown_errors() {
+        assert!(parse_codec("brotli").is_err());
+    }
+
+    #[test]
+    fn codec_threads_zero() {
+        assert_eq!(parse_codec_threads("0"), Ok(0));
+    }
+
+    #[test]
+    fn codec_threads_negative_errors() {
+        assert!(parse_codec_threads("-1").is_err());
+    }
+
+    // ── parse_jobs ────────────────────────────────────────────────────────
+
+    #[test]
+    fn jobs_one() {
+        assert_eq!(parse_jobs("1"), Ok(1));
+    }
+
+    #[test]
+    fn jobs_many() {
+        assert_eq!(parse_jobs("16"), Ok(16));
+    }
+
+    #[test]
+    fn jobs_zero_errors() {
+        assert!(parse_jobs("0").is_err());
+    }
+
+    #[test]
+    fn jobs_negative_errors() {
+        assert!(parse_jobs("-2").is_err());
+    }
+
     // ── parse_insecure ────────────────────────────────────────────────────
 
     #[test]
@@ -315,4 +650,34 @@ mod tests {
     fn insecure_port_overflow_errors() {
         assert!(parse_insecure("linux-b:99999").is_err());
     }
+
+    // ── parse_interval ────────────────────────────────────────────────────
+
+    #[test]
+    fn interval_plain_seconds() {
+        assert_eq!(parse_interval("900"), Ok(Duration::from_secs(900)));
+    }
+
+    #[test]
+    fn interval_suffixes() {
+        assert_eq!(parse_interval("15m"), Ok(Duration::from_secs(900)));
+        assert_eq!(parse_interval("2h"), Ok(Duration::from_secs(7_200)));
+        assert_eq!(parse_interval("1d"), Ok(Duration::from_secs(86_400)));
+    }
+
+    #[test]
+    fn interval_invalid_errors() {
+        assert!(parse_interval("").is_err());
+        assert!(parse_interval("m").is_err());
+        assert!(parse_interval("1w").is_err());
+    }
+
+    #[test]
+    fn send_profile() {
+        assert_eq!(
+            parse_send("raw,large-block").unwrap().to_args(),
+            vec!["-w", "-L"]
+        );
+        assert!(parse_send("compressed").is_err());
+    }
 }
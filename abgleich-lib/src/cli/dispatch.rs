@@ -1,11 +1,16 @@
 use clap::Parser;
 use tracing::debug;
 
-use crate::config::{Confirmation, OutputFmt, TransferOptions};
-use crate::consts::VERSION;
+use crate::config::{
+    Codec, Concurrency, Confirmation, Cycle, DatasetFilter, OutputFmt, TransferOptions,
+    WatchSchedule,
+};
+use crate::consts::{DEFAULT_MULTIPLEX, MULTIPLEX_PERSIST, VAR_MULTIPLEX, VERSION};
 use crate::engine::Engine;
+use crate::subprocess::MultiplexerGuard;
+use crate::sys::envvar2bool_or;
 
-use super::command::{Cli, Commands};
+use super::command::{Cli, Commands, ConcurrencyArgs, FilterArgs, TransferArgs, WatchArgs};
 use super::errors::CliError;
 use super::tracing::tracing_init;
 
@@ -14,46 +19,93 @@ pub fn dispatch() -> Result<(), CliError> {
     debug!(version = VERSION);
 
     let args = Cli::parse();
-    match args.command {
+    let _multiplexer = multiplexer(&args.command)?;
+    execute(args.command)
+}
+
+#[allow(clippy::too_many_lines)]
+fn execute(command: Commands) -> Result<(), CliError> {
+    match command {
         Commands::Free {
             json,
             yes,
             force,
+            concurrency: jobs,
+            batch,
+            filter: args,
             source,
             target,
         } => {
             Engine::from_detect()
                 .map_err(CliError::Engine)?
+                .with_concurrency(concurrency(jobs))
+                .with_filter(filter(args))
                 .free_cli(
                     &OutputFmt::from_json_flag(json),
                     &Confirmation::from_yes_flag(yes),
                     force,
                     &source,
                     &target,
+                    batch,
                 )
                 .map_err(CliError::Engine)?;
         }
 
-        Commands::Ls { json, location } => {
+        Commands::Ls {
+            json,
+            filter: args,
+            location,
+        } => {
             Engine::from_detect()
                 .map_err(CliError::Engine)?
+                .with_filter(filter(args))
                 .ls_cli(json, location.as_deref())
                 .map_err(CliError::Engine)?;
         }
 
+        Commands::Run {
+            json,
+            yes,
+            force,
+            concurrency: jobs,
+            estimate,
+            transfer,
+            names,
+        } => {
+            let options = transfer_options(transfer)?;
+            Engine::from_detect()
+                .map_err(CliError::Engine)?
+                .with_concurrency(concurrency(jobs))
+                .with_estimate(estimate)
+                .run_cli(
+                    &OutputFmt::from_json_flag(json),
+                    &Confirmation::from_yes_flag(yes),
+                    &options,
+                    force,
+                    &names,
+                )
+                .map_err(CliError::Engine)?;
+        }
+
         Commands::Snap {
             json,
             yes,
             force,
+            concurrency: jobs,
+            batch,
+            filter: args,
             location,
         } => {
             Engine::from_detect()
                 .map_err(CliError::Engine)?
+                .with_concurrency(concurrency(jobs))
+                .with_filter(filter(args))
                 .snap_cli(
                     &OutputFmt::from_json_flag(json),
                     &Confirmation::from_yes_flag(yes),
                     force,
                     &location,
+                    batch,
                 )
                 .map_err(CliError::Engine)?;
         }
@@ -61,30 +113,27 @@ pub fn dispatch() -> Result<(), CliError> {
         Commands::Sync {
             json,
             yes,
-            direct,
             force,
-            rate_limit,
-            compress,
-            insecure,
+            concurrency: jobs,
+            estimate,
+            transfer,
+            filter: args,
             source,
-            target,
+            targets,
         } => {
-            let options = TransferOptions::new()
-                .with_compress(compress)
-                .with_rate_limit(rate_limit)
-                .with_insecure(insecure)
-                .map_err(CliError::Config)?
-                .with_direct(direct)
-                .map_err(CliError::Config)?;
+            let options = transfer_options(transfer)?;
             Engine::from_detect()
                 .map_err(CliError::Engine)?
+                .with_concurrency(concurrency(jobs))
+                .with_filter(filter(args))
+                .with_estimate(estimate)
                 .sync_cli(
                     &OutputFmt::from_json_flag(json),
                     &Confirmation::from_yes_flag(yes),
                     &options,
                     force,
                     &source,
-                    &target,
+                    &targets,
                 )
                 .map_err(CliError::Engine)?;
         }
@@ -92,6 +141,108 @@ pub fn dispatch() -> Result<(), CliError> {
         Commands::Version {} => {
             println!("{VERSION}");
         }
+
+        Commands::Watch {
+            json,
+            force,
+            concurrency: jobs,
+            batch,
+            transfer,
+            watch: args,
+        } => watch(json, force, concurrency(jobs), batch, transfer, &args)?,
     }
     Ok(())
 }
+
+/// Watch always multiplexes, with masters outlasting the pauses between
+/// cycles, see `watch`.
+fn multiplexer(command: &Commands) -> Result<Option<MultiplexerGuard>, CliError> {
+    if matches!(command, Commands::Watch { .. })
+        || !envvar2bool_or(VAR_MULTIPLEX, DEFAULT_MULTIPLEX).map_err(CliError::Sys)?
+    {
+        return Ok(None);
+    }
+    MultiplexerGuard::start()
+        .map(Some)
+        .map_err(CliError::Subprocess)
+}
+
+fn watch(
+    json: bool,
+    force: bool,
+    concurrency: Concurrency,
+    batch: bool,
+    transfer: TransferArgs,
+    args: &WatchArgs,
+) -> Result<(), CliError> {
+    if !args.locations.len().is_multiple_of(2) {
+        return Err(CliError::UnpairedLocation(
+            args.locations.last().cloned().unwrap_or_default(),
+        ));
+    }
+    let pairs: Vec<(String, String)> = args
+        .locations
+        .chunks(2)
+        .map(|pair| (pair[0].clone(), pair[1].clone()))
+        .collect();
+    let schedule = WatchSchedule::new()
+        .with_interval(Cycle::Snap, Some(args.snap_every))
+        .with_interval(Cycle::Sync, Some(args.sync_every))
+        .with_interval(Cycle::Free, args.free_every);
+    let options = transfer_options(transfer)?;
+    let _multiplexer = MultiplexerGuard::start_with_persist(
+        schedule
+            .get_longest()
+            .map_or(0, |interval| interval.as_secs())
+            + MULTIPLEX_PERSIST,
+    )
+    .map_err(CliError::Subprocess)?;
+    Engine::from_detect()
+        .map_err(CliError::Engine)?
+        .with_concurrency(concurrency)
+        .with_warm_inventories()
+        .watch_cli(
+            &OutputFmt::from_json_flag(json),
+            force,
+            &pairs,
+            &schedule,
+            &options,
+            batch,
+        )
+        .map_err(CliError::Engine)
+}
+
+const fn concurrency(args: ConcurrencyArgs) -> Concurrency {
+    Concurrency::new()
+        .with_jobs(args.jobs)
+        .with_jobs_per_host(args.jobs_per_host)
+}
+
+fn filter(args: FilterArgs) -> DatasetFilter {
+    DatasetFilter::new()
+        .with_include(args.include)
+        .with_exclude(args.exclude)
+        .with_max_depth(args.max_depth)
+}
+
+fn transfer_options(args: TransferArgs) -> Result<TransferOptions, CliError> {
+    let codec = args
+        .codec
+        .or_else(|| args.compress.map(Codec::xz))
+        .unwrap_or_default()
+        .with_threads(args.codec_threads)
+        .map_err(CliError::Config)?;
+    TransferOptions::new()
+        .with_codec(codec)
+        .with_rate_limit(args.rate_limit)
+        .with_range(args.range)
+        .with_send(args.send)
+        .with_insecure(args.insecure)
+        .map_err(CliError::Config)?
+        .with_direct(args.direct)
+        .map_err(CliError::Config)?
+        .with_relay(args.relay)
+        .map_err(CliError::Config)?
+        .with_buffer(args.buffer)
+        .map_err(CliError::Config)
+}
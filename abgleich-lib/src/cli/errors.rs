@@ -2,6 +2,7 @@ use thiserror::Error as ThisError;
 
 use crate::config::ConfigError;
 use crate::engine::EngineError;
+use crate::subprocess::SubprocessError;
 use crate::sys::SysError;
 use crate::traits::Traverse;
 
@@ -19,6 +20,10 @@ pub enum CliError {
     Sys(#[source] SysError),
     #[error("engine subsystem error")]
     Engine(#[source] EngineError),
+    #[error("subprocess subsystem error")]
+    Subprocess(#[source] SubprocessError),
+    #[error("location '{0}' is not paired with a target")]
+    UnpairedLocation(String),
 }
 
 impl Traverse for CliError {}
@@ -0,0 +1,183 @@
+use super::errors::ConfigError;
+
+/// Stream compression applied between `zfs send` and `zfs receive`.
+///
+/// `threads` follows the convention of xz and zstd: `0` uses all cores,
+/// `None` leaves the choice to the respective tool.
+#[derive(Clone, Copy, Debug, Default, Eq, PartialEq)]
+pub enum Codec {
+    #[default]
+    None,
+    Lz4,
+    Xz {
+        level: u8,
+        threads: Option<u16>,
+    },
+    Zstd {
+        level: u8,
+        threads: Option<u16>,
+    },
+}
+
+impl Codec {
+    pub const XZ_LEVEL: u8 = 5;
+    pub const ZSTD_LEVEL: u8 = 3;
+
+    #[must_use]
+    pub const fn xz(level: u8) -> Self {
+        Self::Xz {
+            level,
+            threads: None,
+        }
+    }
+
+    #[must_use]
+    pub const fn zstd(level: u8) -> Self {
+        Self::Zstd {
+            level,
+            threads: None,
+        }
+    }
+
+    /// Parse `name[:level]`, e.g. `none`, `lz4`, `xz`, `xz:9` or `zstd:3`.
+    pub fn parse(value: &str) -> Result<Self, String> {
+        let (name, level) = match value.split_once(':') {
+            Some((name, level)) => (name, Some(level)),
+            None => (value, None),
+        };
+        let parse_level = |max: u8, default: u8, min: u8| -> Result<u8, String> {
+            let Some(level) = level else {
+                return Ok(default);
+            };
+            let parsed: u8 = level
+                .parse()
+                .map_err(|_| format!("{name} level must be {min}-{max}, got '{level}'"))?;
+            if !(min..=max).contains(&parsed) {
+                return Err(format!("{name} level must be {min}-{max}, got {parsed}"));
+            }
+            Ok(parsed)
+        };
+        match name {
+            "none" | "lz4" if level.is_some() => Err(format!("{name} does not take a level")),
+            "none" => Ok(Self::None),
+            "lz4" => Ok(Self::Lz4),
+            "xz" => Ok(Self::xz(parse_level(9, Self::XZ_LEVEL, 0)?)),
+            "zstd" => Ok(Self::zstd(parse_level(19, Self::ZSTD_LEVEL, 1)?)),
+            _ => Err(format!(
+                "unknown codec '{name}'; use none, lz4, xz[:LEVEL] or zstd[:LEVEL]"
+            )),
+        }
+    }
+
+    /// Number of compression threads, for multithreaded codecs only.
+    pub const fn with_threads(self, value: Option<u16>) -> Result<Self, ConfigError> {
+        let Some(threads) = value else {
+            return Ok(self);
+        };
+        match self {
+            Self::Xz { level, .. } => Ok(Self::Xz {
+                level,
+                threads: Some(threads),
+            }),
+            Self::Zstd { level, .. } => Ok(Self::Zstd {
+                level,
+                threads: Some(threads),
+            }),
+            Self::None | Self::Lz4 => Err(ConfigError::CodecThreadsUnsupported),
+        }
+    }
+
+    #[must_use]
+    pub const fn is_none(&self) -> bool {
+        matches!(self, Self::None)
+    }
+
+    /// Executable required on both ends of the transfer.
+    #[must_use]
+    pub const fn get_command(&self) -> Option<&'static str> {
+        match self {
+            Self::None => None,
+            Self::Lz4 => Some("lz4"),
+            Self::Xz { .. } => Some("xz"),
+            Self::Zstd { .. } => Some("zstd"),
+        }
+    }
+
+    /// Arguments compressing stdin to stdout.
+    #[must_use]
+    pub fn get_compress_args(&self) -> Vec<String> {
+        let (level, threads) = match self {
+            Self::None => return Vec::new(),
+            Self::Lz4 => return vec!["-q".to_string(), "-c".to_string()],
+            Self::Xz { level, threads } | Self::Zstd { level, threads } => (level, threads),
+        };
+        let mut args = vec![format!("-{level}")];
+        if let Some(threads) = threads {
+            args.push(format!("-T{threads}"));
+        }
+        if matches!(self, Self::Zstd { .. }) {
+            args.extend(["-q".to_string(), "-c".to_string()]);
+        }
+        args
+    }
+
+    /// Arguments decompressing stdin to stdout.
+    #[must_use]
+    pub fn get_decompress_args(&self) -> Vec<String> {
+        match self {
+            Self::None => Vec::new(),
+            Self::Xz { .. } => vec!["-d".to_string()],
+            Self::Lz4 | Self::Zstd { .. } => {
+                vec!["-d".to_string(), "-q".to_string(), "-c".to_string()]
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::Codec;
+
+    #[test]
+    fn parse() {
+        assert_eq!(Codec::parse("none"), Ok(Codec::None));
+        assert_eq!(Codec::parse("lz4"), Ok(Codec::Lz4));
+        assert_eq!(Codec::parse("xz"), Ok(Codec::xz(5)));
+        assert_eq!(Codec::parse("xz:0"), Ok(Codec::xz(0)));
+        assert_eq!(Codec::parse("zstd"), Ok(Codec::zstd(3)));
+        assert_eq!(Codec::parse("zstd:19"), Ok(Codec::zstd(19)));
+    }
+
+    #[test]
+    fn parse_errors() {
+        assert!(Codec::parse("").is_err());
+        assert!(Codec::parse("gzip").is_err());
+        assert!(Codec::parse("lz4:1").is_err());
+        assert!(Codec::parse("none:1").is_err());
+        assert!(Codec::parse("xz:10").is_err());
+        assert!(Codec::parse("xz:").is_err());
+        assert!(Codec::parse("zstd:0").is_err());
+        assert!(Codec::parse("zstd:fast").is_err());
+    }
+
+    #[test]
+    fn threads() {
+        assert_eq!(
+            Codec::zstd(3)
+                .with_threads(Some(4))
+                .unwrap()
+                .get_compress_args(),
+            vec!["-3", "-T4", "-q", "-c"]
+        );
+        assert_eq!(
+            Codec::xz(9)
+                .with_threads(Some(0))
+                .unwrap()
+                .get_compress_args(),
+            vec!["-9", "-T0"]
+        );
+        assert_eq!(Codec::xz(9).with_threads(None).unwrap(), Codec::xz(9));
+        assert!(Codec::Lz4.with_threads(Some(2)).is_err());
+        assert!(Codec::None.with_threads(Some(2)).is_err());
+    }
+}
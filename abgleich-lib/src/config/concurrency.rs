@@ -0,0 +1,33 @@
+#[derive(Clone, Debug, Eq, PartialEq)]
+pub struct Concurrency {
+    pub jobs: usize,
+    pub jobs_per_host: Option<usize>,
+}
+
+impl Default for Concurrency {
+    fn default() -> Self {
+        Self::new()
+    }
+}
+
+impl Concurrency {
+    #[must_use]
+    pub const fn new() -> Self {
+        Self {
+            jobs: 1,
+            jobs_per_host: None,
+        }
+    }
+
+    #[must_use]
+    pub const fn with_jobs(mut self, value: usize) -> Self {
+        self.jobs = value;
+        self
+    }
+
+    #[must_use]
+    pub const fn with_jobs_per_host(mut self, value: Option<usize>) -> Self {
+        self.jobs_per_host = value;
+        self
+    }
+}
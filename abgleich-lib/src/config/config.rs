@@ -15,17 +15,21 @@ use crate::sys::envvar2string;
 use crate::traits::{FromSerializable, ToSerializable};
 
 use super::errors::ConfigError;
+use super::job::{Job, JobSerializable};
 use super::location::Location;
 
 #[derive(Deserialize, Serialize)]
 #[allow(unused)]
 pub struct ConfigSerializable {
     pub apools: IndexMap<String, String>,
+    #[serde(default, skip_serializing_if = "IndexMap::is_empty")]
+    pub jobs: IndexMap<String, JobSerializable>,
 }
 
 #[allow(unused)]
 pub struct Config {
     apools: IndexMap<String, Location>,
+    jobs: IndexMap<String, Job>,
 }
 
 impl Config {
@@ -34,6 +38,7 @@ impl Config {
     pub fn new() -> Self {
         Self {
             apools: IndexMap::new(),
+            jobs: IndexMap::new(),
         }
     }
 
@@ -149,6 +154,16 @@ impl Config {
         self.apools.iter()
     }
 
+    #[must_use]
+    pub fn get_jobs_iter(&self) -> IMIter<'_, String, Job> {
+        self.jobs.iter()
+    }
+
+    #[must_use]
+    pub fn get_job_ref(&self, name: &str) -> Option<&Job> {
+        self.jobs.get(name)
+    }
+
     #[must_use]
     pub fn get_location_ref(&self, alias: &str) -> Option<&Location> {
         self.apools.get(alias)
@@ -168,7 +183,23 @@ impl FromSerializable<ConfigSerializable, ConfigError> for Config {
         for (alias, apool) in serializable.apools {
             apools.insert(alias, Location::from_str(&apool)?);
         }
-        Ok(Self { apools })
+        let mut config = Self {
+            apools,
+            jobs: IndexMap::new(),
+        };
+        for (name, job) in serializable.jobs {
+            if job.targets.is_empty() {
+                return Err(ConfigError::JobWithoutTargets { name });
+            }
+            let source = config.parse_location(&job.source)?;
+            let targets = job
+                .targets
+                .iter()
+                .map(|target| config.parse_location(target))
+                .collect::<Result<Vec<Location>, ConfigError>>()?;
+            config.jobs.insert(name, Job::new(source, targets));
+        }
+        Ok(config)
     }
 }
 
@@ -178,6 +209,69 @@ impl ToSerializable<ConfigSerializable, ConfigError> for Config {
         for (alias, apool) in &self.apools {
             apools.insert(alias.to_owned(), apool.to_string());
         }
-        Ok(ConfigSerializable { apools })
+        let mut jobs = IndexMap::new();
+        for (name, job) in &self.jobs {
+            jobs.insert(
+                name.to_owned(),
+                JobSerializable {
+                    source: job.get_source_ref().to_string(),
+                    targets: job
+                        .get_targets_ref()
+                        .iter()
+                        .map(ToString::to_string)
+                        .collect(),
+                },
+            );
+        }
+        Ok(ConfigSerializable { apools, jobs })
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use indexmap::IndexMap;
+
+    use crate::traits::{FromSerializable, ToSerializable};
+
+    use super::{Config, ConfigError, ConfigSerializable, JobSerializable};
+
+    fn parse(jobs: &[(&str, &str, &[&str])]) -> Result<Config, ConfigError> {
+        let mut apools = IndexMap::new();
+        apools.insert("nas".to_string(), "nas:root%backup".to_string());
+        Config::from_serializable(ConfigSerializable {
+            apools,
+            jobs: jobs
+                .iter()
+                .map(|(name, source, targets)| {
+                    (
+                        (*name).to_string(),
+                        JobSerializable {
+                            source: (*source).to_string(),
+                            targets: targets.iter().map(ToString::to_string).collect(),
+                        },
+                    )
+                })
+                .collect(),
+        })
+    }
+
+    #[test]
+    fn jobs() {
+        let config = parse(&[("home", "tank/home", &["nas", "usb:backup"])]).unwrap();
+        let job = config.get_job_ref("home").unwrap();
+        assert_eq!(job.get_source_ref().to_string(), "localhost:tank/home");
+        assert_eq!(
+            job.get_targets_ref()
+                .iter()
+                .map(ToString::to_string)
+                .collect::<Vec<_>>(),
+            vec!["nas:root%backup", "usb:backup"]
+        );
+        assert_eq!(config.to_serializable().unwrap().jobs.len(), 1);
+        assert!(parse(&[]).unwrap().get_jobs_iter().next().is_none());
+        assert!(matches!(
+            parse(&[("home", "tank", &[])]),
+            Err(ConfigError::JobWithoutTargets { .. })
+        ));
     }
 }
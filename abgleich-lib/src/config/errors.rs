@@ -6,10 +6,18 @@ use thiserror::Error as ThisError;
 
 #[derive(ThisError, Debug)]
 pub enum ConfigError {
+    #[error("--codec-threads requires a multithreaded codec, i.e. xz or zstd")]
+    CodecThreadsUnsupported,
     #[error("no configuration file found")]
     ConfigNotFound,
+    #[error("--buffer cannot be used together with --direct or --insecure")]
+    BufferConflict,
     #[error("--direct and --insecure cannot be used together")]
     DirectAndInsecureConflict,
+    #[error("--relay cannot be used together with --direct or --insecure")]
+    RelayConflict,
+    #[error("job '{name}' has no targets")]
+    JobWithoutTargets { name: String },
     #[error("i/o error, while {action}: {path}")]
     Io {
         action: String,
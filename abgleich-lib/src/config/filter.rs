@@ -0,0 +1,224 @@
+/// Selection of datasets below the root of a location by glob patterns and
+/// depth.
+///
+/// Patterns apply to dataset names relative to the root, e.g. `vm/*`, where
+/// `*` matches any sequence and `?` any single character within one component
+/// of the name. A pattern matching a dataset also covers all its descendants.
+/// Datasets on the way from the root to possible matches of include patterns
+/// are kept as well, so that the tree remains connected. The root has depth 0.
+#[derive(Clone, Debug, Default, Eq, PartialEq)]
+pub struct DatasetFilter {
+    include: Vec<String>,
+    exclude: Vec<String>,
+    max_depth: Option<usize>,
+}
+
+impl DatasetFilter {
+    #[must_use]
+    pub const fn new() -> Self {
+        Self {
+            include: Vec::new(),
+            exclude: Vec::new(),
+            max_depth: None,
+        }
+    }
+
+    #[must_use]
+    pub fn with_include(mut self, patterns: Vec<String>) -> Self {
+        self.include = patterns
+            .into_iter()
+            .map(|pattern| Self::clean(&pattern).to_string())
+            .collect();
+        self
+    }
+
+    #[must_use]
+    pub fn with_exclude(mut self, patterns: Vec<String>) -> Self {
+        self.exclude = patterns
+            .into_iter()
+            .map(|pattern| Self::clean(&pattern).to_string())
+            .collect();
+        self
+    }
+
+    #[must_use]
+    pub const fn with_max_depth(mut self, value: Option<usize>) -> Self {
+        self.max_depth = value;
+        self
+    }
+
+    #[must_use]
+    pub const fn get_max_depth(&self) -> Option<usize> {
+        self.max_depth
+    }
+
+    #[must_use]
+    pub const fn is_active(&self) -> bool {
+        !self.include.is_empty() || !self.exclude.is_empty() || self.max_depth.is_some()
+    }
+
+    /// Relative names without leading or trailing slashes, the root being empty.
+    fn clean(name: &str) -> &str {
+        name.trim_matches('/')
+    }
+
+    fn get_components(name: &str) -> Vec<&str> {
+        let name = Self::clean(name);
+        if name.is_empty() {
+            Vec::new()
+        } else {
+            name.split('/').collect()
+        }
+    }
+
+    #[must_use]
+    pub fn get_depth(name: &str) -> usize {
+        Self::get_components(name).len()
+    }
+
+    /// Glob match of a single component.
+    fn matches_component(pattern: &[u8], name: &[u8]) -> bool {
+        match (pattern.split_first(), name.split_first()) {
+            (None, None) => true,
+            (Some((b'*', rest)), _) => {
+                Self::matches_component(rest, name)
+                    || (!name.is_empty() && Self::matches_component(pattern, &name[1..]))
+            }
+            (Some((b'?', rest)), Some((_, tail))) => Self::matches_component(rest, tail),
+            (Some((p, rest)), Some((n, tail))) => p == n && Self::matches_component(rest, tail),
+            _ => false,
+        }
+    }
+
+    /// Whether the first components of `name` match all of `pattern`, i.e.
+    /// `name` or one of its ancestors matches.
+    fn covers(pattern: &str, name: &[&str]) -> bool {
+        let pattern = Self::get_components(pattern);
+        pattern.len() <= name.len()
+            && pattern.iter().zip(name).all(|(pattern, component)| {
+                Self::matches_component(pattern.as_bytes(), component.as_bytes())
+            })
+    }
+
+    /// Whether all of `name` matches the first components of `pattern`, i.e.
+    /// descendants of `name` may match.
+    fn leads_to(pattern: &str, name: &[&str]) -> bool {
+        let pattern = Self::get_components(pattern);
+        name.len() < pattern.len()
+            && pattern.iter().zip(name).all(|(pattern, component)| {
+                Self::matches_component(pattern.as_bytes(), component.as_bytes())
+            })
+    }
+
+    /// `name` is relative to the root, with or without leading slash.
+    #[must_use]
+    pub fn is_included(&self, name: &str) -> bool {
+        let components = Self::get_components(name);
+        if self
+            .max_depth
+            .is_some_and(|max_depth| components.len() > max_depth)
+        {
+            return false;
+        }
+        if self
+            .exclude
+            .iter()
+            .any(|pattern| Self::covers(pattern, &components))
+        {
+            return false;
+        }
+        self.include.is_empty()
+            || self.include.iter().any(|pattern| {
+                Self::covers(pattern, &components) || Self::leads_to(pattern, &components)
+            })
+    }
+
+    /// Relative names of the subtrees containing all matches of include
+    /// patterns, i.e. their components up to the first one with wildcards,
+    /// without subtrees nested in others. Just the root without include
+    /// patterns.
+    #[must_use]
+    pub fn get_subtrees(&self) -> Vec<String> {
+        if self.include.is_empty() {
+            return vec![String::new()];
+        }
+        let mut subtrees: Vec<String> = self
+            .include
+            .iter()
+            .map(|pattern| {
+                Self::get_components(pattern)
+                    .into_iter()
+                    .take_while(|component| !component.contains(['*', '?']))
+                    .collect::<Vec<&str>>()
+                    .join("/")
+            })
+            .collect();
+        subtrees.sort_unstable();
+        subtrees.dedup();
+        let nested: Vec<bool> = subtrees
+            .iter()
+            .map(|subtree| {
+                subtrees.iter().any(|other| {
+                    other != subtree
+                        && (other.is_empty() || subtree.starts_with(&format!("{other}/")))
+                })
+            })
+            .collect();
+        subtrees
+            .into_iter()
+            .zip(nested)
+            .filter(|(_, nested)| !nested)
+            .map(|(subtree, _)| subtree)
+            .collect()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::DatasetFilter;
+
+    fn strings(values: &[&str]) -> Vec<String> {
+        values.iter().map(ToString::to_string).collect()
+    }
+
+    #[test]
+    fn include_exclude_depth() {
+        let filter = DatasetFilter::new()
+            .with_include(strings(&["vm/web-*", "home"]))
+            .with_exclude(strings(&["vm/web-test"]))
+            .with_max_depth(Some(3));
+        assert!(filter.is_active());
+        assert!(filter.is_included("/"));
+        assert!(filter.is_included(""));
+        assert!(filter.is_included("/vm"));
+        assert!(filter.is_included("/vm/web-a"));
+        assert!(filter.is_included("vm/web-a/disk"));
+        assert!(!filter.is_included("vm/web-a/disk/part"));
+        assert!(!filter.is_included("/vm/db"));
+        assert!(!filter.is_included("/vm/web-test"));
+        assert!(!filter.is_included("/vm/web-test/disk"));
+        assert!(filter.is_included("/home/user"));
+        assert!(!filter.is_included("/scratch"));
+        assert!(!DatasetFilter::new().is_active());
+        assert!(DatasetFilter::new().is_included("/anything/at/all"));
+    }
+
+    #[test]
+    fn subtrees() {
+        let subtrees = |patterns: &[&str]| {
+            DatasetFilter::new()
+                .with_include(strings(patterns))
+                .get_subtrees()
+        };
+        assert_eq!(subtrees(&[]), vec![""]);
+        assert_eq!(subtrees(&["vm/web-*", "/vm/db/"]), vec!["vm"]);
+        assert_eq!(
+            subtrees(&["vm/a", "vm/b", "home"]),
+            vec!["home", "vm/a", "vm/b"]
+        );
+        assert_eq!(subtrees(&["*/data", "home"]), vec![""]);
+        assert_eq!(subtrees(&["vm", "vm-old/a"]), vec!["vm", "vm-old/a"]);
+        assert_eq!(DatasetFilter::get_depth("/vm/a"), 2);
+        assert_eq!(DatasetFilter::get_depth("/"), 0);
+    }
+}
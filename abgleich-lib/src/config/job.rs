@@ -0,0 +1,33 @@
+use serde::{Deserialize, Serialize};
+
+use super::location::Location;
+
+#[derive(Deserialize, Serialize)]
+pub struct JobSerializable {
+    pub source: String,
+    pub targets: Vec<String>,
+}
+
+/// Replication of a source into one or more targets, run by `abgleich run`.
+#[derive(Clone)]
+pub struct Job {
+    source: Location,
+    targets: Vec<Location>,
+}
+
+impl Job {
+    #[must_use]
+    pub const fn new(source: Location, targets: Vec<Location>) -> Self {
+        Self { source, targets }
+    }
+
+    #[must_use]
+    pub const fn get_source_ref(&self) -> &Location {
+        &self.source
+    }
+
+    #[must_use]
+    pub fn get_targets_ref(&self) -> &[Location] {
+        &self.targets
+    }
+}
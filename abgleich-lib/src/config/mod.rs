@@ -1,17 +1,27 @@
+mod codec;
+mod concurrency;
 mod config;
 mod confirmation;
 mod errors;
+mod filter;
+mod job;
 mod location;
 mod outputfmt;
 mod root;
 mod route;
 mod transfer;
+mod watch;
 
+pub use codec::Codec;
+pub use concurrency::Concurrency;
 pub use config::Config;
 pub use confirmation::Confirmation;
 pub use errors::ConfigError;
+pub use filter::DatasetFilter;
+pub use job::Job;
 pub use location::Location;
 pub use outputfmt::OutputFmt;
 pub use root::Root;
 pub use route::Route;
 pub use transfer::{InsecureHost, TransferOptions};
+pub use watch::{Cycle, WatchSchedule};
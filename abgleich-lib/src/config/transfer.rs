@@ -1,3 +1,6 @@
+use crate::property::SendValue;
+
+use super::codec::Codec;
 use super::errors::ConfigError;
 
 #[derive(Clone, Debug, Default, Eq, PartialEq)]
@@ -8,26 +11,44 @@ pub struct InsecureHost {
 
 #[derive(Clone, Debug, Default)]
 pub struct TransferOptions {
-    pub compress: Option<u8>,
+    pub buffer: Option<usize>,
+    pub codec: Codec,
     pub direct: bool,
     pub insecure: Option<InsecureHost>,
     pub rate_limit: Option<u64>,
+    pub range: bool,
+    pub relay: bool,
+    pub send: Option<SendValue>, // overrides abgleich:send and ABGLEICH_SEND
 }
 
 impl TransferOptions {
     #[must_use]
     pub const fn new() -> Self {
         Self {
-            compress: None,
+            buffer: None,
+            codec: Codec::None,
             direct: false,
             insecure: None,
             rate_limit: None,
+            range: false,
+            relay: false,
+            send: None,
+        }
+    }
+
+    /// Bytes buffered between sender and receiver. Implies a relay.
+    pub fn with_buffer(mut self, value: Option<usize>) -> Result<Self, ConfigError> {
+        if value.is_some() && (self.direct || self.insecure.is_some()) {
+            return Err(ConfigError::BufferConflict);
         }
+        self.buffer = value;
+        self.relay |= value.is_some();
+        Ok(self)
     }
 
     #[must_use]
-    pub const fn with_compress(mut self, value: Option<u8>) -> Self {
-        self.compress = value;
+    pub const fn with_codec(mut self, value: Codec) -> Self {
+        self.codec = value;
         self
     }
 
@@ -35,6 +56,9 @@ impl TransferOptions {
         if value && self.insecure.is_some() {
             return Err(ConfigError::DirectAndInsecureConflict);
         }
+        if value && self.relay {
+            return Err(ConfigError::RelayConflict);
+        }
         self.direct = value;
         Ok(self)
     }
@@ -43,10 +67,46 @@ impl TransferOptions {
         if self.direct && value.is_some() {
             return Err(ConfigError::DirectAndInsecureConflict);
         }
+        if self.relay && value.is_some() {
+            return Err(ConfigError::RelayConflict);
+        }
         self.insecure = value;
         Ok(self)
     }
 
+    #[must_use]
+    pub const fn with_range(mut self, value: bool) -> Self {
+        self.range = value;
+        self
+    }
+
+    /// Connect sender and receiver within abgleich instead of piping through
+    /// a shell, with rate limit and byte count applied in-process.
+    pub fn with_relay(mut self, value: bool) -> Result<Self, ConfigError> {
+        if value && (self.direct || self.insecure.is_some()) {
+            return Err(ConfigError::RelayConflict);
+        }
+        self.relay = value || self.buffer.is_some();
+        Ok(self)
+    }
+
+    /// Relays transfers to more than one target, so that they can share a
+    /// single `zfs send`, unless streams are piped directly or via nc.
+    #[must_use]
+    pub const fn with_fan_out(mut self, targets: usize) -> Self {
+        if targets > 1 && !self.direct && self.insecure.is_none() {
+            self.relay = true;
+        }
+        self
+    }
+
+    /// Additional `zfs send` flags for all datasets.
+    #[must_use]
+    pub const fn with_send(mut self, value: Option<SendValue>) -> Self {
+        self.send = value;
+        self
+    }
+
     #[must_use]
     pub const fn with_rate_limit(mut self, value: Option<u64>) -> Self {
         self.rate_limit = value;
@@ -0,0 +1,82 @@
+use std::time::Duration;
+
+/// Kinds of cycles run by `abgleich watch`, in the order they run within a
+/// round if due at the same time.
+#[derive(Clone, Copy, Debug, Eq, Ord, PartialEq, PartialOrd)]
+pub enum Cycle {
+    Snap,
+    Sync,
+    Free,
+}
+
+impl Cycle {
+    #[must_use]
+    pub const fn as_str(&self) -> &'static str {
+        match self {
+            Self::Snap => "snap",
+            Self::Sync => "sync",
+            Self::Free => "free",
+        }
+    }
+}
+
+/// Intervals of the cycles run by `abgleich watch`. Cycles without an
+/// interval do not run.
+#[derive(Clone, Debug, Default, Eq, PartialEq)]
+pub struct WatchSchedule {
+    intervals: Vec<(Cycle, Duration)>,
+}
+
+impl WatchSchedule {
+    #[must_use]
+    pub const fn new() -> Self {
+        Self {
+            intervals: Vec::new(),
+        }
+    }
+
+    /// Zero disables the cycle, like `None`.
+    #[must_use]
+    pub fn with_interval(mut self, cycle: Cycle, value: Option<Duration>) -> Self {
+        self.intervals.retain(|(other, _)| *other != cycle);
+        if let Some(value) = value.filter(|value| !value.is_zero()) {
+            self.intervals.push((cycle, value));
+            self.intervals.sort_by_key(|(cycle, _)| *cycle);
+        }
+        self
+    }
+
+    #[must_use]
+    pub fn get_intervals_ref(&self) -> &[(Cycle, Duration)] {
+        &self.intervals
+    }
+
+    #[must_use]
+    pub fn get_longest(&self) -> Option<Duration> {
+        self.intervals.iter().map(|(_, interval)| *interval).max()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::time::Duration;
+
+    use super::{Cycle, WatchSchedule};
+
+    #[test]
+    fn intervals() {
+        let schedule = WatchSchedule::new()
+            .with_interval(Cycle::Free, Some(Duration::from_secs(3_600)))
+            .with_interval(Cycle::Snap, Some(Duration::from_secs(900)))
+            .with_interval(Cycle::Sync, Some(Duration::ZERO));
+        assert_eq!(
+            schedule.get_intervals_ref(),
+            &[
+                (Cycle::Snap, Duration::from_secs(900)),
+                (Cycle::Free, Duration::from_secs(3_600)),
+            ]
+        );
+        assert_eq!(schedule.get_longest(), Some(Duration::from_secs(3_600)));
+        assert_eq!(WatchSchedule::new().get_longest(), None);
+    }
+}
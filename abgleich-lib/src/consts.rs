@@ -1,15 +1,27 @@
+// Stays well below the 128 KiB Linux allows for the single argument which
+// carries a complete command through ssh to the remote shell.
+pub static ARGUMENTS_MAX_LENGTH: usize = 65_536;
 pub static DEFAULT_DIFF: bool = true;
 pub static DEFAULT_FORMAT: &str = "abgleich_%Y-%m-%dT%H:%M:%S:%3f_backup";
 pub static DEFAULT_FULLFORCE: bool = false;
+pub static DEFAULT_INVENTORY_CACHE: bool = false;
 pub static DEFAULT_LOGLEVEL: u8 = 30; // >= WARN
+pub static DEFAULT_MULTIPLEX: bool = false;
 pub static DEFAULT_OVERLAP: i64 = 2;
+pub static DEFAULT_PROBE_TTL: u64 = 0; // seconds, not persisted
+pub static DEFAULT_SEND: &str = "none";
 pub static DEFAULT_SNAP: &str = "changed";
 pub static DEFAULT_SYNC: bool = true;
 pub static DEFAULT_THRESHOLD: u64 = 12_582_912;
 pub static HOSTS_DELIMITER: char = '/';
 pub static HOSTS_SUFFIX: char = ':';
+pub static INVENTORY_CACHE: &str = "inventory";
 pub static LOCALHOST: &str = "localhost";
+pub static MULTIPLEX_PERSIST: u64 = 60; // seconds
 pub static NAME: &str = "abgleich";
+pub static PROBE_CACHE: &str = "probes.json";
+pub static RELAY_CHUNK_SIZE: usize = 1_048_576; // bytes
+pub static RELAY_REPORT_INTERVAL: u64 = 1; // seconds
 pub static ROOT_DELIMITER: char = '/';
 pub static TRACEBACK_SEP: &str = " ==> ";
 pub static USER_SUFFIX: char = '%';
@@ -17,9 +29,14 @@ pub static VAR_CONFIG: &str = "ABGLEICH_CONFIG";
 pub static VAR_DIFF: &str = "ABGLEICH_DIFF";
 pub static VAR_FORMAT: &str = "ABGLEICH_FORMAT";
 pub static VAR_FULLFORCE: &str = "ABGLEICH_FULLFORCE";
+pub static VAR_INVENTORY_CACHE: &str = "ABGLEICH_INVENTORY_CACHE";
 pub static VAR_LOGLEVEL: &str = "ABGLEICH_LOGLEVEL";
+pub static VAR_MULTIPLEX: &str = "ABGLEICH_MULTIPLEX";
 pub static VAR_OVERLAP: &str = "ABGLEICH_OVERLAP";
+pub static VAR_PROBE_TTL: &str = "ABGLEICH_PROBE_TTL";
+pub static VAR_SEND: &str = "ABGLEICH_SEND";
 pub static VAR_SNAP: &str = "ABGLEICH_SNAP";
 pub static VAR_SYNC: &str = "ABGLEICH_SYNC";
 pub static VAR_THRESHOLD: &str = "ABGLEICH_THRESHOLD";
+pub static VAR_XDG_CACHE_HOME: &str = "XDG_CACHE_HOME";
 pub static VERSION: &str = env!("CARGO_PKG_VERSION");
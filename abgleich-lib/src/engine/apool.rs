@@ -1,94 +1,234 @@
+use std::collections::HashSet;
+
+use chrono::Utc;
 use colored::Colorize;
 use indexmap::IndexMap;
 use indexmap::map::Values;
 use serde_json::json;
 
-use crate::config::Location;
+use crate::config::{DatasetFilter, Location};
 use crate::output::{Alignment, Table, TableColumn, colorized_storage_si_suffix};
-use crate::property::{BaseProperty, Description, TypeValue};
-use crate::transaction::{BaseBuilder, InventoryBuilder, TransactionList};
+use crate::property::Projection;
+use crate::subprocess::chunk_arguments;
+use crate::sys::parallel_map;
+use crate::transaction::{
+    BaseBuilder, CreateSnapshotsBuilder, InventoryBuilder, Transaction, TransactionList,
+};
 
+use super::apoolbuilder::ApoolBuilder;
 use super::common::Common;
 use super::dataset::Dataset;
 use super::errors::EngineError;
-use super::snapshot::Snapshot;
 
 pub struct Apool {
     location: Location,
     datasets: IndexMap<String, Dataset>,
+    partial: bool, // not all datasets below the root were inventoried
 }
 
 impl Apool {
-    pub fn from_location(location: Location) -> Result<Self, EngineError> {
-        let outcome = InventoryBuilder::new(&location)
+    #[must_use]
+    pub const fn new(location: Location, datasets: IndexMap<String, Dataset>) -> Self {
+        Self {
+            location,
+            datasets,
+            partial: false,
+        }
+    }
+
+    pub fn from_location(location: Location, projection: Projection) -> Result<Self, EngineError> {
+        let transaction = InventoryBuilder::new(&location, projection)
+            .build()
+            .map_err(EngineError::TransactionBuild)?;
+        let mut builder = ApoolBuilder::new(location);
+        Self::push_inventory(&transaction, &mut builder, |_| true)?;
+        builder.build()
+    }
+
+    /// Like `from_location`, but only datasets included by `filter` are
+    /// listed and parsed. Instead of the entire tree, only subtrees which
+    /// may hold matches of include patterns are inventoried, up to the
+    /// maximum depth, plus their ancestors on their own. As targets may lack
+    /// some of them, the existence of subtrees and ancestors is checked first.
+    /// Datasets matching exclude patterns are dropped while being read.
+    pub fn from_filtered_location(
+        location: &Location,
+        projection: Projection,
+        filter: &DatasetFilter,
+    ) -> Result<Self, EngineError> {
+        let root = location.get_root_ref().to_clean_string();
+        let get_absolute = |relative: &str| {
+            if relative.is_empty() {
+                root.clone()
+            } else {
+                format!("{root}/{relative}")
+            }
+        };
+        let subtrees = filter.get_subtrees();
+        let mut ancestors: Vec<String> = Vec::new();
+        for subtree in &subtrees {
+            let components: Vec<&str> = subtree.split('/').filter(|c| !c.is_empty()).collect();
+            for depth in 0..components.len() {
+                let ancestor = components[..depth].join("/");
+                if !ancestors.contains(&ancestor) && filter.is_included(&ancestor) {
+                    ancestors.push(ancestor);
+                }
+            }
+        }
+        let existing = Self::get_existing(
+            location,
+            ancestors
+                .iter()
+                .chain(&subtrees)
+                .map(|name| get_absolute(name)),
+        )?;
+        let mut groups: IndexMap<Option<usize>, Vec<String>> = IndexMap::new();
+        for subtree in &subtrees {
+            let absolute = get_absolute(subtree);
+            if !existing.contains(&absolute) {
+                continue;
+            }
+            // Snapshots are one level below their dataset.
+            let depth = match filter.get_max_depth() {
+                Some(max_depth) => match max_depth.checked_sub(DatasetFilter::get_depth(subtree)) {
+                    Some(depth) => Some(depth + 1),
+                    None => continue,
+                },
+                None => None,
+            };
+            groups.entry(depth).or_default().push(absolute);
+        }
+        ancestors.retain(|name| existing.contains(&get_absolute(name)));
+        // Relative name of the dataset a line of output is about.
+        let get_relative = |line: &str| {
+            let name = line.split(['\t', '@']).next().unwrap_or_default();
+            name.strip_prefix(root.as_str())
+                .filter(|rest| rest.is_empty() || rest.starts_with('/'))
+                .map(|rest| rest.trim_start_matches('/').to_string())
+        };
+        let mut builder = ApoolBuilder::new(location.clone());
+        if !ancestors.is_empty() {
+            let transaction = InventoryBuilder::new(location, projection)
+                .with_datasets(ancestors.iter().map(|name| get_absolute(name)).collect())
+                .build()
+                .map_err(EngineError::TransactionBuild)?;
+            Self::push_inventory(&transaction, &mut builder, |line| {
+                get_relative(line).is_some_and(|name| ancestors.contains(&name))
+            })?;
+        }
+        for (depth, names) in groups {
+            let transaction = InventoryBuilder::new(location, projection)
+                .with_subtrees(names, depth)
+                .build()
+                .map_err(EngineError::TransactionBuild)?;
+            Self::push_inventory(&transaction, &mut builder, |line| {
+                get_relative(line).is_some_and(|name| filter.is_included(&name))
+            })?;
+        }
+        let mut apool = builder.build()?;
+        apool.partial = true;
+        Ok(apool)
+    }
+
+    /// Absolute names of those `candidates` which exist. The root of the
+    /// location is always checked and must exist.
+    fn get_existing(
+        location: &Location,
+        candidates: impl Iterator<Item = String>,
+    ) -> Result<HashSet<String>, EngineError> {
+        let root = location.get_root_ref().to_clean_string();
+        let mut names = vec![root.clone()];
+        for candidate in candidates {
+            if !names.contains(&candidate) {
+                names.push(candidate);
+            }
+        }
+        let outcome = InventoryBuilder::new(location, Projection::Target)
+            .with_existing(names)
             .build()
             .map_err(EngineError::TransactionBuild)?
             .run()
             .map_err(EngineError::TransactionRun)?;
+        let existing: HashSet<String> = outcome
+            .get_data_ref()
+            .unwrap_or_default()
+            .lines()
+            .map(|line| line.trim().to_string())
+            .collect();
+        if !existing.contains(&root) {
+            outcome
+                .assert_success()
+                .map_err(EngineError::TransactionRun)?;
+        }
+        Ok(existing)
+    }
+
+    /// Feeds the output lines of `transaction` accepted by `accept` into
+    /// `builder` while the inventory is running.
+    fn push_inventory(
+        transaction: &Transaction,
+        builder: &mut ApoolBuilder,
+        accept: impl Fn(&str) -> bool,
+    ) -> Result<(), EngineError> {
+        let mut error = None;
+        let outcome = transaction
+            .run_lines(|line| {
+                if !accept(line) {
+                    return true;
+                }
+                match builder.push_line(line) {
+                    Ok(()) => true,
+                    Err(err) => {
+                        error = Some(err);
+                        false
+                    }
+                }
+            })
+            .map_err(EngineError::TransactionRun)?;
+        if let Some(err) = error {
+            return Err(err);
+        }
         outcome
             .assert_success()
-            .map_err(EngineError::TransactionRun)?;
-        Self::from_raw(
-            location,
-            #[expect(clippy::missing_panics_doc, reason = "infallible")]
-            outcome.get_data_ref().unwrap(),
-        )
+            .map_err(EngineError::TransactionRun)
     }
 
     pub fn from_raw(location: Location, raw: &str) -> Result<Self, EngineError> {
-        let mut descriptions = Description::from_raws(raw).map_err(EngineError::Property)?;
-        let mut dataset_names: Vec<String> = Vec::new();
-        let mut snapshot_names: Vec<String> = Vec::new();
-        for (name, description) in &descriptions {
-            match description
-                .type_
-                .as_ref()
-                .ok_or(EngineError::DatasetTypeUnknown {
-                    name: name.clone(),
-                    root: location.get_root_ref().to_string(),
-                })?
-                .get_value_ref()
-            {
-                TypeValue::Snapshot => snapshot_names.push(name.clone()),
-                _ => dataset_names.push(name.clone()),
-            }
-        }
-        descriptions.reverse(); // a bit of performance later on, i.e. less shifting?
-        let mut datasets = IndexMap::new();
-        for name in dataset_names {
-            let mut description = {
-                #[expect(clippy::missing_panics_doc, reason = "infallible")]
-                descriptions.shift_remove(&name).unwrap()
-            };
-            description.fix_dataset_relative(location.get_root_ref().as_str());
-            datasets.insert(
-                description.name.clone(),
-                Dataset::from_description(description),
-            );
-        }
-        for name in snapshot_names {
-            let mut description = {
-                #[expect(clippy::missing_panics_doc, reason = "infallible")]
-                descriptions.shift_remove(&name).unwrap()
-            };
-            let parent = description
-                .fix_snapshot_relative(location.get_root_ref().as_str())
-                .map_err(EngineError::Property)?;
-            datasets
-                .get_mut(&parent)
-                .ok_or(EngineError::DatasetUnknown {
-                    name: parent.clone(),
-                    root: location.get_root_ref().to_string(),
-                })?
-                .push_snapshot(Snapshot::from_description(description));
+        let mut builder = ApoolBuilder::new(location);
+        for line in raw.split('\n') {
+            builder.push_line(line)?;
         }
-        Ok(Self { location, datasets })
+        builder.build()
     }
 
-    pub fn get_create_snapshot_transactions(&self) -> Result<TransactionList, EngineError> {
+    /// Change detection, possibly involving `zfs diff`, runs on up to
+    /// `workers` threads. Transactions are generated in dataset order.
+    /// With `batch`, all snapshots share one timestamp and are created by as
+    /// few `zfs snapshot` calls as the maximum argument length permits.
+    pub fn get_create_snapshot_transactions(
+        &self,
+        workers: usize,
+        batch: bool,
+    ) -> Result<TransactionList, EngineError> {
+        let datasets: Vec<&Dataset> = self.datasets.values().collect();
+        let intended = parallel_map(&datasets, workers, |dataset| {
+            dataset.is_snapshot_intended(&self.location)
+        });
         let mut transactions = TransactionList::new();
-        for dataset in self.datasets.values() {
-            if dataset.is_snapshot_intended(&self.location)? {
+        if batch {
+            let mut selected = Vec::with_capacity(datasets.len());
+            for (dataset, intended) in datasets.iter().zip(intended) {
+                if intended? {
+                    selected.push(*dataset);
+                }
+            }
+            for transaction in self.get_create_snapshots_transactions(&selected, datasets.len())? {
+                transactions.push(transaction);
+            }
+            return Ok(transactions);
+        }
+        for (dataset, intended) in datasets.into_iter().zip(intended) {
+            if intended? {
                 transactions.push(dataset.get_create_snapshot_transaction(
                     &self.location,
                     dataset.generate_snapshot_name(None),
@@ -98,6 +238,56 @@ impl Apool {
         Ok(transactions)
     }
 
+    /// `zfs snapshot -r` replaces the list if every dataset of the apool is
+    /// selected, the root dataset included, and all snapshot names match.
+    fn get_create_snapshots_transactions(
+        &self,
+        selected: &[&Dataset],
+        total: usize,
+    ) -> Result<Vec<Transaction>, EngineError> {
+        if selected.is_empty() {
+            return Ok(Vec::new());
+        }
+        let timestamp = Utc::now();
+        let mut snapshots = Vec::with_capacity(selected.len());
+        let mut written = Vec::with_capacity(selected.len());
+        for dataset in selected {
+            snapshots.push((
+                dataset.get_name_ref().to_string(),
+                dataset.generate_snapshot_name(Some(timestamp)),
+            ));
+            written.push(dataset.get_written(&self.location)?);
+        }
+        let recursive = !self.partial
+            && selected.len() == total
+            && snapshots[0].0 == "/"
+            && snapshots.iter().all(|(_, name)| *name == snapshots[0].1);
+        if recursive {
+            return Ok(vec![
+                CreateSnapshotsBuilder::new(&self.location, snapshots, written.iter().sum())
+                    .with_recursive(true)
+                    .build()
+                    .map_err(EngineError::TransactionBuild)?,
+            ]);
+        }
+        let chunks = chunk_arguments(
+            snapshots.into_iter().zip(written).collect(),
+            |((dataset, snapshot), _)| {
+                CreateSnapshotsBuilder::get_argument_length(&self.location, dataset, snapshot)
+            },
+        );
+        chunks
+            .into_iter()
+            .map(|chunk| {
+                let (snapshots, written): (Vec<(String, String)>, Vec<u64>) =
+                    chunk.into_iter().unzip();
+                CreateSnapshotsBuilder::new(&self.location, snapshots, written.iter().sum())
+                    .build()
+                    .map_err(EngineError::TransactionBuild)
+            })
+            .collect()
+    }
+
     #[must_use]
     pub fn get_dataset_iter(&self) -> Values<'_, String, Dataset> {
         self.datasets.values()
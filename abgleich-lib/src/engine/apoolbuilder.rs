@@ -0,0 +1,195 @@
+use indexmap::IndexMap;
+
+use crate::config::Location;
+use crate::property::{BaseProperty, Description, RawProperty, TypeValue};
+
+use super::apool::Apool;
+use super::dataset::Dataset;
+use super::errors::EngineError;
+use super::snapshot::Snapshot;
+
+/// Single-pass assembly of an `Apool` from lines of `zfs get -Hp` output.
+///
+/// `zfs get` reports all properties of a dataset or snapshot on consecutive
+/// lines. The entity is therefore complete once another one begins, and is
+/// attached to the tree right away. Snapshots usually follow their dataset;
+/// those which do not are kept aside until the end.
+pub struct ApoolBuilder {
+    location: Location,
+    datasets: IndexMap<String, Dataset>,
+    current: Option<Description>,
+    orphans: Vec<(String, Snapshot)>,
+}
+
+impl ApoolBuilder {
+    #[must_use]
+    pub fn new(location: Location) -> Self {
+        Self {
+            location,
+            datasets: IndexMap::new(),
+            current: None,
+            orphans: Vec::new(),
+        }
+    }
+
+    pub fn push_line(&mut self, line: &str) -> Result<(), EngineError> {
+        let line = line.trim_matches([' ', '\t', '\n', '\r']);
+        if line.is_empty() {
+            return Ok(());
+        }
+        let raw_property = RawProperty::from_line(line).map_err(EngineError::Property)?;
+        if raw_property.is_void() {
+            return Ok(());
+        }
+        if self
+            .current
+            .as_ref()
+            .is_none_or(|description| description.name != raw_property.dataset)
+        {
+            self.flush()?;
+        }
+        self.current
+            .get_or_insert_with(|| Description::new(raw_property.dataset.to_string()))
+            .fill(&raw_property)
+            .map_err(EngineError::Property)
+    }
+
+    fn flush(&mut self) -> Result<(), EngineError> {
+        let Some(mut description) = self.current.take() else {
+            return Ok(());
+        };
+        let root = self.location.get_root_ref().as_str();
+        let is_snapshot = description
+            .type_
+            .as_ref()
+            .ok_or_else(|| EngineError::DatasetTypeUnknown {
+                name: description.name.clone(),
+                root: root.to_string(),
+            })?
+            .get_value_ref()
+            == &TypeValue::Snapshot;
+        if is_snapshot {
+            let parent = description
+                .fix_snapshot_relative(root)
+                .map_err(EngineError::Property)?;
+            let snapshot = Snapshot::from_description(description);
+            match self.datasets.get_mut(&parent) {
+                Some(dataset) => dataset.push_snapshot(snapshot),
+                None => self.orphans.push((parent, snapshot)),
+            }
+        } else {
+            description.fix_dataset_relative(root);
+            self.datasets.insert(
+                description.name.clone(),
+                Dataset::from_description(description),
+            );
+        }
+        Ok(())
+    }
+
+    pub fn build(mut self) -> Result<Apool, EngineError> {
+        self.flush()?;
+        for (parent, snapshot) in self.orphans {
+            self.datasets
+                .get_mut(&parent)
+                .ok_or_else(|| EngineError::DatasetUnknown {
+                    name: parent.clone(),
+                    root: self.location.get_root_ref().to_string(),
+                })?
+                .push_snapshot(snapshot);
+        }
+        Ok(Apool::new(self.location, self.datasets))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::str::FromStr;
+
+    use crate::config::Location;
+
+    use super::super::apool::Apool;
+    use super::super::common::Common;
+    use super::super::errors::EngineError;
+
+    fn apool(root: &str, raw: &str) -> Result<Apool, EngineError> {
+        Apool::from_raw(Location::from_str(root).unwrap(), raw)
+    }
+
+    fn names(apool: &Apool) -> Vec<(String, Vec<String>)> {
+        apool
+            .get_dataset_iter()
+            .map(|dataset| {
+                (
+                    dataset.get_name_ref().to_string(),
+                    dataset
+                        .get_snapshot_names_iter()
+                        .map(ToString::to_string)
+                        .collect(),
+                )
+            })
+            .collect()
+    }
+
+    const RAW: &str = "\
+tank\ttype\tfilesystem\t-
+tank\tcreation\t1\t-
+tank\tabgleich:snap\t-\t-
+tank@s1\ttype\tsnapshot\t-
+tank@s1\tcreation\t2\t-
+tank/a\ttype\tfilesystem\t-
+tank/a\tcreation\t3\t-
+tank/a@s1\ttype\tsnapshot\t-
+tank/a@s1\tcreation\t4\t-
+tank/a@s2\ttype\tsnapshot\t-
+tank/a@s2\tcreation\t5\t-
+";
+
+    #[test]
+    fn tree() {
+        let apool = apool("tank", RAW).unwrap();
+        assert_eq!(
+            names(&apool),
+            vec![
+                ("/".to_string(), vec!["s1".to_string()]),
+                ("/a".to_string(), vec!["s1".to_string(), "s2".to_string()]),
+            ]
+        );
+        let a = apool.get_dataset_ref("/a").unwrap();
+        assert_eq!(a.get_creation(), 3);
+        assert_eq!(a.get_snapshot_ref_by_name("s2").unwrap().get_creation(), 5);
+    }
+
+    #[test]
+    fn snapshot_before_dataset() {
+        let raw = "\
+tank/a@s1\ttype\tsnapshot\t-
+tank/a@s1\tcreation\t4\t-
+tank/a\ttype\tfilesystem\t-
+tank/a\tcreation\t3\t-
+";
+        let apool = apool("tank/", raw).unwrap();
+        assert_eq!(
+            names(&apool),
+            vec![("a".to_string(), vec!["s1".to_string()])]
+        );
+    }
+
+    #[test]
+    fn unknown_parent() {
+        let raw = "tank/a@s1\ttype\tsnapshot\t-\n";
+        assert!(matches!(
+            apool("tank", raw),
+            Err(EngineError::DatasetUnknown { .. })
+        ));
+    }
+
+    #[test]
+    fn unknown_type() {
+        let raw = "tank\tcreation\t1\t-\n";
+        assert!(matches!(
+            apool("tank", raw),
+            Err(EngineError::DatasetTypeUnknown { .. })
+        ));
+    }
+}
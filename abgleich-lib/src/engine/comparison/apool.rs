@@ -20,11 +20,11 @@ impl ApoolComparison<'_> {
         ApoolComparison { source, target }
     }
 
-    pub fn get_free_transactions(&self) -> Result<TransactionList, EngineError> {
+    pub fn get_free_transactions(&self, batch: bool) -> Result<TransactionList, EngineError> {
         let mut transactions: TransactionList = TransactionList::new();
         for dataset_comparison in self.get_dataset_comparisons_iter() {
             let mut sub =
-                dataset_comparison.get_free_transactions(self.source.get_location_ref())?;
+                dataset_comparison.get_free_transactions(self.source.get_location_ref(), batch)?;
             transactions.append(&mut sub);
         }
         Ok(transactions)
@@ -1,7 +1,9 @@
 use crate::config::{Location, TransferOptions};
+use crate::property::SendValue;
+use crate::subprocess::chunk_arguments;
 use crate::transaction::{
-    BaseBuilder, DestroySnapshotBuilder, TransactionList, TransferIncrementalBuilder,
-    TransferInitialBuilder,
+    BaseBuilder, DestroySnapshotBuilder, DestroySnapshotsBuilder, TransactionList,
+    TransferIncrementalBuilder, TransferInitialBuilder, TransferResumeBuilder,
 };
 
 use super::super::common::Common;
@@ -20,7 +22,14 @@ impl<'a> DatasetComparison<'a> {
         Self { source, target }
     }
 
-    pub fn get_free_transactions(&self, source: &Location) -> Result<TransactionList, EngineError> {
+    /// With `batch`, the snapshots are destroyed by as few `zfs destroy`
+    /// calls as the maximum argument length permits, consecutive ones being
+    /// collapsed into ranges.
+    pub fn get_free_transactions(
+        &self,
+        source: &Location,
+        batch: bool,
+    ) -> Result<TransactionList, EngineError> {
         let (source_dataset, target_dataset) = match (self.source, self.target) {
             (None | Some(_), None) | (None, Some(_)) => return Ok(TransactionList::new()),
             (Some(source_dataset), Some(target_dataset)) => (source_dataset, target_dataset),
@@ -29,9 +38,34 @@ impl<'a> DatasetComparison<'a> {
         if !source_dataset.get_sync_option()? {
             return Ok(transactions);
         }
-        for snapshot in SequenceComparison::from_datasets(source_dataset, target_dataset)?
-            .free_iter(source_dataset.get_snapshot_option_overlap()?)?
-        {
+        let sequence = SequenceComparison::from_datasets(source_dataset, target_dataset)?;
+        let snapshots = sequence.free_iter(source_dataset.get_snapshot_option_overlap()?)?;
+        if batch {
+            let positions: Vec<(&str, usize)> = snapshots
+                .map(|snapshot| {
+                    (
+                        snapshot,
+                        source_dataset
+                            .get_snapshot_position(snapshot)
+                            .expect("infallible: freeable snapshots are on source"),
+                    )
+                })
+                .collect();
+            let ranges = DestroySnapshotsBuilder::get_ranges(&positions);
+            for chunk in chunk_arguments(ranges, String::len) {
+                transactions.push(
+                    DestroySnapshotsBuilder::new(
+                        source,
+                        source_dataset.get_name_ref().to_string(),
+                        chunk,
+                    )
+                    .build()
+                    .map_err(EngineError::TransactionBuild)?,
+                );
+            }
+            return Ok(transactions);
+        }
+        for snapshot in snapshots {
             transactions.push(
                 DestroySnapshotBuilder::new(
                     source,
@@ -94,32 +128,20 @@ impl<'a> DatasetComparison<'a> {
                         .to_string(),
                     options,
                 )
+                .with_send(Self::get_send(source_dataset, options)?)
                 .build()
                 .map_err(EngineError::TransactionBuild)?,
             );
         }
-        for idx in 0..source_dataset.len() - 1 {
-            transactions.push(
-                TransferIncrementalBuilder::new(
-                    source,
-                    target,
-                    source_dataset.get_name_ref().to_string(),
-                    source_dataset
-                        .get_snapshot_ref_by_index(idx)
-                        .unwrap()
-                        .get_name_ref()
-                        .to_string(),
-                    source_dataset
-                        .get_snapshot_ref_by_index(idx + 1)
-                        .unwrap()
-                        .get_name_ref()
-                        .to_string(),
-                    options,
-                )
-                .build()
-                .map_err(EngineError::TransactionBuild)?,
-            );
-        }
+        transactions.append(&mut Self::get_incremental_transactions(
+            source,
+            target,
+            source_dataset,
+            source_dataset
+                .get_snapshot_names_iter()
+                .zip(source_dataset.get_snapshot_names_iter().skip(1)),
+            options,
+        )?);
         Ok(transactions)
     }
 
@@ -130,13 +152,109 @@ impl<'a> DatasetComparison<'a> {
         target_dataset: &Dataset,
         options: &TransferOptions,
     ) -> Result<TransactionList, EngineError> {
-        let mut transactions = TransactionList::new();
         if !source_dataset.get_sync_option()? {
-            return Ok(transactions);
+            return Ok(TransactionList::new());
+        }
+        if let Some(token) = target_dataset.get_receive_resume_token() {
+            return Self::get_sync_transactions_resume(
+                source,
+                target,
+                source_dataset,
+                target_dataset,
+                token,
+                options,
+            );
         }
-        for (from_snapshot, to_snapshot) in
-            SequenceComparison::from_datasets(source_dataset, target_dataset)?.sync_iter()?
-        {
+        Self::get_incremental_transactions(
+            source,
+            target,
+            source_dataset,
+            SequenceComparison::from_datasets(source_dataset, target_dataset)?.sync_iter()?,
+            options,
+        )
+    }
+
+    /// An interrupted transfer is resumed first. It delivers the snapshot
+    /// following the last common one, or the oldest snapshot if the initial
+    /// transfer was interrupted, so the remaining transfers start from there.
+    fn get_sync_transactions_resume(
+        source: &Location,
+        target: &Location,
+        source_dataset: &Dataset,
+        target_dataset: &Dataset,
+        token: &str,
+        options: &TransferOptions,
+    ) -> Result<TransactionList, EngineError> {
+        let initial = target_dataset.len() == 0;
+        let mut transactions = TransactionList::new();
+        transactions.push(
+            TransferResumeBuilder::new(
+                source,
+                target,
+                source_dataset.get_name_ref().to_string(),
+                token.to_string(),
+                options,
+            )
+            .with_initial(initial)
+            .build()
+            .map_err(EngineError::TransactionBuild)?,
+        );
+        let mut remaining = if initial {
+            Self::get_incremental_transactions(
+                source,
+                target,
+                source_dataset,
+                source_dataset
+                    .get_snapshot_names_iter()
+                    .zip(source_dataset.get_snapshot_names_iter().skip(1)),
+                options,
+            )?
+        } else {
+            Self::get_incremental_transactions(
+                source,
+                target,
+                source_dataset,
+                SequenceComparison::from_datasets(source_dataset, target_dataset)?
+                    .sync_iter()?
+                    .skip(1),
+                options,
+            )?
+        };
+        transactions.append(&mut remaining);
+        Ok(transactions)
+    }
+
+    /// Send flags given for the entire run take precedence over those of the
+    /// dataset. Resumed transfers ignore both, their token carries the flags.
+    fn get_send(
+        source_dataset: &Dataset,
+        options: &TransferOptions,
+    ) -> Result<SendValue, EngineError> {
+        options
+            .send
+            .map_or_else(|| source_dataset.get_send_option(), Ok)
+    }
+
+    /// One transaction per pair of adjacent snapshots, or a single
+    /// transaction spanning all pairs if ranges are requested.
+    fn get_incremental_transactions<'b>(
+        source: &Location,
+        target: &Location,
+        source_dataset: &Dataset,
+        pairs: impl Iterator<Item = (&'b str, &'b str)>,
+        options: &TransferOptions,
+    ) -> Result<TransactionList, EngineError> {
+        let pairs: Vec<(&str, &str)> = if options.range {
+            pairs
+                .reduce(|(from_snapshot, _), (_, to_snapshot)| (from_snapshot, to_snapshot))
+                .into_iter()
+                .collect()
+        } else {
+            pairs.collect()
+        };
+        let send = Self::get_send(source_dataset, options)?;
+        let mut transactions = TransactionList::new();
+        for (from_snapshot, to_snapshot) in pairs {
             transactions.push(
                 TransferIncrementalBuilder::new(
                     source,
@@ -146,6 +264,7 @@ impl<'a> DatasetComparison<'a> {
                     to_snapshot.to_string(),
                     options,
                 )
+                .with_send(send)
                 .build()
                 .map_err(EngineError::TransactionBuild)?,
             );
@@ -153,3 +272,177 @@ impl<'a> DatasetComparison<'a> {
         Ok(transactions)
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use std::str::FromStr;
+
+    use crate::config::{Location, TransferOptions};
+    use crate::property::SendValue;
+
+    use super::super::super::apool::Apool;
+    use super::DatasetComparison;
+
+    const SOURCE: &str = "\
+src\ttype\tfilesystem\t-
+src\tcreation\t1\t-
+src@s1\ttype\tsnapshot\t-
+src@s1\tcreation\t2\t-
+src@s2\ttype\tsnapshot\t-
+src@s2\tcreation\t3\t-
+src@s3\ttype\tsnapshot\t-
+src@s3\tcreation\t4\t-
+";
+
+    fn descriptions(target_raw: &str, options: &TransferOptions) -> Vec<String> {
+        let (source, target) = (
+            Location::from_str("src").unwrap(),
+            Location::from_str("tgt").unwrap(),
+        );
+        let source_apool = Apool::from_raw(source.clone(), SOURCE).unwrap();
+        let target_apool = Apool::from_raw(target.clone(), target_raw).unwrap();
+        DatasetComparison::new(
+            source_apool.get_dataset_ref("/"),
+            target_apool.get_dataset_ref("/"),
+        )
+        .get_sync_transactions(&source, &target, options)
+        .unwrap()
+        .iter()
+        .map(|transaction| transaction.get_meta_ref().to_description(false, false))
+        .collect()
+    }
+
+    #[test]
+    fn followup() {
+        let target = "\
+tgt\ttype\tfilesystem\t-
+tgt\tcreation\t1\t-
+tgt@s1\ttype\tsnapshot\t-
+tgt@s1\tcreation\t2\t-
+";
+        assert_eq!(
+            descriptions(target, &TransferOptions::new()),
+            vec![
+                "transfer followup: localhost:/@s1..s2->localhost",
+                "transfer followup: localhost:/@s2..s3->localhost",
+            ]
+        );
+        assert_eq!(
+            descriptions(target, &TransferOptions::new().with_range(true)),
+            vec!["transfer range: localhost:/@s1..s3->localhost"]
+        );
+    }
+
+    #[test]
+    fn send() {
+        let (source, target) = (
+            Location::from_str("src").unwrap(),
+            Location::from_str("tgt").unwrap(),
+        );
+        let source_apool = Apool::from_raw(
+            source.clone(),
+            &SOURCE.replacen(
+                "src\tcreation\t1\t-\n",
+                "src\tcreation\t1\t-\nsrc\tabgleich:send\tlarge-block,embedded\tlocal\n",
+                1,
+            ),
+        )
+        .unwrap();
+        let target_apool = Apool::from_raw(target.clone(), "").unwrap();
+        let commands = |options: &TransferOptions| -> Vec<String> {
+            DatasetComparison::new(
+                source_apool.get_dataset_ref("/"),
+                target_apool.get_dataset_ref("/"),
+            )
+            .get_sync_transactions(&source, &target, options)
+            .unwrap()
+            .iter()
+            .map(|transaction| transaction.to_json_row().command)
+            .collect()
+        };
+        let property = commands(&TransferOptions::new());
+        assert_eq!(property.len(), 3);
+        assert!(property[0].contains("; zfs send -c -L -e src/@s1 | "));
+        assert!(property[1].contains("; zfs send -c -L -e -i src/@s1 src/@s2 | "));
+        let options = TransferOptions::new().with_send(Some(SendValue::from_str("raw").unwrap()));
+        assert!(commands(&options)[2].contains("; zfs send -c -w -i src/@s2 src/@s3 | "));
+    }
+
+    #[test]
+    fn resume() {
+        let target = "\
+tgt\ttype\tfilesystem\t-
+tgt\tcreation\t1\t-
+tgt\treceive_resume_token\t1-abc-def-789c\t-
+tgt@s1\ttype\tsnapshot\t-
+tgt@s1\tcreation\t2\t-
+";
+        assert_eq!(
+            descriptions(target, &TransferOptions::new()),
+            vec![
+                "transfer resume: localhost:/->localhost",
+                "transfer followup: localhost:/@s2..s3->localhost",
+            ]
+        );
+    }
+
+    #[test]
+    fn resume_initial() {
+        let target = "\
+tgt\ttype\tfilesystem\t-
+tgt\tcreation\t1\t-
+tgt\treceive_resume_token\t1-abc-def-789c\t-
+";
+        assert_eq!(
+            descriptions(target, &TransferOptions::new()),
+            vec![
+                "transfer resume: localhost:/->localhost",
+                "transfer followup: localhost:/@s1..s2->localhost",
+                "transfer followup: localhost:/@s2..s3->localhost",
+            ]
+        );
+    }
+
+    #[test]
+    fn free() {
+        let target = "\
+tgt\ttype\tfilesystem\t-
+tgt\tcreation\t1\t-
+tgt@s1\ttype\tsnapshot\t-
+tgt@s1\tcreation\t2\t-
+tgt@s2\ttype\tsnapshot\t-
+tgt@s2\tcreation\t3\t-
+tgt@s3\ttype\tsnapshot\t-
+tgt@s3\tcreation\t4\t-
+tgt@s4\ttype\tsnapshot\t-
+tgt@s4\tcreation\t5\t-
+";
+        let source = Location::from_str("src").unwrap();
+        let source_apool = Apool::from_raw(
+            source.clone(),
+            &format!("{SOURCE}src@s4\ttype\tsnapshot\t-\nsrc@s4\tcreation\t5\t-\n"),
+        )
+        .unwrap();
+        let target_apool = Apool::from_raw(Location::from_str("tgt").unwrap(), target).unwrap();
+        let comparison = DatasetComparison::new(
+            source_apool.get_dataset_ref("/"),
+            target_apool.get_dataset_ref("/"),
+        );
+        let free = |batch| -> Vec<String> {
+            comparison
+                .get_free_transactions(&source, batch)
+                .unwrap()
+                .iter()
+                .map(|transaction| transaction.get_meta_ref().to_description(false, false))
+                .collect()
+        };
+        assert_eq!(
+            free(false),
+            vec![
+                "destroy snapshot: localhost:/@s1",
+                "destroy snapshot: localhost:/@s2",
+            ]
+        );
+        assert_eq!(free(true), vec!["destroy snapshots: localhost:/@s1%s2"]);
+    }
+}
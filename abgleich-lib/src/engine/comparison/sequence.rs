@@ -1,9 +1,8 @@
-use std::collections::HashSet;
-
 use crate::engine::Common;
 
 use super::super::dataset::Dataset;
 use super::super::errors::EngineError;
+use super::super::snapshot::Snapshot;
 
 use super::snapshot::SnapshotComparison;
 
@@ -23,125 +22,66 @@ impl<'a> SequenceBuilder<'a> {
         {
             return Err(self.err("creation time of snapshots does not monotonically increase"));
         }
-        let common = Self::sort_snapshot_names(self.get_common_snapshot_names(), self.source);
-        if common.is_empty() {
-            return Ok(self.uncommon_datasets());
-        }
-        self.assert_common_order(&common)?;
-        let mut sequence = Vec::new();
-        sequence.append(self.get_sequence_before(common[0]).as_mut());
-        for (start, stop) in common.iter().zip(common.iter().skip(1)) {
-            sequence.push(self.get_common_comparison(start)?);
-            sequence.append(self.get_sequence_between(start, stop).as_mut());
-        }
-        sequence.push(self.get_common_comparison(common.last().unwrap())?);
-        sequence.append(self.get_sequence_after(common.last().unwrap()).as_mut());
-        Ok(sequence)
-    }
-
-    fn uncommon_datasets(&self) -> Vec<SnapshotComparison> {
-        let mut sequence = Vec::new();
-        self.source
-            .get_snapshots_enumerated_iter()
-            .for_each(|(position, snapshot)| {
-                sequence.push(SnapshotComparison::from_source_snapshot(position, snapshot));
-            });
-        self.target
-            .get_snapshots_enumerated_iter()
-            .for_each(|(position, snapshot)| {
-                sequence.push(SnapshotComparison::from_target_snapshot(position, snapshot));
-            });
-        sequence.sort_by_key(super::snapshot::SnapshotComparison::get_creation);
-        sequence
-    }
-
-    fn assert_common_order(&self, common: &[&str]) -> Result<(), EngineError> {
-        let source_names: Vec<&str> = common.to_owned(); // common sorted by source
-        let target_names: Vec<&str> = common.to_owned();
-        let target_names = Self::sort_snapshot_names(target_names, self.target);
-        for (source_name, target_name) in source_names.iter().zip(target_names.iter()) {
-            if **source_name != **target_name {
-                return Err(self.err("order of snapshots does not match"));
+        // Single merge-join over both snapshot lists: common snapshots must
+        // meet at the head of both lists, uncommon ones are interleaved by
+        // creation time with source snapshots taking precedence on ties.
+        let mut sequence = Vec::with_capacity(self.source.len().max(self.target.len()));
+        let (mut source_idx, mut target_idx) = (0, 0);
+        loop {
+            match (
+                Self::get_head(self.source, self.target, source_idx),
+                Self::get_head(self.target, self.source, target_idx),
+            ) {
+                (None, None) => break,
+                (Some((source, true)), Some((target, true))) => {
+                    if source.get_name_ref() != target.get_name_ref() {
+                        return Err(self.err("order of snapshots does not match"));
+                    }
+                    if source.get_creation() != target.get_creation() {
+                        return Err(self.err("creation times of identical snapshot do not match"));
+                    }
+                    sequence.push(
+                        SnapshotComparison::from_source_snapshot(source_idx, source)
+                            .with_target(target_idx),
+                    );
+                    source_idx += 1;
+                    target_idx += 1;
+                }
+                (Some((_, true)), None) | (None, Some((_, true))) => {
+                    return Err(self.err("order of snapshots does not match"));
+                }
+                (Some((source, false)), Some((target, false)))
+                    if target.get_creation() < source.get_creation() =>
+                {
+                    sequence.push(SnapshotComparison::from_target_snapshot(target_idx, target));
+                    target_idx += 1;
+                }
+                (Some((source, false)), _) => {
+                    sequence.push(SnapshotComparison::from_source_snapshot(source_idx, source));
+                    source_idx += 1;
+                }
+                (_, Some((target, false))) => {
+                    sequence.push(SnapshotComparison::from_target_snapshot(target_idx, target));
+                    target_idx += 1;
+                }
             }
         }
-        Ok(())
-    }
-
-    fn get_common_comparison(&self, name: &str) -> Result<SnapshotComparison, EngineError> {
-        let source_snapshot = self.source.get_snapshot_ref_by_name(name).unwrap();
-        let target_snapshot = self.target.get_snapshot_ref_by_name(name).unwrap();
-        if source_snapshot.get_creation() != target_snapshot.get_creation() {
-            return Err(self.err("creation times of identical snapshot do not match"));
-        }
-        Ok(
-            SnapshotComparison::new(name.to_string(), source_snapshot.get_creation())
-                .with_source(self.source.get_snapshot_position(name).unwrap())
-                .with_target(self.target.get_snapshot_position(name).unwrap()),
-        )
-    }
-
-    fn get_common_snapshot_names(&self) -> Vec<&str> {
-        let source_names: HashSet<&str> = self.source.get_snapshot_names_iter().collect();
-        let target_names: HashSet<&str> = self.target.get_snapshot_names_iter().collect();
-        source_names.intersection(&target_names).copied().collect()
-    }
-
-    fn get_sequence_after(&self, name: &str) -> Vec<SnapshotComparison> {
-        let mut sequence = Vec::new();
-        self.source
-            .get_snapshots_enumerated_after_name_iter(name)
-            .for_each(|(position, snapshot)| {
-                sequence.push(SnapshotComparison::from_source_snapshot(position, snapshot));
-            });
-        self.target
-            .get_snapshots_enumerated_after_name_iter(name)
-            .for_each(|(position, snapshot)| {
-                sequence.push(SnapshotComparison::from_target_snapshot(position, snapshot));
-            });
-        sequence.sort_by_key(super::snapshot::SnapshotComparison::get_creation);
-        sequence
-    }
-
-    fn get_sequence_before(&self, name: &str) -> Vec<SnapshotComparison> {
-        let mut sequence = Vec::new();
-        self.source
-            .get_snapshots_enumerated_before_name_iter(name)
-            .for_each(|(position, snapshot)| {
-                sequence.push(SnapshotComparison::from_source_snapshot(position, snapshot));
-            });
-        self.target
-            .get_snapshots_enumerated_before_name_iter(name)
-            .for_each(|(position, snapshot)| {
-                sequence.push(SnapshotComparison::from_target_snapshot(position, snapshot));
-            });
-        sequence.sort_by_key(super::snapshot::SnapshotComparison::get_creation);
-        sequence
-    }
-
-    fn get_sequence_between(&self, start: &str, stop: &str) -> Vec<SnapshotComparison> {
-        let mut sequence = Vec::new();
-        self.source
-            .get_snapshots_enumerated_between_names_iter(start, stop)
-            .for_each(|(position, snapshot)| {
-                sequence.push(SnapshotComparison::from_source_snapshot(position, snapshot));
-            });
-        self.target
-            .get_snapshots_enumerated_between_names_iter(start, stop)
-            .for_each(|(position, snapshot)| {
-                sequence.push(SnapshotComparison::from_target_snapshot(position, snapshot));
-            });
-        sequence.sort_by_key(super::snapshot::SnapshotComparison::get_creation);
-        sequence
+        Ok(sequence)
     }
 
-    fn sort_snapshot_names<'b>(names: Vec<&'b str>, dataset: &Dataset) -> Vec<&'b str> {
-        let positions: Vec<usize> = dataset
-            .get_snapshot_positions_iter(&names)
-            .map(|position| position.unwrap())
-            .collect();
-        let mut merged: Vec<(&str, usize)> = names.into_iter().zip(positions).collect();
-        merged.sort_by_key(|&(_, position)| position);
-        merged.iter().map(|(name, _)| *name).collect()
+    fn get_head<'b>(
+        dataset: &'b Dataset,
+        other: &Dataset,
+        idx: usize,
+    ) -> Option<(&'b Snapshot, bool)> {
+        dataset.get_snapshot_ref_by_index(idx).map(|snapshot| {
+            (
+                snapshot,
+                other
+                    .get_snapshot_position(snapshot.get_name_ref())
+                    .is_some(),
+            )
+        })
     }
 }
 
@@ -271,3 +211,113 @@ impl SequenceCommon for SequenceComparison<'_> {
         self.target
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use std::fmt::Write;
+    use std::str::FromStr;
+
+    use crate::config::Location;
+
+    use super::super::super::apool::Apool;
+    use super::super::super::errors::EngineError;
+    use super::SequenceComparison;
+
+    fn apool(snapshots: &[(&str, i64)]) -> Apool {
+        let mut raw = String::from("tank\ttype\tfilesystem\t-\ntank\tcreation\t0\t-\n");
+        for (name, creation) in snapshots {
+            write!(
+                raw,
+                "tank@{name}\ttype\tsnapshot\t-\ntank@{name}\tcreation\t{creation}\t-\n"
+            )
+            .unwrap();
+        }
+        Apool::from_raw(Location::from_str("tank").unwrap(), &raw).unwrap()
+    }
+
+    fn compare(
+        source: &[(&str, i64)],
+        target: &[(&str, i64)],
+    ) -> Result<Vec<(String, bool, bool)>, EngineError> {
+        let (source, target) = (apool(source), apool(target));
+        let comparison = SequenceComparison::from_datasets(
+            source.get_dataset_ref("/").unwrap(),
+            target.get_dataset_ref("/").unwrap(),
+        )?;
+        Ok(comparison
+            .sequence
+            .iter()
+            .map(|entry| {
+                (
+                    entry.get_name_ref().to_string(),
+                    entry.is_on_source(),
+                    entry.is_on_target(),
+                )
+            })
+            .collect())
+    }
+
+    fn entry(name: &str, source: bool, target: bool) -> (String, bool, bool) {
+        (name.to_string(), source, target)
+    }
+
+    #[test]
+    fn merge() {
+        let sequence = compare(
+            &[("a", 1), ("b", 2), ("c", 4), ("e", 6), ("f", 7)],
+            &[("x", 1), ("b", 2), ("y", 3), ("e", 6)],
+        )
+        .unwrap();
+        assert_eq!(
+            sequence,
+            vec![
+                entry("a", true, false),
+                entry("x", false, true),
+                entry("b", true, true),
+                entry("y", false, true),
+                entry("c", true, false),
+                entry("e", true, true),
+                entry("f", true, false),
+            ]
+        );
+    }
+
+    #[test]
+    fn uncommon() {
+        let sequence = compare(&[("a", 1), ("b", 3)], &[("x", 2)]).unwrap();
+        assert_eq!(
+            sequence,
+            vec![
+                entry("a", true, false),
+                entry("x", false, true),
+                entry("b", true, false),
+            ]
+        );
+    }
+
+    #[test]
+    fn order_mismatch() {
+        let sequence = compare(&[("a", 1), ("b", 2)], &[("b", 1), ("a", 2)]);
+        assert!(matches!(sequence, Err(EngineError::Sequence { .. })));
+    }
+
+    #[test]
+    fn creation_mismatch() {
+        let sequence = compare(&[("a", 1)], &[("a", 2)]);
+        assert!(matches!(sequence, Err(EngineError::Sequence { .. })));
+    }
+
+    #[test]
+    fn sync() {
+        let (source, target) = (apool(&[("a", 1), ("b", 2), ("c", 3)]), apool(&[("a", 1)]));
+        let comparison = SequenceComparison::from_datasets(
+            source.get_dataset_ref("/").unwrap(),
+            target.get_dataset_ref("/").unwrap(),
+        )
+        .unwrap();
+        assert_eq!(
+            comparison.sync_iter().unwrap().collect::<Vec<_>>(),
+            vec![("a", "b"), ("b", "c")]
+        );
+    }
+}
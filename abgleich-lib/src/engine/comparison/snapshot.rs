@@ -5,31 +5,23 @@ pub struct SnapshotComparison {
     name: String,
     source: Option<usize>,
     target: Option<usize>,
-    creation: i64,
 }
 
 impl SnapshotComparison {
-    pub const fn new(name: String, creation: i64) -> Self {
+    pub const fn new(name: String) -> Self {
         Self {
             name,
             source: None,
             target: None,
-            creation,
         }
     }
 
     pub fn from_source_snapshot(position: usize, snapshot: &Snapshot) -> Self {
-        Self::new(snapshot.get_name_ref().to_string(), snapshot.get_creation())
-            .with_source(position)
+        Self::new(snapshot.get_name_ref().to_string()).with_source(position)
     }
 
     pub fn from_target_snapshot(position: usize, snapshot: &Snapshot) -> Self {
-        Self::new(snapshot.get_name_ref().to_string(), snapshot.get_creation())
-            .with_target(position)
-    }
-
-    pub const fn get_creation(&self) -> i64 {
-        self.creation
+        Self::new(snapshot.get_name_ref().to_string()).with_target(position)
     }
 
     pub fn get_name_ref(&self) -> &str {
@@ -7,10 +7,11 @@ use tracing::debug;
 
 use crate::config::Location;
 use crate::consts::{
-    DEFAULT_DIFF, DEFAULT_FORMAT, DEFAULT_OVERLAP, DEFAULT_SNAP, DEFAULT_SYNC, DEFAULT_THRESHOLD,
-    VAR_DIFF, VAR_FORMAT, VAR_OVERLAP, VAR_SNAP, VAR_SYNC, VAR_THRESHOLD,
+    DEFAULT_DIFF, DEFAULT_FORMAT, DEFAULT_OVERLAP, DEFAULT_SEND, DEFAULT_SNAP, DEFAULT_SYNC,
+    DEFAULT_THRESHOLD, VAR_DIFF, VAR_FORMAT, VAR_OVERLAP, VAR_SEND, VAR_SNAP, VAR_SYNC,
+    VAR_THRESHOLD,
 };
-use crate::property::{BaseProperty, Description, SnapValue, TypeValue};
+use crate::property::{BaseProperty, Description, SendValue, SnapValue, TypeValue};
 use crate::sys::{envvar2bool, envvar2string, envvar2type};
 use crate::transaction::{BaseBuilder, CreateSnapshotBuilder, DiffBuilder, Transaction};
 
@@ -93,7 +94,7 @@ impl Dataset {
         )
         .build()
         .map_err(EngineError::TransactionBuild)?
-        .run()
+        .run_first_line()
         .map_err(EngineError::TransactionRun)?;
         outcome
             .assert_success()
@@ -121,21 +122,25 @@ impl Dataset {
             location,
             self.description.name.clone(),
             snapshot,
-            *self
-                .description
-                .written
-                .as_ref()
-                .ok_or(EngineError::UnknownWritten {
-                    name: self.get_name_ref().to_string(),
-                    root: location.get_root_ref().to_string(),
-                })?
-                .get_value_ref()
-                .unpack(),
+            self.get_written(location)?,
         )
         .build()
         .map_err(EngineError::TransactionBuild)
     }
 
+    pub fn get_written(&self, location: &Location) -> Result<u64, EngineError> {
+        Ok(*self
+            .description
+            .written
+            .as_ref()
+            .ok_or(EngineError::UnknownWritten {
+                name: self.get_name_ref().to_string(),
+                root: location.get_root_ref().to_string(),
+            })?
+            .get_value_ref()
+            .unpack())
+    }
+
     pub fn get_last_snapshot_ref(&self) -> Option<&Snapshot> {
         self.snapshots.values().last()
     }
@@ -212,21 +217,16 @@ impl Dataset {
             }))
     }
 
-    pub fn get_snapshot_position(&self, name: &str) -> Option<usize> {
-        self.snapshots
-            .iter()
-            .position(|(_, snapshot)| snapshot.get_name_ref() == name)
+    /// Token left behind by an interrupted `zfs receive -s`, if any.
+    pub fn get_receive_resume_token(&self) -> Option<&str> {
+        self.description
+            .receive_resume_token
+            .as_ref()
+            .map(|token| token.get_value_ref().unpack())
     }
 
-    pub fn get_snapshot_positions_iter(
-        &self,
-        names: &Vec<&str>,
-    ) -> impl Iterator<Item = Option<usize>> {
-        names.iter().map(|name| {
-            self.snapshots
-                .iter()
-                .position(|(_, snapshot)| snapshot.get_name_ref() == *name)
-        })
+    pub fn get_snapshot_position(&self, name: &str) -> Option<usize> {
+        self.snapshots.get_index_of(name)
     }
 
     pub fn get_snapshot_ref_by_index(&self, idx: usize) -> Option<&Snapshot> {
@@ -240,52 +240,27 @@ impl Dataset {
         self.snapshots.get(name)
     }
 
-    pub fn get_snapshots_enumerated_after_name_iter(
-        &self,
-        name: &str,
-    ) -> impl Iterator<Item = (usize, &Snapshot)> {
-        let start = self.get_snapshot_position(name).unwrap_or(self.len()) + 1; // HACK use len for empty iterator if no match is found
-        self.snapshots[start..]
-            .iter()
-            .enumerate()
-            .map(move |(idx, (_, snapshot))| (idx + start, snapshot))
-    }
-
-    pub fn get_snapshots_enumerated_before_name_iter(
-        &self,
-        name: &str,
-    ) -> impl Iterator<Item = (usize, &Snapshot)> {
-        let (start, stop) = self.get_snapshot_position(name).map_or_else(
-            || (self.len(), self.len()), // HACK use len for empty iterator if no match is found
-            |position| (0usize, position),
-        );
-        self.snapshots[start..stop]
-            .iter()
-            .enumerate()
-            .map(move |(idx, (_, snapshot))| (idx + start, snapshot))
-    }
-
-    pub fn get_snapshots_enumerated_between_names_iter(
-        &self,
-        start: &str,
-        stop: &str,
-    ) -> impl Iterator<Item = (usize, &Snapshot)> {
-        let start = self.get_snapshot_position(start).unwrap_or(self.len()) + 1; // HACK use len for empty iterator if no match is found
-        let stop = self.get_snapshot_position(stop).unwrap_or(0); // HACK use zero for empty iterator if no match is found
-        self.snapshots[start..stop]
-            .iter()
-            .enumerate()
-            .map(move |(idx, (_, snapshot))| (idx + start, snapshot))
-    }
-
-    pub fn get_snapshots_enumerated_iter(&self) -> impl Iterator<Item = (usize, &Snapshot)> {
-        self.snapshots.values().enumerate()
-    }
-
     pub fn get_snapshots_iter(&self) -> Values<'_, String, Snapshot> {
         self.snapshots.values()
     }
 
+    /// Additional `zfs send` flags for transfers of this dataset.
+    pub fn get_send_option(&self) -> Result<SendValue, EngineError> {
+        Ok(match envvar2string(VAR_SEND) {
+            Some(env_value) => SendValue::from_str(&env_value).map_err(|e| EngineError::Value {
+                name: "env(abgleich:send)".to_string(),
+                source: e,
+            })?,
+            None => match &self.description.abgleich_send {
+                Some(value) => *value.get_value_ref(),
+                _ => SendValue::from_str(DEFAULT_SEND).map_err(|e| EngineError::Value {
+                    name: "default(abgleich:send)".to_string(),
+                    source: e,
+                })?,
+            },
+        })
+    }
+
     pub fn get_sync_option(&self) -> Result<bool, EngineError> {
         Ok(envvar2bool(VAR_SYNC)
             .map_err(|e| EngineError::EnvironmentVariable {
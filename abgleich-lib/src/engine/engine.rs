@@ -1,43 +1,94 @@
+use std::panic;
+#[cfg(feature = "cli")]
+use std::slice;
+use std::thread;
+#[cfg(feature = "cli")]
+use std::time::Instant;
+
 use colored::Colorize;
+use indexmap::IndexMap;
 use serde_json::json;
+#[cfg(feature = "cli")]
+use tracing::{error, info};
 
-use crate::config::{Config, Location, Root, Route, TransferOptions};
+use crate::config::{
+    Concurrency, Config, ConfigError, DatasetFilter, Job, Location, Root, Route, TransferOptions,
+};
 #[cfg(feature = "cli")]
-use crate::config::{Confirmation, OutputFmt};
+use crate::config::{Confirmation, Cycle, OutputFmt, WatchSchedule};
+use crate::consts::{DEFAULT_INVENTORY_CACHE, VAR_INVENTORY_CACHE};
 use crate::output::{Alignment, Table, TableColumn};
+use crate::property::Projection;
+use crate::sys::envvar2bool_or;
+#[cfg(feature = "cli")]
+use crate::traits::Traverse;
 #[cfg(feature = "cli")]
 use crate::transaction::Force;
-use crate::transaction::{BaseBuilder, TransactionList, WhichBuilder, ZpoolListBuilder};
+use crate::transaction::{BaseBuilder, TransactionList, ZpoolListBuilder};
 
 use super::apool::Apool;
 use super::comparison::ApoolComparison;
 use super::errors::EngineError;
+use super::inventorycache::InventoryCache;
+use super::probes::Probes;
+#[cfg(feature = "cli")]
+use super::timetable::Timetable;
 
 pub struct Engine {
     config: Config,
+    concurrency: Concurrency,
+    probes: Probes,
+    inventories: Option<InventoryCache>,
+    estimate: bool,
+    filter: DatasetFilter,
 }
 
 impl Engine {
-    fn assert_command(route: &Route, command: String) -> Result<(), EngineError> {
-        if !WhichBuilder::new(route, command.clone())
-            .build()
-            .map_err(EngineError::TransactionBuild)?
-            .run()
-            .map_err(EngineError::TransactionRun)?
-            .is_successful()
-        {
-            return Err(EngineError::CommandNotFound {
-                host: route.get_host_ref().to_string(),
-                user: route.get_user_ref().unwrap_or("[default]").to_string(),
-                command,
-            });
-        }
-        Ok(())
-    }
-
     pub fn from_detect() -> Result<Self, EngineError> {
         let config = Config::from_detect().map_err(EngineError::Config)?;
-        Ok(Self { config })
+        Ok(Self {
+            config,
+            concurrency: Concurrency::new(),
+            probes: Probes::from_detect()?,
+            inventories: envvar2bool_or(VAR_INVENTORY_CACHE, DEFAULT_INVENTORY_CACHE)
+                .map_err(|e| EngineError::EnvironmentVariable {
+                    name: VAR_INVENTORY_CACHE.to_string(),
+                    source: e,
+                })?
+                .then(|| InventoryCache::new(true)),
+            estimate: false,
+            filter: DatasetFilter::new(),
+        })
+    }
+
+    #[must_use]
+    pub const fn with_concurrency(mut self, concurrency: Concurrency) -> Self {
+        self.concurrency = concurrency;
+        self
+    }
+
+    /// Keep inventories in memory for refreshing them incrementally, in
+    /// addition to the cache directory if enabled.
+    #[must_use]
+    pub fn with_warm_inventories(mut self) -> Self {
+        self.inventories
+            .get_or_insert_with(|| InventoryCache::new(false));
+        self
+    }
+
+    /// Estimate the size of transfers before showing the plan.
+    #[must_use]
+    pub const fn with_estimate(mut self, estimate: bool) -> Self {
+        self.estimate = estimate;
+        self
+    }
+
+    /// Restrict all inventories, and therefore all transactions, to the
+    /// datasets included by `filter`.
+    #[must_use]
+    pub fn with_filter(mut self, filter: DatasetFilter) -> Self {
+        self.filter = filter;
+        self
     }
 
     #[cfg(feature = "cli")]
@@ -48,6 +99,7 @@ impl Engine {
         force: bool,
         source: &str,
         target: &str,
+        batch: bool,
     ) -> Result<(), EngineError> {
         let force = Force::from_bool(force).map_err(EngineError::TransactionBuild)?;
         let source_loc = self
@@ -58,11 +110,13 @@ impl Engine {
             .config
             .parse_location(target)
             .map_err(EngineError::Config)?;
-        Self::assert_command(source_loc.get_route_ref(), "zfs".to_string())?;
-        Self::assert_command(target_loc.get_route_ref(), "zfs".to_string())?;
-        let transactions = self.get_free_transactions(source, target)?;
+        self.probes.assert(&[
+            (source_loc.get_route_ref(), "zfs"),
+            (target_loc.get_route_ref(), "zfs"),
+        ])?;
+        let transactions = self.get_free_transactions(source, target, batch)?;
         transactions
-            .run_cli(outputfmt, confirmation, &force)
+            .run_cli(outputfmt, confirmation, &force, &self.concurrency)
             .map_err(EngineError::TransactionCli)
     }
 
@@ -70,6 +124,7 @@ impl Engine {
         &self,
         source: &str,
         target: &str,
+        batch: bool,
     ) -> Result<TransactionList, EngineError> {
         let source = self
             .config
@@ -79,37 +134,113 @@ impl Engine {
             .config
             .parse_location(target)
             .map_err(EngineError::Config)?;
-        let source_apool = Apool::from_location(source)?;
-        let target_apool = Apool::from_location(target)?;
-        ApoolComparison::new(&source_apool, &target_apool).get_free_transactions()
+        let (source_apool, target_apool) = self.get_apools(source, target, Projection::Free)?;
+        ApoolComparison::new(&source_apool, &target_apool).get_free_transactions(batch)
+    }
+
+    /// Inventory of `location`, incrementally refreshed from the cache if
+    /// `ABGLEICH_INVENTORY_CACHE` is set or inventories are kept warm.
+    /// Filtered inventories bypass the cache.
+    fn get_apool(&self, location: Location, projection: Projection) -> Result<Apool, EngineError> {
+        if self.filter.is_active() {
+            return Apool::from_filtered_location(&location, projection, &self.filter);
+        }
+        match &self.inventories {
+            Some(inventories) if projection != Projection::All => {
+                inventories.get_apool(location, projection)
+            }
+            _ => Apool::from_location(location, projection),
+        }
     }
 
-    pub fn get_snap_transactions(&self, location: &str) -> Result<TransactionList, EngineError> {
+    /// Runs source and target inventory concurrently. If both fail, the error
+    /// of the source is reported. The target is always inventoried with the
+    /// minimal projection identifying snapshots.
+    fn get_apools(
+        &self,
+        source: Location,
+        target: Location,
+        projection: Projection,
+    ) -> Result<(Apool, Apool), EngineError> {
+        let (source_apool, mut target_apools) =
+            self.get_fan_out_apools(source, vec![target], projection)?;
+        Ok((source_apool, target_apools.remove(0)))
+    }
+
+    /// Like `get_apools`, but for any number of targets, all inventoried
+    /// concurrently. Errors are reported in order of source and targets.
+    fn get_fan_out_apools(
+        &self,
+        source: Location,
+        targets: Vec<Location>,
+        projection: Projection,
+    ) -> Result<(Apool, Vec<Apool>), EngineError> {
+        let (source_apool, target_apools) = thread::scope(|scope| {
+            let target_apools: Vec<_> = targets
+                .into_iter()
+                .map(|target| scope.spawn(|| self.get_apool(target, Projection::Target)))
+                .collect();
+            (
+                self.get_apool(source, projection),
+                target_apools
+                    .into_iter()
+                    .map(|target_apool| {
+                        target_apool
+                            .join()
+                            .unwrap_or_else(|err| panic::resume_unwind(err))
+                    })
+                    .collect::<Vec<_>>(),
+            )
+        });
+        Ok((
+            source_apool?,
+            target_apools
+                .into_iter()
+                .collect::<Result<Vec<Apool>, EngineError>>()?,
+        ))
+    }
+
+    pub fn get_snap_transactions(
+        &self,
+        location: &str,
+        batch: bool,
+    ) -> Result<TransactionList, EngineError> {
         let location = self
             .config
             .parse_location(location)
             .map_err(EngineError::Config)?;
-        let apool = Apool::from_location(location)?;
-        apool.get_create_snapshot_transactions()
+        let apool = self.get_apool(location, Projection::Snap)?;
+        apool.get_create_snapshot_transactions(self.concurrency.jobs, batch)
     }
 
+    /// Plans the transfers from `source` to each of `targets`. Plans of
+    /// several targets are merged, relayed transfers of identical streams
+    /// then share a single `zfs send`.
     pub fn get_sync_transactions(
         &self,
         source: &str,
-        target: &str,
+        targets: &[String],
         options: &TransferOptions,
     ) -> Result<TransactionList, EngineError> {
         let source = self
             .config
             .parse_location(source)
             .map_err(EngineError::Config)?;
-        let target = self
-            .config
-            .parse_location(target)
+        let targets = targets
+            .iter()
+            .map(|target| self.config.parse_location(target))
+            .collect::<Result<Vec<Location>, ConfigError>>()
             .map_err(EngineError::Config)?;
-        let source_apool = Apool::from_location(source)?;
-        let target_apool = Apool::from_location(target)?;
-        ApoolComparison::new(&source_apool, &target_apool).get_sync_transactions(options)
+        let options = options.clone().with_fan_out(targets.len());
+        let (source_apool, target_apools) =
+            self.get_fan_out_apools(source, targets, Projection::Sync)?;
+        let lists = target_apools
+            .iter()
+            .map(|target_apool| {
+                ApoolComparison::new(&source_apool, target_apool).get_sync_transactions(&options)
+            })
+            .collect::<Result<Vec<TransactionList>, EngineError>>()?;
+        Ok(TransactionList::from_fan_out(lists))
     }
 
     fn get_zpools(route: &Route) -> Result<Vec<Location>, EngineError> {
@@ -154,8 +285,8 @@ impl Engine {
                     .config
                     .parse_location(location)
                     .map_err(EngineError::Config)?;
-                Self::assert_command(location.get_route_ref(), "zfs".to_string())?;
-                let apool = Apool::from_location(location)?;
+                self.probes.assert(&[(location.get_route_ref(), "zfs")])?;
+                let apool = self.get_apool(location, Projection::Ls)?;
                 if json {
                     apool.print_json()
                 } else {
@@ -186,7 +317,7 @@ impl Engine {
                 );
             }
         }
-        Self::assert_command(route, "zpool".to_string())?;
+        self.probes.assert(&[(route, "zpool")])?;
         for location in Self::get_zpools(route)? {
             if !self.config.contains(&location) {
                 println!(
@@ -225,7 +356,7 @@ impl Engine {
                 ]);
             }
         }
-        Self::assert_command(route, "zpool".to_string())?;
+        self.probes.assert(&[(route, "zpool")])?;
         for location in Self::get_zpools(route)? {
             if !self.config.contains(&location) {
                 table.push_row(vec![
@@ -251,16 +382,17 @@ impl Engine {
         confirmation: &Confirmation,
         force: bool,
         location: &str,
+        batch: bool,
     ) -> Result<(), EngineError> {
         let force = Force::from_bool(force).map_err(EngineError::TransactionBuild)?;
         let loc = self
             .config
             .parse_location(location)
             .map_err(EngineError::Config)?;
-        Self::assert_command(loc.get_route_ref(), "zfs".to_string())?;
-        let transactions = self.get_snap_transactions(location)?;
+        self.probes.assert(&[(loc.get_route_ref(), "zfs")])?;
+        let transactions = self.get_snap_transactions(location, batch)?;
         transactions
-            .run_cli(outputfmt, confirmation, &force)
+            .run_cli(outputfmt, confirmation, &force, &self.concurrency)
             .map_err(EngineError::TransactionCli)
     }
 
@@ -272,33 +404,285 @@ impl Engine {
         options: &TransferOptions,
         force: bool,
         source: &str,
-        target: &str,
+        targets: &[String],
     ) -> Result<(), EngineError> {
         let force = Force::from_bool(force).map_err(EngineError::TransactionBuild)?;
         let source_loc = self
             .config
             .parse_location(source)
             .map_err(EngineError::Config)?;
-        let target_loc = self
-            .config
-            .parse_location(target)
+        let target_locs = targets
+            .iter()
+            .map(|target| self.config.parse_location(target))
+            .collect::<Result<Vec<Location>, ConfigError>>()
             .map_err(EngineError::Config)?;
-        Self::assert_command(source_loc.get_route_ref(), "zfs".to_string())?;
-        Self::assert_command(target_loc.get_route_ref(), "zfs".to_string())?;
-        if options.rate_limit.is_some() {
-            Self::assert_command(source_loc.get_route_ref(), "pv".to_string())?;
+        let probes = Self::get_sync_probes(options, &source_loc, &target_locs);
+        self.probes.assert(&probes)?;
+        let mut transactions = self.get_sync_transactions(source, targets, options)?;
+        if self.estimate {
+            transactions
+                .estimate()
+                .map_err(EngineError::TransactionRun)?;
         }
-        if options.compress.is_some() {
-            Self::assert_command(source_loc.get_route_ref(), "xz".to_string())?;
-            Self::assert_command(target_loc.get_route_ref(), "xz".to_string())?;
+        transactions
+            .run_cli(outputfmt, confirmation, &force, &self.concurrency)
+            .map_err(EngineError::TransactionCli)
+    }
+
+    /// Executables required for transfers from `source` to `targets`.
+    #[cfg(feature = "cli")]
+    fn get_sync_probes<'a>(
+        options: &TransferOptions,
+        source: &'a Location,
+        targets: &'a [Location],
+    ) -> Vec<(&'a Route, &'static str)> {
+        let relay = options.clone().with_fan_out(targets.len()).relay;
+        let mut probes = vec![(source.get_route_ref(), "zfs")];
+        if options.rate_limit.is_some() && !relay {
+            probes.push((source.get_route_ref(), "pv"));
+        }
+        if let Some(codec) = options.codec.get_command() {
+            probes.push((source.get_route_ref(), codec));
         }
         if options.insecure.is_some() {
-            Self::assert_command(source_loc.get_route_ref(), "nc".to_string())?;
-            Self::assert_command(target_loc.get_route_ref(), "nc".to_string())?;
+            probes.push((source.get_route_ref(), "nc"));
+        }
+        for target in targets {
+            probes.push((target.get_route_ref(), "zfs"));
+            if let Some(codec) = options.codec.get_command() {
+                probes.push((target.get_route_ref(), codec));
+            }
+            if options.insecure.is_some() {
+                probes.push((target.get_route_ref(), "nc"));
+            }
+        }
+        probes
+    }
+
+    /// Configured jobs by `names`, all of them if none are given. Repeated
+    /// names select their job once. Jobs may share a source or a target, but
+    /// no two transfers may run between the same pair of locations.
+    fn get_jobs(&self, names: &[String]) -> Result<Vec<&Job>, EngineError> {
+        let mut jobs: Vec<(&str, &Job)> = Vec::new();
+        if names.is_empty() {
+            jobs.extend(
+                self.config
+                    .get_jobs_iter()
+                    .map(|(name, job)| (name.as_str(), job)),
+            );
+        } else {
+            for name in names {
+                if jobs.iter().any(|(other, _)| *other == name) {
+                    continue;
+                }
+                let job = self
+                    .config
+                    .get_job_ref(name)
+                    .ok_or_else(|| EngineError::JobUnknown { name: name.clone() })?;
+                jobs.push((name, job));
+            }
+        }
+        let mut pairs: IndexMap<(String, String), &str> = IndexMap::new();
+        for (name, job) in &jobs {
+            let source = job.get_source_ref().to_string();
+            for target in job.get_targets_ref() {
+                if let Some(other) = pairs.insert((source.clone(), target.to_string()), name) {
+                    return Err(EngineError::JobPairDuplicate {
+                        src: source,
+                        tgt: target.to_string(),
+                        first: other.to_string(),
+                        second: (*name).to_string(),
+                    });
+                }
+            }
+        }
+        Ok(jobs.into_iter().map(|(_, job)| job).collect())
+    }
+
+    /// Plans the transfers of the jobs by `names`, or of all jobs, as a
+    /// single list. Every location is inventoried only once, even if it takes
+    /// part in several jobs, and all inventories run concurrently.
+    pub fn get_run_transactions(
+        &self,
+        names: &[String],
+        options: &TransferOptions,
+    ) -> Result<TransactionList, EngineError> {
+        let jobs = self.get_jobs(names)?;
+        let mut sources: IndexMap<String, &Location> = IndexMap::new();
+        let mut targets: IndexMap<String, &Location> = IndexMap::new();
+        for job in &jobs {
+            let source = job.get_source_ref();
+            sources.entry(source.to_string()).or_insert(source);
+            for target in job.get_targets_ref() {
+                targets.entry(target.to_string()).or_insert(target);
+            }
+        }
+        let inventories: Vec<(Location, Projection)> = sources
+            .values()
+            .map(|source| ((*source).clone(), Projection::Sync))
+            .chain(
+                targets
+                    .values()
+                    .map(|target| ((*target).clone(), Projection::Target)),
+            )
+            .collect();
+        let apools = thread::scope(|scope| {
+            #[expect(
+                clippy::needless_collect,
+                reason = "spawn all inventories before joining"
+            )]
+            let apools: Vec<_> = inventories
+                .into_iter()
+                .map(|(location, projection)| {
+                    scope.spawn(move || self.get_apool(location, projection))
+                })
+                .collect();
+            apools
+                .into_iter()
+                .map(|apool| apool.join().unwrap_or_else(|err| panic::resume_unwind(err)))
+                .collect::<Result<Vec<Apool>, EngineError>>()
+        })?;
+        let mut apools = apools.into_iter();
+        let source_apools: IndexMap<&String, Apool> = sources.keys().zip(&mut apools).collect();
+        let target_apools: IndexMap<&String, Apool> = targets.keys().zip(apools).collect();
+        let mut transactions = TransactionList::new();
+        for job in jobs {
+            let source_apool = &source_apools[&job.get_source_ref().to_string()];
+            let options = options.clone().with_fan_out(job.get_targets_ref().len());
+            let lists = job
+                .get_targets_ref()
+                .iter()
+                .map(|target| {
+                    let target_apool = &target_apools[&target.to_string()];
+                    ApoolComparison::new(source_apool, target_apool).get_sync_transactions(&options)
+                })
+                .collect::<Result<Vec<TransactionList>, EngineError>>()?;
+            transactions.append(&mut TransactionList::from_fan_out(lists));
+        }
+        Ok(transactions)
+    }
+
+    /// Runs the jobs by `names`, or all jobs, with one plan, one confirmation
+    /// and one summary, limited by the concurrency of the engine as a whole.
+    #[cfg(feature = "cli")]
+    pub fn run_cli(
+        &self,
+        outputfmt: &OutputFmt,
+        confirmation: &Confirmation,
+        options: &TransferOptions,
+        force: bool,
+        names: &[String],
+    ) -> Result<(), EngineError> {
+        let force = Force::from_bool(force).map_err(EngineError::TransactionBuild)?;
+        let mut probes = Vec::new();
+        for job in self.get_jobs(names)? {
+            probes.extend(Self::get_sync_probes(
+                options,
+                job.get_source_ref(),
+                job.get_targets_ref(),
+            ));
+        }
+        self.probes.assert(&probes)?;
+        let mut transactions = self.get_run_transactions(names, options)?;
+        if self.estimate {
+            transactions
+                .estimate()
+                .map_err(EngineError::TransactionRun)?;
         }
-        let transactions = self.get_sync_transactions(source, target, options)?;
         transactions
-            .run_cli(outputfmt, confirmation, &force)
+            .run_cli(outputfmt, confirmation, &force, &self.concurrency)
             .map_err(EngineError::TransactionCli)
     }
+
+    /// Runs the cycles of `schedule` on all `pairs` of source and target
+    /// until interrupted, without asking for confirmation. Snapshots are taken
+    /// once per distinct source. Failing cycles are logged and retried in the
+    /// next round. Returns right away if no cycle is scheduled.
+    #[cfg(feature = "cli")]
+    pub fn watch_cli(
+        &self,
+        outputfmt: &OutputFmt,
+        force: bool,
+        pairs: &[(String, String)],
+        schedule: &WatchSchedule,
+        options: &TransferOptions,
+        batch: bool,
+    ) -> Result<(), EngineError> {
+        for (source, target) in pairs {
+            self.config
+                .parse_location(source)
+                .map_err(EngineError::Config)?;
+            self.config
+                .parse_location(target)
+                .map_err(EngineError::Config)?;
+        }
+        let mut sources: Vec<&str> = Vec::new();
+        for (source, _) in pairs {
+            if !sources.contains(&source.as_str()) {
+                sources.push(source);
+            }
+        }
+        let mut timetable = Timetable::new(schedule, Instant::now());
+        while let Some(next) = timetable.get_next() {
+            thread::sleep(next.saturating_duration_since(Instant::now()));
+            for cycle in timetable.take_due(Instant::now()) {
+                info!(message = format!("[CYCLE] {}", cycle.as_str()));
+                match cycle {
+                    Cycle::Snap => {
+                        for source in &sources {
+                            Self::report(
+                                cycle,
+                                source,
+                                self.snap_cli(outputfmt, &Confirmation::Yes, force, source, batch),
+                            );
+                        }
+                    }
+                    Cycle::Sync => {
+                        for (source, target) in pairs {
+                            Self::report(
+                                cycle,
+                                &format!("{source} {target}"),
+                                self.sync_cli(
+                                    outputfmt,
+                                    &Confirmation::Yes,
+                                    options,
+                                    force,
+                                    source,
+                                    slice::from_ref(target),
+                                ),
+                            );
+                        }
+                    }
+                    Cycle::Free => {
+                        for (source, target) in pairs {
+                            Self::report(
+                                cycle,
+                                &format!("{source} {target}"),
+                                self.free_cli(
+                                    outputfmt,
+                                    &Confirmation::Yes,
+                                    force,
+                                    source,
+                                    target,
+                                    batch,
+                                ),
+                            );
+                        }
+                    }
+                }
+            }
+        }
+        Ok(())
+    }
+
+    #[cfg(feature = "cli")]
+    fn report(cycle: Cycle, locations: &str, result: Result<(), EngineError>) {
+        if let Err(err) = result {
+            error!(
+                cycle = cycle.as_str(),
+                locations = locations,
+                traceback = err.traverse()
+            );
+        }
+    }
 }
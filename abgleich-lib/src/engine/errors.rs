@@ -5,6 +5,7 @@ use thiserror::Error as ThisError;
 use crate::config::ConfigError;
 use crate::property::{PropertyError, ValueError};
 use crate::sys::SysError;
+use crate::traits::Traverse;
 #[cfg(feature = "cli")]
 use crate::transaction::TransactionCliError;
 use crate::transaction::{TransactionBuildError, TransactionRunError};
@@ -29,6 +30,15 @@ pub enum EngineError {
     DatasetWithoutSnapshot { dataset: String },
     #[error("failed to load value from environment variable '{name}'")]
     EnvironmentVariable { name: String, source: SysError },
+    #[error("jobs '{first}' and '{second}' both transfer from '{src}' to '{tgt}'")]
+    JobPairDuplicate {
+        src: String,
+        tgt: String,
+        first: String,
+        second: String,
+    },
+    #[error("job '{name}' is not configured")]
+    JobUnknown { name: String },
     #[error("property subsystem error")]
     Property(#[source] PropertyError),
     #[error("unknown mount status of dataset '{name}' in '{root}'")]
@@ -53,3 +63,5 @@ pub enum EngineError {
     #[error("failed to parse property '{name}'")]
     Value { name: String, source: ValueError },
 }
+
+impl Traverse for EngineError {}
@@ -0,0 +1,383 @@
+use std::collections::{HashMap, HashSet};
+use std::fs;
+use std::path::{Path, PathBuf};
+use std::process;
+use std::sync::{Mutex, MutexGuard, PoisonError};
+
+use indexmap::IndexMap;
+use tracing::debug;
+
+use crate::config::Location;
+use crate::consts::INVENTORY_CACHE;
+use crate::property::Projection;
+use crate::subprocess::chunk_arguments;
+use crate::sys::get_cache_dir;
+use crate::transaction::{BaseBuilder, InventoryBuilder};
+
+use super::apool::Apool;
+use super::apoolbuilder::ApoolBuilder;
+use super::errors::EngineError;
+
+const MAGIC: &[u8; 4] = b"ABGI";
+const VERSION: u8 = 3;
+
+/// 64 bit FNV-1a hash of `data`, stable across builds and releases unlike
+/// the hashers of the standard library.
+const fn fnv1a(data: &[u8]) -> u64 {
+    let mut hash: u64 = 0xcbf2_9ce4_8422_2325;
+    let mut index = 0;
+    while index < data.len() {
+        hash ^= data[index] as u64;
+        hash = hash.wrapping_mul(0x0100_0000_01b3);
+        index += 1;
+    }
+    hash
+}
+
+/// Raw `zfs get` lines of a dataset and its snapshots, valid as long as the
+/// change indicators of the dataset match.
+#[derive(Debug, PartialEq, Eq)]
+struct Entry {
+    indicator: String,
+    lines: String,
+}
+
+/// Inventories kept between runs, by route, root and projection.
+///
+/// A cheap `zfs list` of change indicators precedes every inventory: the
+/// index line of each dataset, i.e. `written` and all projected properties
+/// which may change, plus the number of snapshots and a hash over the index
+/// lines of all of them, covering their names, guids and properties. Only
+/// datasets whose indicators differ from the cached ones are fetched again
+/// with `zfs get`. A cold cache is filled with a single full inventory.
+/// Inventories are always kept in memory and, if `persistent`, in one file
+/// per route, root and projection in the cache directory.
+pub struct InventoryCache {
+    persistent: bool,
+    memory: Mutex<HashMap<String, IndexMap<String, Entry>>>,
+}
+
+impl InventoryCache {
+    #[must_use]
+    pub fn new(persistent: bool) -> Self {
+        Self {
+            persistent,
+            memory: Mutex::new(HashMap::new()),
+        }
+    }
+
+    fn lock(&self) -> MutexGuard<'_, HashMap<String, IndexMap<String, Entry>>> {
+        self.memory.lock().unwrap_or_else(PoisonError::into_inner)
+    }
+
+    fn get_key(location: &Location, projection: Projection) -> String {
+        format!(
+            "{}{}\t{}",
+            location.get_route_ref().to_string(),
+            location.get_root_ref().as_str(),
+            projection.to_argument()
+        )
+    }
+
+    fn get_path(key: &str) -> Option<PathBuf> {
+        get_cache_dir().map(|directory| {
+            directory.join(format!(
+                "{INVENTORY_CACHE}-{:016x}.bin",
+                fnv1a(key.as_bytes())
+            ))
+        })
+    }
+
+    pub fn get_apool(
+        &self,
+        location: Location,
+        projection: Projection,
+    ) -> Result<Apool, EngineError> {
+        let key = Self::get_key(&location, projection);
+        let path = if self.persistent {
+            Self::get_path(&key)
+        } else {
+            None
+        };
+        let memory = self.lock().remove(&key);
+        let mut cached = memory
+            .or_else(|| path.as_deref().and_then(|path| Self::load(&key, path)))
+            .unwrap_or_default();
+        let index = Self::get_index(&location, projection)?;
+        let stale: Vec<String> = index
+            .iter()
+            .filter(|(name, indicator)| {
+                cached
+                    .get(*name)
+                    .is_none_or(|entry| entry.indicator != **indicator)
+            })
+            .map(|(name, _)| name.clone())
+            .collect();
+        let mut fresh = if cached.is_empty() {
+            Self::get_lines(InventoryBuilder::new(&location, projection), None)?
+        } else {
+            let wanted: HashSet<&str> = stale.iter().map(String::as_str).collect();
+            let mut fresh = HashMap::new();
+            for chunk in chunk_arguments(stale.clone(), |name| name.len() + 3) {
+                fresh.extend(Self::get_lines(
+                    InventoryBuilder::new(&location, projection).with_datasets(chunk),
+                    Some(&wanted),
+                )?);
+            }
+            fresh
+        };
+        debug!(
+            inventory_cache = key,
+            datasets = index.len(),
+            refreshed = stale.len()
+        );
+        let mut builder = ApoolBuilder::new(location);
+        let mut entries = IndexMap::with_capacity(index.len());
+        for (name, indicator) in index {
+            let lines = fresh
+                .remove(&name)
+                .or_else(|| cached.swap_remove(&name).map(|entry| entry.lines))
+                .unwrap_or_default();
+            for line in lines.lines() {
+                builder.push_line(line)?;
+            }
+            // Vanished between index and refresh, fetched again next time.
+            if !lines.is_empty() {
+                entries.insert(name, Entry { indicator, lines });
+            }
+        }
+        let apool = builder.build()?;
+        if let Some(path) = &path {
+            Self::store(&key, path, &entries);
+        }
+        self.lock().insert(key, entries);
+        Ok(apool)
+    }
+
+    /// Change indicators by absolute dataset name, in inventory order.
+    fn get_index(
+        location: &Location,
+        projection: Projection,
+    ) -> Result<IndexMap<String, String>, EngineError> {
+        let outcome = InventoryBuilder::new(location, projection)
+            .with_index()
+            .build()
+            .map_err(EngineError::TransactionBuild)?
+            .run()
+            .map_err(EngineError::TransactionRun)?;
+        outcome
+            .assert_success()
+            .map_err(EngineError::TransactionRun)?;
+        Ok(Self::parse_index(
+            outcome.get_data_ref().unwrap_or_default(),
+        ))
+    }
+
+    fn parse_index(data: &str) -> IndexMap<String, String> {
+        let mut datasets: IndexMap<String, String> = IndexMap::new();
+        let mut snapshots: HashMap<&str, Vec<&str>> = HashMap::new();
+        for line in data.lines() {
+            let name = line.split('\t').next().unwrap_or_default();
+            if name.is_empty() {
+                continue;
+            }
+            match name.split_once('@') {
+                Some((parent, _)) => snapshots.entry(parent).or_default().push(line),
+                None => {
+                    datasets.insert(name.to_string(), line.to_string());
+                }
+            }
+        }
+        for (name, indicator) in &mut datasets {
+            let mut lines = snapshots.remove(name.as_str()).unwrap_or_default();
+            lines.sort_unstable();
+            let hash = fnv1a(lines.join("\n").as_bytes());
+            *indicator = format!("{indicator}\t{}\t{hash:016x}", lines.len());
+        }
+        datasets
+    }
+
+    /// Output lines of `builder` grouped by dataset, limited to `wanted`
+    /// datasets if given.
+    fn get_lines(
+        builder: InventoryBuilder,
+        wanted: Option<&HashSet<&str>>,
+    ) -> Result<HashMap<String, String>, EngineError> {
+        let outcome = builder
+            .build()
+            .map_err(EngineError::TransactionBuild)?
+            .run()
+            .map_err(EngineError::TransactionRun)?;
+        outcome
+            .assert_success()
+            .map_err(EngineError::TransactionRun)?;
+        let mut lines: HashMap<String, String> = HashMap::new();
+        for line in outcome.get_data_ref().unwrap_or_default().lines() {
+            let name = line.split('\t').next().unwrap_or_default();
+            let dataset = name.split_once('@').map_or(name, |(dataset, _)| dataset);
+            if dataset.is_empty() || wanted.is_some_and(|wanted| !wanted.contains(dataset)) {
+                continue;
+            }
+            let entry = lines.entry(dataset.to_string()).or_default();
+            entry.push_str(line);
+            entry.push('\n');
+        }
+        Ok(lines)
+    }
+
+    /// Entries of the cache file. Missing, unreadable or foreign files count
+    /// as an empty cache.
+    fn load(key: &str, path: &Path) -> Option<IndexMap<String, Entry>> {
+        fs::read(path)
+            .ok()
+            .and_then(|data| Self::decode(key, &data))
+    }
+
+    /// Failures are logged only, the cache is an optimization.
+    fn store(key: &str, path: &Path, entries: &IndexMap<String, Entry>) {
+        let temporary = path.with_extension(format!("{}.tmp", process::id()));
+        let result = path
+            .parent()
+            .map_or(Ok(()), fs::create_dir_all)
+            .and_then(|()| fs::write(&temporary, Self::encode(key, entries)))
+            .and_then(|()| fs::rename(&temporary, path));
+        if let Err(e) = result {
+            debug!(
+                inventory_cache = path.display().to_string(),
+                error = e.to_string()
+            );
+        }
+    }
+
+    /// Magic, version and key, followed by the number of entries and, for
+    /// each, name, indicator and lines. Strings are prefixed by their length,
+    /// all integers are little endian `u64`.
+    fn encode(key: &str, entries: &IndexMap<String, Entry>) -> Vec<u8> {
+        let mut data = Vec::new();
+        data.extend_from_slice(MAGIC);
+        data.push(VERSION);
+        Self::put_string(&mut data, key);
+        data.extend_from_slice(&(entries.len() as u64).to_le_bytes());
+        for (name, entry) in entries {
+            Self::put_string(&mut data, name);
+            Self::put_string(&mut data, &entry.indicator);
+            Self::put_string(&mut data, &entry.lines);
+        }
+        data
+    }
+
+    fn put_string(data: &mut Vec<u8>, value: &str) {
+        data.extend_from_slice(&(value.len() as u64).to_le_bytes());
+        data.extend_from_slice(value.as_bytes());
+    }
+
+    fn decode(key: &str, data: &[u8]) -> Option<IndexMap<String, Entry>> {
+        let mut reader = Reader { data };
+        if reader.take(MAGIC.len())? != MAGIC || reader.take(1)? != [VERSION] {
+            return None;
+        }
+        if reader.get_string()? != key {
+            return None;
+        }
+        let count = reader.get_usize()?;
+        let mut entries = IndexMap::new();
+        for _ in 0..count {
+            let name = reader.get_string()?;
+            let indicator = reader.get_string()?;
+            let lines = reader.get_string()?;
+            entries.insert(name, Entry { indicator, lines });
+        }
+        Some(entries)
+    }
+}
+
+/// Cursor over the contents of a cache file, `None` once it is truncated.
+struct Reader<'a> {
+    data: &'a [u8],
+}
+
+impl<'a> Reader<'a> {
+    const fn take(&mut self, length: usize) -> Option<&'a [u8]> {
+        if length > self.data.len() {
+            return None;
+        }
+        let (head, tail) = self.data.split_at(length);
+        self.data = tail;
+        Some(head)
+    }
+
+    fn get_usize(&mut self) -> Option<usize> {
+        let bytes: [u8; 8] = self.take(8)?.try_into().ok()?;
+        usize::try_from(u64::from_le_bytes(bytes)).ok()
+    }
+
+    fn get_string(&mut self) -> Option<String> {
+        let length = self.get_usize()?;
+        String::from_utf8(self.take(length)?.to_vec()).ok()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use indexmap::IndexMap;
+
+    use super::{Entry, InventoryCache, fnv1a};
+
+    #[test]
+    fn hash() {
+        assert_eq!(fnv1a(b""), 0xcbf2_9ce4_8422_2325);
+        assert_eq!(fnv1a(b"a"), 0xaf63_dc4c_8601_ec8c);
+        assert_eq!(fnv1a(b"foobar"), 0x8594_4171_f739_67e8);
+    }
+
+    #[test]
+    fn index() {
+        let data = "tank\t1\t10\t0\t-\n\
+                    tank@a\t5\t11\t0\t-\n\
+                    tank/one\t7\t20\t512\ttrue\n\
+                    tank@b\t9\t12\t0\t-\n\
+                    tank/one@c\t8\t21\t0\ttrue\n";
+        let index = InventoryCache::parse_index(data);
+        assert_eq!(index.keys().collect::<Vec<_>>(), vec!["tank", "tank/one"]);
+        assert!(index["tank"].starts_with("tank\t1\t10\t0\t-\t2\t"));
+        assert!(index["tank/one"].starts_with("tank/one\t7\t20\t512\ttrue\t1\t"));
+        // Order of snapshot lines is irrelevant.
+        let reordered = "tank@b\t9\t12\t0\t-\n\
+                         tank\t1\t10\t0\t-\n\
+                         tank/one@c\t8\t21\t0\ttrue\n\
+                         tank@a\t5\t11\t0\t-\n\
+                         tank/one\t7\t20\t512\ttrue\n";
+        assert_eq!(InventoryCache::parse_index(reordered), index);
+        // Renamed older snapshot, changed snapshot property.
+        for changed in [
+            data.replace("tank@a\t", "tank@renamed\t"),
+            data.replace("tank/one@c\t8\t21\t0\ttrue", "tank/one@c\t8\t21\t0\tfalse"),
+        ] {
+            assert_ne!(InventoryCache::parse_index(&changed), index);
+        }
+    }
+
+    #[test]
+    fn roundtrip() {
+        let mut entries = IndexMap::new();
+        entries.insert(
+            "tank".to_string(),
+            Entry {
+                indicator: "tank\t1\t10\t0\t0\t".to_string(),
+                lines: "tank\ttype\tfilesystem\t-\n".to_string(),
+            },
+        );
+        entries.insert(
+            "tank/ü".to_string(),
+            Entry {
+                indicator: String::new(),
+                lines: String::new(),
+            },
+        );
+        let data = InventoryCache::encode("a", &entries);
+        assert_eq!(InventoryCache::decode("a", &data), Some(entries));
+        assert_eq!(InventoryCache::decode("b", &data), None);
+        assert_eq!(InventoryCache::decode("a", &data[..data.len() - 1]), None);
+        assert_eq!(InventoryCache::decode("a", b"junk"), None);
+    }
+}
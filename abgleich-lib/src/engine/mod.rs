@@ -1,10 +1,15 @@
 mod apool;
+mod apoolbuilder;
 mod common;
 mod comparison;
 mod dataset;
 mod engine;
 mod errors;
+mod inventorycache;
+mod probes;
 mod snapshot;
+#[cfg(feature = "cli")]
+mod timetable;
 
 pub use apool::Apool;
 pub use common::Common;
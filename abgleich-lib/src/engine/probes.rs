@@ -0,0 +1,232 @@
+use std::collections::{BTreeSet, HashMap};
+use std::fs;
+use std::panic;
+use std::path::{Path, PathBuf};
+use std::sync::{Mutex, MutexGuard, PoisonError};
+use std::thread;
+use std::time::{SystemTime, UNIX_EPOCH};
+
+use serde_json::{Map, Value};
+use tracing::debug;
+
+use crate::config::Route;
+use crate::consts::{DEFAULT_PROBE_TTL, PROBE_CACHE, VAR_PROBE_TTL};
+use crate::sys::{envvar2type_or, get_cache_dir};
+use crate::transaction::{BaseBuilder, WhichBuilder};
+
+use super::errors::EngineError;
+
+/// Executables known to exist, by route.
+///
+/// Each route is probed with a single `which` call covering all executables
+/// not known yet. Results are memoised for the run and, if `ABGLEICH_PROBE_TTL`
+/// is set, persisted in the cache directory for that many seconds. Only found
+/// executables are remembered, missing ones are probed again.
+pub struct Probes {
+    found: Mutex<HashMap<String, BTreeSet<String>>>,
+    path: Option<PathBuf>,
+}
+
+impl Probes {
+    pub fn from_detect() -> Result<Self, EngineError> {
+        let ttl = envvar2type_or(VAR_PROBE_TTL, &DEFAULT_PROBE_TTL).map_err(|e| {
+            EngineError::EnvironmentVariable {
+                name: VAR_PROBE_TTL.to_string(),
+                source: e,
+            }
+        })?;
+        let path = if ttl > 0 {
+            get_cache_dir().map(|directory| directory.join(PROBE_CACHE))
+        } else {
+            None
+        };
+        let found = path
+            .as_deref()
+            .map(|path| Self::load(path, ttl))
+            .unwrap_or_default();
+        Ok(Self {
+            found: Mutex::new(found),
+            path,
+        })
+    }
+
+    fn lock(&self) -> MutexGuard<'_, HashMap<String, BTreeSet<String>>> {
+        self.found.lock().unwrap_or_else(PoisonError::into_inner)
+    }
+
+    fn get_now() -> u64 {
+        SystemTime::now()
+            .duration_since(UNIX_EPOCH)
+            .map_or(0, |duration| duration.as_secs())
+    }
+
+    fn is_known(found: &HashMap<String, BTreeSet<String>>, route: &Route, command: &str) -> bool {
+        found
+            .get(&route.to_string())
+            .is_some_and(|commands| commands.contains(command))
+    }
+
+    /// Probes all executables of `probes` not known yet, with one call per
+    /// route and all routes concurrently. If several are missing, the first one in
+    /// order of `probes` is reported.
+    pub fn assert(&self, probes: &[(&Route, &str)]) -> Result<(), EngineError> {
+        let mut pending: Vec<(&Route, Vec<String>)> = Vec::new();
+        {
+            let found = self.lock();
+            for (route, command) in probes {
+                if Self::is_known(&found, route, command) {
+                    continue;
+                }
+                match pending.iter_mut().find(|(other, _)| other == route) {
+                    Some((_, commands)) if commands.iter().any(|other| other == command) => {}
+                    Some((_, commands)) => commands.push((*command).to_string()),
+                    None => pending.push((route, vec![(*command).to_string()])),
+                }
+            }
+        }
+        let results = thread::scope(|scope| {
+            #[expect(clippy::needless_collect, reason = "spawn all probes before joining")]
+            let handles: Vec<_> = pending
+                .iter()
+                .map(|(route, commands)| scope.spawn(move || Self::probe(route, commands)))
+                .collect();
+            handles
+                .into_iter()
+                .map(|handle| {
+                    handle
+                        .join()
+                        .unwrap_or_else(|err| panic::resume_unwind(err))
+                })
+                .collect::<Result<Vec<Vec<String>>, EngineError>>()
+        })?;
+        let mut found = self.lock();
+        let mut discovered: Vec<(String, String)> = Vec::new();
+        for ((route, _), commands) in pending.iter().zip(results) {
+            let key = route.to_string();
+            for command in commands {
+                if found
+                    .entry(key.clone())
+                    .or_default()
+                    .insert(command.clone())
+                {
+                    discovered.push((key.clone(), command));
+                }
+            }
+        }
+        self.store(&discovered);
+        for (route, command) in probes {
+            if !Self::is_known(&found, route, command) {
+                return Err(EngineError::CommandNotFound {
+                    host: route.get_host_ref().to_string(),
+                    user: route.get_user_ref().unwrap_or("[default]").to_string(),
+                    command: (*command).to_string(),
+                });
+            }
+        }
+        Ok(())
+    }
+
+    fn probe(route: &Route, commands: &[String]) -> Result<Vec<String>, EngineError> {
+        let outcome = WhichBuilder::new(route, commands.to_vec())
+            .build()
+            .map_err(EngineError::TransactionBuild)?
+            .run()
+            .map_err(EngineError::TransactionRun)?;
+        Ok(WhichBuilder::get_found(
+            outcome.get_data_ref().unwrap_or_default(),
+            commands,
+        ))
+    }
+
+    /// Executables checked less than `ttl` seconds ago. The cache file maps
+    /// routes to executables to the time of their last check.
+    fn load(path: &Path, ttl: u64) -> HashMap<String, BTreeSet<String>> {
+        let now = Self::get_now();
+        let mut found: HashMap<String, BTreeSet<String>> = HashMap::new();
+        for (route, commands) in Self::read(path) {
+            let Value::Object(commands) = commands else {
+                continue;
+            };
+            for (command, checked) in commands {
+                if checked
+                    .as_u64()
+                    .is_some_and(|checked| now.saturating_sub(checked) < ttl)
+                {
+                    found.entry(route.clone()).or_default().insert(command);
+                }
+            }
+        }
+        debug!(
+            probe_cache = path.display().to_string(),
+            routes = found.len()
+        );
+        found
+    }
+
+    fn read(path: &Path) -> Map<String, Value> {
+        match fs::read_to_string(path).map(|raw| serde_json::from_str(&raw)) {
+            Ok(Ok(Value::Object(routes))) => routes,
+            _ => Map::new(),
+        }
+    }
+
+    /// Adds `discovered` pairs of route and executable to the cache file, if
+    /// any. Failures are logged only, the cache is an optimization.
+    fn store(&self, discovered: &[(String, String)]) {
+        let Some(path) = &self.path else {
+            return;
+        };
+        if discovered.is_empty() {
+            return;
+        }
+        let now = Self::get_now();
+        let mut routes = Self::read(path);
+        for (route, command) in discovered {
+            if let Value::Object(commands) = routes
+                .entry(route.clone())
+                .or_insert_with(|| Value::Object(Map::new()))
+            {
+                commands.insert(command.clone(), Value::from(now));
+            }
+        }
+        let temporary = path.with_extension("tmp");
+        let result = path
+            .parent()
+            .map_or(Ok(()), fs::create_dir_all)
+            .and_then(|()| fs::write(&temporary, Value::Object(routes).to_string()))
+            .and_then(|()| fs::rename(&temporary, path));
+        if let Err(e) = result {
+            debug!(
+                probe_cache = path.display().to_string(),
+                error = e.to_string()
+            );
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::collections::HashMap;
+    use std::env;
+    use std::fs;
+    use std::process;
+    use std::sync::Mutex;
+
+    use super::Probes;
+
+    #[test]
+    fn cache() {
+        let directory = env::temp_dir().join(format!("abgleich-probes-{}", process::id()));
+        let path = directory.join("probes.json");
+        let probes = Probes {
+            found: Mutex::new(HashMap::new()),
+            path: Some(path.clone()),
+        };
+        probes.store(&[("a:".to_string(), "zfs".to_string())]);
+        probes.store(&[("a:".to_string(), "pv".to_string())]);
+        let found = Probes::load(&path, 60);
+        assert_eq!(found["a:"].iter().collect::<Vec<_>>(), vec!["pv", "zfs"]);
+        assert!(Probes::load(&path, 0).is_empty());
+        fs::remove_dir_all(directory).unwrap();
+    }
+}
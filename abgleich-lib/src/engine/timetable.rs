@@ -0,0 +1,78 @@
+use std::time::{Duration, Instant};
+
+use crate::config::{Cycle, WatchSchedule};
+
+/// Due times of the cycles of a `WatchSchedule`. All cycles are due right
+/// away. Afterwards, each keeps its phase: rounds missed while others were
+/// running are skipped instead of being caught up on.
+pub struct Timetable {
+    entries: Vec<(Cycle, Duration, Instant)>, // cycle, interval, next due
+}
+
+impl Timetable {
+    #[must_use]
+    pub fn new(schedule: &WatchSchedule, start: Instant) -> Self {
+        Self {
+            entries: schedule
+                .get_intervals_ref()
+                .iter()
+                .map(|(cycle, interval)| (*cycle, *interval, start))
+                .collect(),
+        }
+    }
+
+    /// Cycles due at `now`, in the order of `Cycle`, each scheduled again.
+    pub fn take_due(&mut self, now: Instant) -> Vec<Cycle> {
+        let mut due = Vec::new();
+        for (cycle, interval, next) in &mut self.entries {
+            if *next > now {
+                continue;
+            }
+            due.push(*cycle);
+            while *next <= now {
+                *next += *interval;
+            }
+        }
+        due
+    }
+
+    #[must_use]
+    pub fn get_next(&self) -> Option<Instant> {
+        self.entries.iter().map(|(_, _, next)| *next).min()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::time::{Duration, Instant};
+
+    use crate::config::{Cycle, WatchSchedule};
+
+    use super::Timetable;
+
+    #[test]
+    fn phases() {
+        let start = Instant::now();
+        let minutes = |value: u64| Duration::from_secs(value * 60);
+        let mut timetable = Timetable::new(
+            &WatchSchedule::new()
+                .with_interval(Cycle::Sync, Some(minutes(15)))
+                .with_interval(Cycle::Snap, Some(minutes(5))),
+            start,
+        );
+        assert_eq!(timetable.take_due(start), vec![Cycle::Snap, Cycle::Sync]);
+        assert_eq!(timetable.get_next(), Some(start + minutes(5)));
+        assert!(timetable.take_due(start + minutes(4)).is_empty());
+        assert_eq!(timetable.take_due(start + minutes(12)), vec![Cycle::Snap]);
+        assert_eq!(timetable.get_next(), Some(start + minutes(15)));
+        assert_eq!(
+            timetable.take_due(start + minutes(15)),
+            vec![Cycle::Snap, Cycle::Sync]
+        );
+        assert!(
+            Timetable::new(&WatchSchedule::new(), start)
+                .get_next()
+                .is_none()
+        );
+    }
+}
@@ -21,7 +21,7 @@ impl From<&BoolValue> for bool {
 
 impl BaseValue for BoolValue {
     fn from_raw(raw: &RawProperty) -> Result<Self, ValueError> {
-        Self::from_str(&raw.value)
+        Self::from_str(raw.value)
     }
 }
 
@@ -1,4 +1,3 @@
-use indexmap::IndexMap;
 use tracing::trace;
 
 use super::bool::BoolValue;
@@ -8,6 +7,7 @@ use super::int::IntValue;
 use super::optionaluint::OptionalUIntValue;
 use super::property::{BaseProperty, ImmutableProperty, MutableProperty};
 use super::raw::RawProperty;
+use super::send::SendValue;
 use super::snap::SnapValue;
 use super::string::StringValue;
 use super::type_::TypeValue;
@@ -17,6 +17,7 @@ pub struct Description {
     pub abgleich_diff: Option<MutableProperty<BoolValue>>,
     pub abgleich_format: Option<MutableProperty<StringValue>>,
     pub abgleich_overlap: Option<MutableProperty<IntValue>>,
+    pub abgleich_send: Option<MutableProperty<SendValue>>,
     pub abgleich_snap: Option<MutableProperty<SnapValue>>,
     pub abgleich_sync: Option<MutableProperty<BoolValue>>,
     pub abgleich_threshold: Option<MutableProperty<UIntValue>>,
@@ -38,6 +39,7 @@ pub struct Description {
     pub mountpoint: Option<MutableProperty<StringValue>>,
     pub name: String,
     pub readonly: Option<MutableProperty<BoolValue>>,
+    pub receive_resume_token: Option<ImmutableProperty<StringValue>>,
     pub redundant_metadata: Option<MutableProperty<StringValue>>,
     pub refcompressratio: Option<ImmutableProperty<FloatValue>>,
     pub referenced: Option<ImmutableProperty<UIntValue>>,
@@ -61,11 +63,12 @@ pub struct Description {
 
 impl Description {
     #[must_use]
-    const fn new(name: String) -> Self {
+    pub const fn new(name: String) -> Self {
         Self {
             abgleich_diff: None,
             abgleich_format: None,
             abgleich_overlap: None,
+            abgleich_send: None,
             abgleich_snap: None,
             abgleich_sync: None,
             abgleich_threshold: None,
@@ -87,6 +90,7 @@ impl Description {
             mountpoint: None,
             name,
             readonly: None,
+            receive_resume_token: None,
             redundant_metadata: None,
             refcompressratio: None,
             referenced: None,
@@ -109,11 +113,12 @@ impl Description {
         }
     }
 
-    fn fill(&mut self, raw: &RawProperty) -> Result<(), PropertyError> {
-        match raw.name.as_str() {
+    pub fn fill(&mut self, raw: &RawProperty) -> Result<(), PropertyError> {
+        match raw.name {
             "abgleich:diff" => self.abgleich_diff = Some(MutableProperty::from_raw(raw)?),
             "abgleich:format" => self.abgleich_format = Some(MutableProperty::from_raw(raw)?),
             "abgleich:overlap" => self.abgleich_overlap = Some(MutableProperty::from_raw(raw)?),
+            "abgleich:send" => self.abgleich_send = Some(MutableProperty::from_raw(raw)?),
             "abgleich:snap" => self.abgleich_snap = Some(MutableProperty::from_raw(raw)?),
             "abgleich:sync" => self.abgleich_sync = Some(MutableProperty::from_raw(raw)?),
             "abgleich:threshold" => self.abgleich_threshold = Some(MutableProperty::from_raw(raw)?),
@@ -134,6 +139,9 @@ impl Description {
             "mounted" => self.mounted = Some(ImmutableProperty::from_raw(raw)?),
             "mountpoint" => self.mountpoint = Some(MutableProperty::from_raw(raw)?),
             "readonly" => self.readonly = Some(MutableProperty::from_raw(raw)?),
+            "receive_resume_token" => {
+                self.receive_resume_token = Some(ImmutableProperty::from_raw(raw)?);
+            }
             "redundant_metadata" => self.redundant_metadata = Some(MutableProperty::from_raw(raw)?),
             "refcompressratio" => self.refcompressratio = Some(ImmutableProperty::from_raw(raw)?),
             "referenced" => self.referenced = Some(ImmutableProperty::from_raw(raw)?),
@@ -183,24 +191,4 @@ impl Description {
         self.name = child.to_string();
         Ok(Self::fix_name(parent, root))
     }
-
-    pub fn from_raws(raw: &str) -> Result<IndexMap<String, Self>, PropertyError> {
-        let raw_properties: Vec<RawProperty> = RawProperty::from_raws(raw)?;
-        let mut descriptions: IndexMap<String, Self> = IndexMap::new();
-        for raw_property in raw_properties {
-            let name: &String = &raw_property.dataset;
-            let item = descriptions.get_mut(name);
-            match item {
-                None => {
-                    let mut description = Self::new(name.clone());
-                    description.fill(&raw_property)?;
-                    descriptions.insert(name.clone(), description);
-                }
-                Some(value) => {
-                    value.fill(&raw_property)?;
-                }
-            }
-        }
-        Ok(descriptions)
-    }
 }
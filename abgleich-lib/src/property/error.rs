@@ -28,6 +28,8 @@ pub enum ValueError {
     },
     #[error("'{value}' into origin")]
     Origin { value: String },
+    #[error("'{value}' into send")]
+    Send { value: String },
     #[error("'{value}' into snap")]
     Snap { value: String },
     #[error("'{value}' into type")]
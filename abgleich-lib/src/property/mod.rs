@@ -5,8 +5,10 @@ mod float;
 mod int;
 mod optionaluint;
 mod origin;
+mod projection;
 mod property;
 mod raw;
+mod send;
 mod snap;
 mod string;
 mod type_;
@@ -20,7 +22,10 @@ pub use float::FloatValue;
 pub use int::IntValue;
 pub use optionaluint::OptionalUIntValue;
 pub use origin::Origin;
+pub use projection::Projection;
 pub use property::{BaseProperty, ImmutableProperty, MutableProperty};
+pub use raw::RawProperty;
+pub use send::SendValue;
 pub use snap::SnapValue;
 pub use string::StringValue;
 pub use type_::TypeValue;
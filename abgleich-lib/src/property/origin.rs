@@ -13,7 +13,7 @@ pub enum Origin {
 
 impl Origin {
     pub fn from_raw(raw: &RawProperty) -> Result<Self, ValueError> {
-        Self::from_str(&raw.origin)
+        Self::from_str(raw.origin)
     }
 }
 
@@ -0,0 +1,90 @@
+/// Set of properties requested from `zfs get` for an inventory.
+///
+/// Each sub-command only fetches what it evaluates. Targets only need to
+/// identify snapshots, i.e. their creation time and guid, and to expose
+/// interrupted transfers via their resume token.
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum Projection {
+    All,
+    Free,
+    Ls,
+    Snap,
+    Sync,
+    Target,
+}
+
+impl Projection {
+    #[must_use]
+    pub const fn get_names(&self) -> &'static [&'static str] {
+        match self {
+            Self::All => &[],
+            Self::Free => &[
+                "type",
+                "creation",
+                "guid",
+                "abgleich:overlap",
+                "abgleich:sync",
+            ],
+            Self::Ls => &[
+                "type",
+                "creation",
+                "used",
+                "referenced",
+                "compressratio",
+                "abgleich:snap",
+            ],
+            Self::Snap => &[
+                "type",
+                "creation",
+                "written",
+                "mounted",
+                "abgleich:diff",
+                "abgleich:format",
+                "abgleich:snap",
+                "abgleich:threshold",
+            ],
+            Self::Sync => &["type", "creation", "guid", "abgleich:send", "abgleich:sync"],
+            Self::Target => &["type", "creation", "guid", "receive_resume_token"],
+        }
+    }
+
+    /// Argument for `zfs get`, i.e. either `all` or a comma-separated list.
+    #[must_use]
+    pub fn to_argument(&self) -> String {
+        match self {
+            Self::All => "all".to_string(),
+            _ => self.get_names().join(","),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::Projection;
+
+    #[test]
+    fn all() {
+        assert_eq!(Projection::All.to_argument(), "all");
+    }
+
+    #[test]
+    fn target() {
+        assert_eq!(
+            Projection::Target.to_argument(),
+            "type,creation,guid,receive_resume_token"
+        );
+    }
+
+    #[test]
+    fn type_always_included() {
+        for projection in [
+            Projection::Free,
+            Projection::Ls,
+            Projection::Snap,
+            Projection::Sync,
+            Projection::Target,
+        ] {
+            assert!(projection.get_names().contains(&"type"));
+        }
+    }
+}
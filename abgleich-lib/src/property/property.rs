@@ -20,7 +20,7 @@ impl<T: BaseValue> BaseProperty<T> for ImmutableProperty<T> {
     fn from_raw(raw: &RawProperty) -> Result<Self, PropertyError> {
         Ok(Self {
             value: T::from_raw(raw).map_err(|e| PropertyError::Value {
-                name: raw.name.clone(),
+                name: raw.name.to_string(),
                 source: e,
             })?,
         })
@@ -48,11 +48,11 @@ impl<T: BaseValue> BaseProperty<T> for MutableProperty<T> {
     fn from_raw(raw: &RawProperty) -> Result<Self, PropertyError> {
         Ok(Self {
             value: T::from_raw(raw).map_err(|e| PropertyError::Value {
-                name: raw.name.clone(),
+                name: raw.name.to_string(),
                 source: e,
             })?,
             origin: Origin::from_raw(raw).map_err(|e| PropertyError::Value {
-                name: raw.name.clone(),
+                name: raw.name.to_string(),
                 source: e,
             })?,
         })
@@ -1,56 +1,36 @@
 use super::error::PropertyError;
 
-pub struct RawProperty {
-    pub dataset: String,
-    pub name: String,
-    pub value: String,
-    pub origin: String,
+/// One line of `zfs get -Hp` output, borrowing its fields from the line.
+pub struct RawProperty<'a> {
+    pub dataset: &'a str,
+    pub name: &'a str,
+    pub value: &'a str,
+    pub origin: &'a str,
 }
 
-impl RawProperty {
-    pub fn from_line(line: &str) -> Result<Self, PropertyError> {
+impl<'a> RawProperty<'a> {
+    pub fn from_line(line: &'a str) -> Result<Self, PropertyError> {
         let mut fragments = line.split('\t');
-        let raw_property = Self {
-            dataset: fragments
+        let mut next = || {
+            fragments
                 .next()
                 .ok_or_else(|| PropertyError::ParseFragments {
                     line: line.to_string(),
-                })?
-                .to_string(),
-            name: fragments
-                .next()
-                .ok_or_else(|| PropertyError::ParseFragments {
-                    line: line.to_string(),
-                })?
-                .to_string(),
-            value: fragments
-                .next()
-                .ok_or_else(|| PropertyError::ParseFragments {
-                    line: line.to_string(),
-                })?
-                .to_string(),
-            origin: fragments
-                .next()
-                .ok_or_else(|| PropertyError::ParseFragments {
-                    line: line.to_string(),
-                })?
-                .to_string(),
+                })
         };
-        Ok(raw_property)
+        Ok(Self {
+            dataset: next()?,
+            name: next()?,
+            value: next()?,
+            origin: next()?,
+        })
     }
 
-    pub fn from_raws(raw: &str) -> Result<Vec<Self>, PropertyError> {
-        let lines = raw.split('\n');
-        let chars: &[_] = &[' ', '\t'];
-        let mut raw_properties: Vec<Self> = Vec::new();
-        for line in lines {
-            let line_cleaned = line.trim_matches(chars);
-            if line_cleaned.is_empty() {
-                continue;
-            }
-            let raw_property = Self::from_line(line_cleaned)?;
-            raw_properties.push(raw_property);
-        }
-        Ok(raw_properties)
+    /// Explicitly requested properties which are unset (user properties) or do
+    /// not apply (e.g. `mounted` on snapshots) are reported as `-` with source
+    /// `-`, while `zfs get all` omits them entirely.
+    #[must_use]
+    pub fn is_void(&self) -> bool {
+        self.value == "-" && self.origin == "-"
     }
 }
@@ -0,0 +1,104 @@
+use std::str::FromStr;
+use std::string::ToString;
+
+use super::error::ValueError;
+use super::raw::RawProperty;
+use super::value::BaseValue;
+
+/// Profile of additional `zfs send` flags, a comma-separated list of
+/// `raw` (`-w`), `large-block` (`-L`), `embedded` (`-e`) and `properties`
+/// (`-p`), or `none`.
+#[derive(Clone, Copy, Debug, Default, PartialEq, Eq)]
+pub struct SendValue {
+    flags: u8, // bits by position in FLAGS
+}
+
+/// Profile names and `zfs send` flags, in order of rendering.
+const FLAGS: [(&str, &str); 4] = [
+    ("raw", "-w"),
+    ("large-block", "-L"),
+    ("embedded", "-e"),
+    ("properties", "-p"),
+];
+
+impl SendValue {
+    /// No additional flags.
+    #[must_use]
+    pub const fn new() -> Self {
+        Self { flags: 0 }
+    }
+
+    fn get_set_iter(self) -> impl Iterator<Item = &'static (&'static str, &'static str)> {
+        FLAGS
+            .iter()
+            .enumerate()
+            .filter(move |(index, _)| self.flags & (1 << index) != 0)
+            .map(|(_, flag)| flag)
+    }
+
+    /// Flags for `zfs send`, in a fixed order.
+    #[must_use]
+    pub fn to_args(self) -> Vec<String> {
+        self.get_set_iter()
+            .map(|(_, flag)| (*flag).to_string())
+            .collect()
+    }
+}
+
+impl BaseValue for SendValue {
+    fn from_raw(raw: &RawProperty) -> Result<Self, ValueError> {
+        Self::from_str(raw.value)
+    }
+}
+
+impl FromStr for SendValue {
+    type Err = ValueError;
+
+    fn from_str(raw: &str) -> Result<Self, ValueError> {
+        let mut value = Self::new();
+        for name in raw.split(',').map(str::trim) {
+            if name.is_empty() || name == "none" {
+                continue;
+            }
+            let index = FLAGS
+                .iter()
+                .position(|(other, _)| *other == name)
+                .ok_or_else(|| ValueError::Send {
+                    value: raw.to_string(),
+                })?;
+            value.flags |= 1 << index;
+        }
+        Ok(value)
+    }
+}
+
+#[allow(clippy::to_string_trait_impl)]
+impl ToString for SendValue {
+    fn to_string(&self) -> String {
+        let names: Vec<&str> = self.get_set_iter().map(|(name, _)| *name).collect();
+        if names.is_empty() {
+            "none".to_string()
+        } else {
+            names.join(",")
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::str::FromStr;
+
+    use super::SendValue;
+
+    #[test]
+    fn parse() {
+        let value = SendValue::from_str("properties, raw,large-block").unwrap();
+        assert_eq!(value.to_args(), vec!["-w", "-L", "-p"]);
+        assert_eq!(value.to_string(), "raw,large-block,properties");
+        let none = SendValue::from_str("none").unwrap();
+        assert!(none.to_args().is_empty());
+        assert_eq!(none.to_string(), "none");
+        assert_eq!(SendValue::from_str("").unwrap(), SendValue::new());
+        assert!(SendValue::from_str("raw,compressed").is_err());
+    }
+}
@@ -14,7 +14,7 @@ pub enum SnapValue {
 
 impl BaseValue for SnapValue {
     fn from_raw(raw: &RawProperty) -> Result<Self, ValueError> {
-        Self::from_str(&raw.value)
+        Self::from_str(raw.value)
     }
 }
 
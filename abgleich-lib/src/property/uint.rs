@@ -19,7 +19,7 @@ impl UIntValue {
 
 impl BaseValue for UIntValue {
     fn from_raw(raw: &RawProperty) -> Result<Self, ValueError> {
-        Self::from_str(&raw.value)
+        Self::from_str(raw.value)
     }
 }
 
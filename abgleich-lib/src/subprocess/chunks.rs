@@ -0,0 +1,51 @@
+use crate::consts::ARGUMENTS_MAX_LENGTH;
+
+/// Split `items` into consecutive chunks whose accumulated `length` stays
+/// within `ARGUMENTS_MAX_LENGTH`. Every chunk holds at least one item, so an
+/// oversized item ends up in a chunk of its own.
+pub fn chunk_arguments<T>(items: Vec<T>, length: impl Fn(&T) -> usize) -> Vec<Vec<T>> {
+    let mut chunks: Vec<Vec<T>> = Vec::new();
+    let mut current = 0;
+    for item in items {
+        let item_length = length(&item) + 1; // separator
+        match chunks.last_mut() {
+            Some(chunk) if current + item_length <= ARGUMENTS_MAX_LENGTH => {
+                chunk.push(item);
+                current += item_length;
+            }
+            _ => {
+                chunks.push(vec![item]);
+                current = item_length;
+            }
+        }
+    }
+    chunks
+}
+
+#[cfg(test)]
+mod tests {
+    use crate::consts::ARGUMENTS_MAX_LENGTH;
+
+    use super::chunk_arguments;
+
+    #[test]
+    fn empty() {
+        assert!(chunk_arguments(Vec::<String>::new(), String::len).is_empty());
+    }
+
+    #[test]
+    fn single() {
+        let chunks = chunk_arguments(vec!["a", "b", "c"], |item| item.len());
+        assert_eq!(chunks, vec![vec!["a", "b", "c"]]);
+    }
+
+    #[test]
+    fn split() {
+        let half = ARGUMENTS_MAX_LENGTH / 2;
+        let chunks = chunk_arguments(vec![half, half, 1, ARGUMENTS_MAX_LENGTH * 2], |item| *item);
+        assert_eq!(
+            chunks,
+            vec![vec![half], vec![half, 1], vec![ARGUMENTS_MAX_LENGTH * 2]]
+        );
+    }
+}
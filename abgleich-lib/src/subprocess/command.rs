@@ -4,8 +4,10 @@ use std::string::ToString;
 use shlex::try_join;
 
 use crate::config::Route;
+use crate::consts::LOCALHOST;
 
 use super::errors::SubprocessError;
+use super::multiplexer::get_multiplex_options;
 use super::proc::Proc;
 
 pub struct Command {
@@ -57,24 +59,41 @@ impl Command {
     }
 
     pub fn on_host(&self, host: &str) -> Result<Self, SubprocessError> {
-        if host == "localhost" {
+        self.on_hop(&[host])
+    }
+
+    /// Wrap into ssh towards the last host of `chain`, which is reached via
+    /// the preceding hosts.
+    fn on_hop(&self, chain: &[&str]) -> Result<Self, SubprocessError> {
+        let host = chain.last().copied().unwrap_or(LOCALHOST);
+        if host == LOCALHOST {
             return Ok(self.clone());
         }
-        Self::new("ssh".to_string(), vec![host.to_string(), self.to_string()])
+        let mut arguments = get_multiplex_options(chain);
+        arguments.extend([host.to_string(), self.to_string()]);
+        Self::new("ssh".to_string(), arguments)
     }
 
     pub fn on_hosts(&self, route: &[&str]) -> Result<Self, SubprocessError> {
-        match route.len() {
-            0 => Ok(self.clone()),
-            1 => self.on_host(route[0]),
-            #[allow(clippy::missing_panics_doc)]
-            _ => self
-                .on_host(route.last().expect("infallible"))?
-                .on_hosts(&route[..route.len() - 1]),
+        self.on_hosts_from(&[], route)
+    }
+
+    /// Like `on_hosts`, for a command issued on the last host of `origin`.
+    fn on_hosts_from(&self, origin: &[&str], route: &[&str]) -> Result<Self, SubprocessError> {
+        let chain: Vec<&str> = origin.iter().chain(route).copied().collect();
+        let mut cmd = self.clone();
+        for idx in (origin.len()..chain.len()).rev() {
+            cmd = cmd.on_hop(&chain[..=idx])?;
         }
+        Ok(cmd)
     }
 
     pub fn on_route(&self, route: &Route) -> Result<Self, SubprocessError> {
+        self.on_route_from(route, &Route::from_localhost(None))
+    }
+
+    /// Like `on_route`, for a command issued at the end of `origin`.
+    pub fn on_route_from(&self, route: &Route, origin: &Route) -> Result<Self, SubprocessError> {
         let cmd = match route.get_user_ref() {
             Some(user) => &self.with_user(user)?,
             None => self,
@@ -83,7 +102,11 @@ impl Command {
             .get_hosts_iter()
             .map(std::string::String::as_str)
             .collect();
-        cmd.on_hosts(&hosts)
+        let origin: Vec<&str> = origin
+            .get_hosts_iter()
+            .map(std::string::String::as_str)
+            .collect();
+        cmd.on_hosts_from(&origin, &hosts)
     }
 }
 
@@ -21,9 +21,14 @@ enum Stage {
 }
 
 impl Stage {
-    fn render(&self) -> Result<String, SubprocessError> {
+    /// Render the stage as issued from the end of `origin`.
+    fn render(&self, origin: &Route) -> Result<String, SubprocessError> {
+        self.to_command(origin).map(|cmd| cmd.to_string())
+    }
+
+    fn to_command(&self, origin: &Route) -> Result<Command, SubprocessError> {
         match self {
-            Self::Single(cmd) => Ok(cmd.to_string()),
+            Self::Single(cmd) => Ok(cmd.clone()),
             Self::Group { route, commands } => {
                 debug_assert!(
                     !commands.is_empty(),
@@ -42,7 +47,7 @@ impl Stage {
                     let shell_cmd = format!("set -o pipefail; {pipe_str}");
                     Command::new("bash".to_string(), vec!["-c".to_string(), shell_cmd])?
                 };
-                cmd.on_route(route).map(|c| c.to_string())
+                cmd.on_route_from(route, origin)
             }
         }
     }
@@ -118,6 +123,20 @@ impl CommandChain {
         self
     }
 
+    /// A co-located group of commands on `location` as one routed command,
+    /// without a shell on the invoking host. Used by relays, which connect
+    /// the streams of such groups themselves.
+    pub fn group_to_command(
+        location: &Location,
+        commands: Vec<Command>,
+    ) -> Result<Command, SubprocessError> {
+        Stage::Group {
+            route: location.get_route_ref().clone(),
+            commands,
+        }
+        .to_command(&Route::from_localhost(None))
+    }
+
     pub fn with_entry_route(mut self, route: Route) -> Result<Self, SubprocessError> {
         if let Some(user) = route.get_user_ref() {
             return Err(SubprocessError::EntryRouteUser(user.to_string()));
@@ -127,8 +146,11 @@ impl CommandChain {
     }
 
     fn to_pipe_string(&self) -> Result<String, SubprocessError> {
-        let parts: Result<Vec<String>, SubprocessError> =
-            self.stages.iter().map(Stage::render).collect();
+        let parts: Result<Vec<String>, SubprocessError> = self
+            .stages
+            .iter()
+            .map(|stage| stage.render(&self.entry_route))
+            .collect();
         Ok(parts?.join(" | "))
     }
 
@@ -155,7 +177,7 @@ impl CommandChain {
         }
         let fg_str = self.to_pipe_string()?;
         let shell_cmd = if let Some(bg) = &self.background {
-            let bg_str = bg.render()?;
+            let bg_str = bg.render(&self.entry_route)?;
             // Start receiver in background, wait 1 s for nc to bind, run
             // sender, then wait for the background process to finish cleanly.
             format!("set -o pipefail; ({bg_str}) & BGPID=$!; sleep 1; {fg_str}; wait $BGPID")
@@ -6,6 +6,7 @@ use thiserror::Error as ThisError;
 
 #[derive(Debug)]
 pub enum Stream {
+    Stdin,
     Stdout,
     Stderr,
 }
@@ -14,6 +15,7 @@ impl Display for Stream {
     fn fmt(&self, f: &mut std::fmt::Formatter<'_>) -> std::fmt::Result {
         match self {
             Self::Stderr => write!(f, "stderr"),
+            Self::Stdin => write!(f, "stdin"),
             Self::Stdout => write!(f, "stdout"),
         }
     }
@@ -23,6 +25,10 @@ impl Display for Stream {
 pub enum SubprocessError {
     #[error("entry route does not support custom user, username '{0}' was provided")]
     EntryRouteUser(String),
+    #[error("failed to create directory for ssh control sockets: {path}")]
+    MultiplexDirectory { path: String, source: IoError },
+    #[error("failed to relay stream between subprocesses: {command}")]
+    Relay { command: String, source: IoError },
     #[error("failed to run subprocess: {command}")]
     Run { command: String, source: IoError },
     #[error("failed to spawn subprocess: {command}")]
@@ -1,11 +1,17 @@
+mod chunks;
 mod command;
 mod commandchain;
 mod errors;
+mod multiplexer;
 mod outcome;
 mod proc;
+mod relay;
 
+pub use chunks::chunk_arguments;
 pub use command::Command;
 pub use commandchain::CommandChain;
 pub use errors::SubprocessError;
+pub use multiplexer::MultiplexerGuard;
 pub use outcome::{Outcome, OutcomeSuccess};
 pub use proc::Proc;
+pub use relay::{Relay, RelayStatistics, get_rate};
@@ -0,0 +1,189 @@
+use std::collections::BTreeSet;
+use std::env;
+use std::fs::{DirBuilder, remove_dir_all};
+use std::os::unix::fs::DirBuilderExt;
+use std::path::PathBuf;
+use std::process;
+use std::sync::{Mutex, MutexGuard, PoisonError};
+use std::time::{SystemTime, UNIX_EPOCH};
+
+use tracing::debug;
+
+use crate::consts::{MULTIPLEX_PERSIST, NAME};
+
+use super::command::Command;
+use super::errors::SubprocessError;
+use super::outcome::OutcomeSuccess;
+
+static MULTIPLEXER: Mutex<Option<Multiplexer>> = Mutex::new(None);
+
+/// Run-scoped ssh connection sharing via `ControlMaster`.
+///
+/// The first connection to a hop becomes its master, all further ones reuse
+/// it. Sockets of hops reached from localhost live in a private directory,
+/// sockets of hops reached from remote hosts live in `~/.ssh` on the
+/// respective host, tagged with the id of this run.
+struct Multiplexer {
+    id: String,
+    directory: PathBuf,
+    chains: BTreeSet<Vec<String>>,
+    persist: u64, // seconds
+}
+
+impl Multiplexer {
+    fn lock() -> MutexGuard<'static, Option<Self>> {
+        MULTIPLEXER.lock().unwrap_or_else(PoisonError::into_inner)
+    }
+
+    /// Remember `chain` for stopping its master, return its control path
+    /// and the idle time after which the master exits.
+    fn register(&mut self, chain: &[&str]) -> (String, u64) {
+        self.chains
+            .insert(chain.iter().map(ToString::to_string).collect());
+        (self.get_control_path(chain.len() > 1), self.persist)
+    }
+
+    fn get_control_path(&self, remote: bool) -> String {
+        if remote {
+            format!("~/.ssh/{NAME}-{}-%C", self.id)
+        } else {
+            format!("{}/%C", self.directory.display())
+        }
+    }
+}
+
+/// ssh options for the last host of `chain`, reached via the preceding ones.
+/// Empty if multiplexing is not active.
+pub fn get_multiplex_options(chain: &[&str]) -> Vec<String> {
+    let Some((control_path, persist)) = Multiplexer::lock()
+        .as_mut()
+        .map(|multiplexer| multiplexer.register(chain))
+    else {
+        return Vec::new();
+    };
+    vec![
+        "-o".to_string(),
+        "ControlMaster=auto".to_string(),
+        "-o".to_string(),
+        format!("ControlPath={control_path}"),
+        "-o".to_string(),
+        format!("ControlPersist={persist}"),
+    ]
+}
+
+/// Keeps ssh connections multiplexed until dropped. Dropping it stops all
+/// masters opened during the run and removes the private socket directory.
+pub struct MultiplexerGuard {}
+
+impl MultiplexerGuard {
+    pub fn start() -> Result<Self, SubprocessError> {
+        Self::start_with_persist(MULTIPLEX_PERSIST)
+    }
+
+    /// Like `start`, but idle masters are kept for `persist` seconds, e.g.
+    /// for outlasting the pauses between the cycles of a daemon.
+    pub fn start_with_persist(persist: u64) -> Result<Self, SubprocessError> {
+        let nanos = SystemTime::now()
+            .duration_since(UNIX_EPOCH)
+            .map_or(0, |duration| duration.subsec_nanos());
+        let id = format!("{:x}-{nanos:x}", process::id());
+        let directory = env::temp_dir().join(format!("{NAME}-{id}"));
+        DirBuilder::new()
+            .mode(0o700)
+            .create(&directory)
+            .map_err(|e| SubprocessError::MultiplexDirectory {
+                path: directory.display().to_string(),
+                source: e,
+            })?;
+        debug!(multiplex = directory.display().to_string());
+        *Multiplexer::lock() = Some(Multiplexer {
+            id,
+            directory,
+            chains: BTreeSet::new(),
+            persist,
+        });
+        Ok(Self {})
+    }
+
+    fn stop_master(chain: &[String], control_path: &str) -> Result<(), SubprocessError> {
+        let (host, via) = chain
+            .split_last()
+            .expect("infallible: chains are not empty");
+        let via: Vec<&str> = via.iter().map(String::as_str).collect();
+        let outcome = Command::new(
+            "ssh".to_string(),
+            vec![
+                "-o".to_string(),
+                format!("ControlPath={control_path}"),
+                "-O".to_string(),
+                "exit".to_string(),
+                host.clone(),
+            ],
+        )?
+        .on_hosts(&via)?
+        .run()?
+        .communicate()?;
+        debug!(
+            multiplex_exit = chain.join("/"),
+            success = matches!(outcome.success(), OutcomeSuccess::Yes)
+        );
+        Ok(())
+    }
+}
+
+impl Drop for MultiplexerGuard {
+    fn drop(&mut self) {
+        let masters: Vec<(Vec<String>, String)> = Multiplexer::lock()
+            .as_ref()
+            .map(|multiplexer| {
+                multiplexer
+                    .chains
+                    .iter()
+                    .map(|chain| (chain.clone(), multiplexer.get_control_path(chain.len() > 1)))
+                    .collect()
+            })
+            .unwrap_or_default();
+        // Innermost hops first, their exit requests travel through the outer
+        // masters which are still up at this point.
+        for (chain, control_path) in masters.iter().rev() {
+            if let Err(e) = Self::stop_master(chain, control_path) {
+                debug!(multiplex_exit = chain.join("/"), error = e.to_string());
+            }
+        }
+        let multiplexer = Multiplexer::lock().take();
+        if let Some(multiplexer) = multiplexer {
+            let _ = remove_dir_all(&multiplexer.directory);
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::collections::BTreeSet;
+    use std::path::PathBuf;
+
+    use super::Multiplexer;
+
+    #[test]
+    fn control_paths() {
+        let mut multiplexer = Multiplexer {
+            id: "run".to_string(),
+            directory: PathBuf::from("/tmp/abgleich-run"),
+            chains: BTreeSet::new(),
+            persist: 60,
+        };
+        assert_eq!(
+            multiplexer.register(&["a"]),
+            ("/tmp/abgleich-run/%C".to_string(), 60)
+        );
+        assert_eq!(
+            multiplexer.register(&["a", "b"]),
+            ("~/.ssh/abgleich-run-%C".to_string(), 60)
+        );
+        assert_eq!(
+            multiplexer.register(&["a"]),
+            ("/tmp/abgleich-run/%C".to_string(), 60)
+        );
+        assert_eq!(multiplexer.chains.len(), 2);
+    }
+}
@@ -1,6 +1,7 @@
 use std::process::ExitStatus;
 
 use super::errors::{Stream, SubprocessError};
+use super::relay::RelayStatistics;
 
 pub enum OutcomeSuccess {
     Yes,
@@ -11,7 +12,9 @@ pub struct Outcome {
     stdout: Vec<u8>,
     stderr: Vec<u8>,
     status: ExitStatus,
-    meta: String, // only for error reporting
+    stopped: bool,                  // terminated on purpose, i.e. before completion
+    relay: Option<RelayStatistics>, // if streamed through a relay
+    meta: String,                   // only for error reporting
 }
 
 impl Outcome {
@@ -21,10 +24,62 @@ impl Outcome {
             stdout,
             stderr,
             status,
+            stopped: false,
+            relay: None,
             meta,
         }
     }
 
+    /// Combines the outcomes of all ends of a relay. Stdout of the receivers
+    /// and stderr of all are concatenated. The status of the sender wins if it
+    /// failed, the one of the first failed receiver otherwise.
+    #[must_use]
+    pub fn from_relay(
+        sender: Self,
+        receivers: Vec<Self>,
+        statistics: RelayStatistics,
+        meta: String,
+    ) -> Self {
+        let mut status = sender.status;
+        let mut stdout = Vec::new();
+        let mut stderr = sender.stderr;
+        for receiver in receivers {
+            if status.success() {
+                status = receiver.status;
+            }
+            stdout.extend(receiver.stdout);
+            stderr.extend(receiver.stderr);
+        }
+        Self {
+            stdout,
+            stderr,
+            status,
+            stopped: false,
+            relay: Some(statistics),
+            meta,
+        }
+    }
+
+    /// Marks the outcome as stopped on purpose after `stdout` was received,
+    /// which counts as success regardless of the exit status.
+    #[must_use]
+    pub fn into_stopped(mut self, stdout: Vec<u8>) -> Self {
+        self.stdout = stdout;
+        self.stopped = true;
+        self
+    }
+
+    #[must_use]
+    pub fn with_stdout(mut self, stdout: Vec<u8>) -> Self {
+        self.stdout = stdout;
+        self
+    }
+
+    #[must_use]
+    pub const fn get_relay_statistics(&self) -> Option<RelayStatistics> {
+        self.relay
+    }
+
     #[must_use]
     pub const fn get_exitstatus_ref(&self) -> &ExitStatus {
         &self.status
@@ -48,7 +103,7 @@ impl Outcome {
 
     #[must_use]
     pub fn success(&self) -> OutcomeSuccess {
-        if self.status.success() {
+        if self.stopped || self.status.success() {
             return OutcomeSuccess::Yes;
         }
         OutcomeSuccess::No(self.status.code().map_or_else(
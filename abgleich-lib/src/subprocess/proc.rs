@@ -1,6 +1,6 @@
 use std::ffi::OsStr;
-use std::io::Read;
-use std::process::{Child, Command as StdCommand, Stdio};
+use std::io::{BufRead, BufReader, Read};
+use std::process::{Child, ChildStdin, ChildStdout, Command as StdCommand, Stdio};
 
 use super::command::Command;
 use super::errors::{Stream, SubprocessError};
@@ -44,6 +44,39 @@ impl Proc {
         )?))
     }
 
+    /// Detaches stdout for consumption by the caller, e.g. a relay. The
+    /// outcome of `communicate` then carries no stdout.
+    pub fn take_stdout_pipe(&mut self) -> Result<ChildStdout, SubprocessError> {
+        self.stdout_taken = true;
+        self.child
+            .stdout
+            .take()
+            .ok_or_else(|| SubprocessError::StreamAttach {
+                command: self.meta.clone(),
+                stream: Stream::Stdout,
+            })
+    }
+
+    /// Detaches stdin, which is only available if the process was created
+    /// with a piped stdin. Dropping it signals end of input.
+    pub fn take_stdin_pipe(&mut self) -> Result<ChildStdin, SubprocessError> {
+        self.child
+            .stdin
+            .take()
+            .ok_or_else(|| SubprocessError::StreamAttach {
+                command: self.meta.clone(),
+                stream: Stream::Stdin,
+            })
+    }
+
+    /// Stops the process, e.g. because its peers could not be started, and
+    /// waits for it. Its outcome is of no interest.
+    pub fn abort(mut self) {
+        let _ = self.child.kill(); // may already be gone or not be ours to kill, e.g. sudo
+        self.stdout_taken = true;
+        let _ = self.communicate();
+    }
+
     pub fn communicate(mut self) -> Result<Outcome, SubprocessError> {
         let mut stdout_buffer: Vec<u8> = Vec::new();
         if !self.stdout_taken {
@@ -90,4 +123,206 @@ impl Proc {
             self.meta,
         ))
     }
+
+    /// Reads stdout line by line until the first non-empty line arrives and
+    /// then stops the process by closing its stdout and killing it. Remote
+    /// processes behind ssh terminate on the broken pipe. If the process ends
+    /// without producing such a line, this is equivalent to `communicate`.
+    pub fn communicate_first_line(mut self) -> Result<Outcome, SubprocessError> {
+        let child_stdout =
+            self.child
+                .stdout
+                .take()
+                .ok_or_else(|| SubprocessError::StreamAttach {
+                    command: self.meta.clone(),
+                    stream: Stream::Stdout,
+                })?;
+        let mut reader = BufReader::new(child_stdout);
+        let mut stdout_buffer: Vec<u8> = Vec::new();
+        loop {
+            let start = stdout_buffer.len();
+            let size = reader.read_until(b'\n', &mut stdout_buffer).map_err(|e| {
+                SubprocessError::StreamReadError {
+                    source: e,
+                    stream: Stream::Stdout,
+                    command: self.meta.clone(),
+                }
+            })?;
+            if size == 0 {
+                break; // eof, process ended without a change
+            }
+            if !stdout_buffer[start..].trim_ascii().is_empty() {
+                drop(reader);
+                let _ = self.child.kill(); // may already be gone or not be ours to kill, e.g. sudo
+                self.stdout_taken = true;
+                return self
+                    .communicate()
+                    .map(|outcome| outcome.into_stopped(stdout_buffer));
+            }
+        }
+        self.stdout_taken = true;
+        self.communicate()
+            .map(|outcome| outcome.with_stdout(stdout_buffer))
+    }
+
+    /// Hands stdout line by line to `on_line` while the process is running,
+    /// without accumulating it. If `on_line` returns `false`, the process is
+    /// stopped like in `communicate_first_line`. The outcome carries no stdout.
+    pub fn communicate_lines(
+        mut self,
+        mut on_line: impl FnMut(&str) -> bool,
+    ) -> Result<Outcome, SubprocessError> {
+        let child_stdout =
+            self.child
+                .stdout
+                .take()
+                .ok_or_else(|| SubprocessError::StreamAttach {
+                    command: self.meta.clone(),
+                    stream: Stream::Stdout,
+                })?;
+        let mut reader = BufReader::new(child_stdout);
+        let mut line: Vec<u8> = Vec::new();
+        let mut stopped = false;
+        let failure = loop {
+            line.clear();
+            let size = match reader.read_until(b'\n', &mut line) {
+                Ok(size) => size,
+                Err(e) => {
+                    break Some(SubprocessError::StreamReadError {
+                        source: e,
+                        stream: Stream::Stdout,
+                        command: self.meta.clone(),
+                    });
+                }
+            };
+            if size == 0 {
+                break None;
+            }
+            let decoded = match str::from_utf8(&line) {
+                Ok(decoded) => decoded,
+                Err(e) => {
+                    break Some(SubprocessError::StreamDecoding {
+                        command: self.meta.clone(),
+                        source: e,
+                        stream: Stream::Stdout,
+                    });
+                }
+            };
+            if !on_line(decoded) {
+                stopped = true;
+                break None;
+            }
+        };
+        drop(reader);
+        if stopped || failure.is_some() {
+            let _ = self.child.kill(); // may already be gone or not be ours to kill, e.g. sudo
+        }
+        self.stdout_taken = true;
+        let outcome = self.communicate();
+        failure.map_or(outcome, Err)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::time::{Duration, Instant};
+
+    use super::super::command::Command;
+    use super::super::errors::SubprocessError;
+    use super::super::outcome::OutcomeSuccess;
+
+    fn cmd(program: &str, args: &[&str]) -> Command {
+        Command::new(
+            program.to_string(),
+            args.iter().map(|s| s.to_string()).collect(),
+        )
+        .unwrap()
+    }
+
+    #[test]
+    fn first_line_stops_endless_output() {
+        let outcome = cmd("yes", &["changed"])
+            .run()
+            .unwrap()
+            .communicate_first_line()
+            .unwrap();
+        assert!(matches!(outcome.success(), OutcomeSuccess::Yes));
+        assert_eq!(outcome.stdout_as_str_ref().unwrap(), "changed\n");
+    }
+
+    #[test]
+    fn first_line_skips_blank_lines() {
+        let outcome = cmd("sh", &["-c", "echo; echo ' '; echo changed; echo more"])
+            .run()
+            .unwrap()
+            .communicate_first_line()
+            .unwrap();
+        assert!(matches!(outcome.success(), OutcomeSuccess::Yes));
+        assert!(outcome.stdout_as_str_ref().unwrap().ends_with("changed\n"));
+    }
+
+    #[test]
+    fn first_line_without_output() {
+        let outcome = cmd("true", &[])
+            .run()
+            .unwrap()
+            .communicate_first_line()
+            .unwrap();
+        assert!(matches!(outcome.success(), OutcomeSuccess::Yes));
+        assert_eq!(outcome.stdout_as_str_ref().unwrap(), "");
+    }
+
+    #[test]
+    fn lines_are_streamed() {
+        let mut lines = Vec::new();
+        let outcome = cmd("printf", &["a\\nb\\nc"])
+            .run()
+            .unwrap()
+            .communicate_lines(|line| {
+                lines.push(line.to_string());
+                true
+            })
+            .unwrap();
+        assert!(matches!(outcome.success(), OutcomeSuccess::Yes));
+        assert_eq!(lines, vec!["a\n", "b\n", "c"]);
+        assert_eq!(outcome.stdout_as_str_ref().unwrap(), "");
+    }
+
+    #[test]
+    fn lines_can_be_aborted() {
+        let mut count = 0;
+        let _ = cmd("yes", &[])
+            .run()
+            .unwrap()
+            .communicate_lines(|_| {
+                count += 1;
+                count < 3
+            })
+            .unwrap();
+        assert_eq!(count, 3);
+    }
+
+    #[test]
+    fn lines_stop_on_undecodable_output() {
+        let start = Instant::now();
+        let result = cmd("sh", &["-c", "printf 'a\\n\\377\\n'; exec sleep 60"])
+            .run()
+            .unwrap()
+            .communicate_lines(|_| true);
+        assert!(matches!(
+            result,
+            Err(SubprocessError::StreamDecoding { .. })
+        ));
+        assert!(start.elapsed() < Duration::from_secs(30));
+    }
+
+    #[test]
+    fn first_line_failure_without_output() {
+        let outcome = cmd("sh", &["-c", "exit 3"])
+            .run()
+            .unwrap()
+            .communicate_first_line()
+            .unwrap();
+        assert!(matches!(outcome.success(), OutcomeSuccess::No(_)));
+    }
 }
@@ -0,0 +1,559 @@
+use std::io::{self, ErrorKind, Read, Write};
+use std::panic;
+use std::process::{ChildStdin, ChildStdout, Stdio};
+use std::string::ToString;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::sync::mpsc::{self, Receiver};
+use std::thread;
+use std::time::{Duration, Instant};
+
+use tracing::debug;
+
+use crate::consts::{RELAY_CHUNK_SIZE, RELAY_REPORT_INTERVAL};
+
+use super::command::Command;
+use super::errors::SubprocessError;
+use super::outcome::Outcome;
+use super::proc::Proc;
+
+/// Two or more processes, typically reached via ssh, whose streams are
+/// connected by abgleich itself instead of a shell pipe on the invoking host.
+///
+/// Data is moved with `io::copy`, which uses `splice(2)` between pipes on Linux, or,
+/// if rate limited, buffered or fanned out to several receivers, in chunks
+/// handled in-process.
+pub struct Relay {
+    sender: Command,
+    receivers: Vec<Command>,
+    rate_limit: Option<u64>,
+    buffer: Option<usize>,
+}
+
+impl Relay {
+    #[must_use]
+    pub fn new(sender: Command, receiver: Command) -> Self {
+        Self {
+            sender,
+            receivers: vec![receiver],
+            rate_limit: None,
+            buffer: None,
+        }
+    }
+
+    /// Further receivers, each getting a copy of the stream. A receiver
+    /// failing stops the entire relay.
+    pub fn push_receivers(&mut self, receivers: Vec<Command>) {
+        self.receivers.extend(receivers);
+    }
+
+    #[must_use]
+    pub fn into_receivers(self) -> Vec<Command> {
+        self.receivers
+    }
+
+    /// Bytes per second.
+    #[must_use]
+    pub const fn with_rate_limit(mut self, value: Option<u64>) -> Self {
+        self.rate_limit = value;
+        self
+    }
+
+    /// Bytes held between reading from the sender and writing to the
+    /// receiver, so that neither has to wait for the other on bursts.
+    #[must_use]
+    pub const fn with_buffer(mut self, value: Option<usize>) -> Self {
+        self.buffer = value;
+        self
+    }
+
+    pub fn run(&self) -> Result<Outcome, SubprocessError> {
+        let meta = self.to_string();
+        let mut sender = Proc::from_command(&self.sender, None)?;
+        let mut receivers = Vec::with_capacity(self.receivers.len());
+        let pipes = self
+            .receivers
+            .iter()
+            .try_for_each(|receiver| {
+                receivers.push(Proc::from_command(receiver, Some(Stdio::piped()))?);
+                Ok(())
+            })
+            .and_then(|()| {
+                Ok((
+                    sender.take_stdout_pipe()?,
+                    receivers
+                        .iter_mut()
+                        .map(Proc::take_stdin_pipe)
+                        .collect::<Result<Vec<ChildStdin>, SubprocessError>>()?,
+                ))
+            });
+        let (mut source, mut sinks) = match pipes {
+            Ok(pipes) => pipes,
+            Err(e) => {
+                // Processes already started must not outlive the relay.
+                sender.abort();
+                receivers.into_iter().for_each(Proc::abort);
+                return Err(e);
+            }
+        };
+        let mut meter = Meter::new();
+        let (copied, sender, receivers) = thread::scope(|scope| {
+            let sender = scope.spawn(|| sender.communicate());
+            #[expect(
+                clippy::needless_collect,
+                reason = "spawn all receivers before joining"
+            )]
+            let receivers: Vec<_> = receivers
+                .into_iter()
+                .map(|receiver| scope.spawn(|| receiver.communicate()))
+                .collect();
+            let copied = self.copy(&mut meter, &mut source, &mut sinks);
+            // End of input for the receivers, broken pipe for the sender.
+            drop(source);
+            drop(sinks);
+            let join = |handle: thread::ScopedJoinHandle<'_, Result<Outcome, SubprocessError>>| {
+                handle
+                    .join()
+                    .unwrap_or_else(|err| panic::resume_unwind(err))
+            };
+            (
+                copied,
+                join(sender),
+                receivers.into_iter().map(join).collect::<Vec<_>>(),
+            )
+        });
+        let transferred = match copied {
+            Ok(transferred) => transferred,
+            // One end went away, its exit status tells why.
+            Err((transferred, e)) if e.kind() == ErrorKind::BrokenPipe => transferred,
+            Err((_, e)) => {
+                return Err(SubprocessError::Relay {
+                    command: meta,
+                    source: e,
+                });
+            }
+        };
+        let statistics = meter.finish(transferred);
+        debug!(
+            relay = meta,
+            bytes = statistics.bytes,
+            peak_rate = statistics.peak_rate
+        );
+        Ok(Outcome::from_relay(
+            sender?,
+            receivers
+                .into_iter()
+                .collect::<Result<Vec<Outcome>, SubprocessError>>()?,
+            statistics,
+            meta,
+        ))
+    }
+
+    /// Returns the number of bytes moved, also alongside an error.
+    fn copy(
+        &self,
+        meter: &mut Meter,
+        source: &mut ChildStdout,
+        sinks: &mut [ChildStdin],
+    ) -> Result<u64, (u64, io::Error)> {
+        let throttle = Throttle::new(self.rate_limit);
+        if let Some(capacity) = self.buffer {
+            return Self::copy_buffered(&throttle, meter, capacity, source, sinks);
+        }
+        if throttle.rate.is_none()
+            && let [sink] = sinks
+        {
+            return Self::copy_spliced(meter, source, sink);
+        }
+        let mut buffer = vec![0; throttle.get_chunk_size()];
+        let mut transferred: u64 = 0;
+        loop {
+            let size = match source.read(&mut buffer) {
+                Ok(0) => return Ok(transferred),
+                Ok(size) => size,
+                Err(e) if e.kind() == ErrorKind::Interrupted => continue,
+                Err(e) => return Err((transferred, e)),
+            };
+            Self::write_all(sinks, &buffer[..size]).map_err(|e| (transferred, e))?;
+            transferred += size as u64;
+            meter.sample(transferred);
+            throttle.pace(transferred);
+        }
+    }
+
+    /// Writes `data` to every sink, one after the other.
+    fn write_all(sinks: &mut [ChildStdin], data: &[u8]) -> io::Result<()> {
+        for sink in sinks {
+            sink.write_all(data)?;
+        }
+        Ok(())
+    }
+
+    /// `io::copy` in slices of `RELAY_CHUNK_SIZE`, which keeps `splice(2)`
+    /// while the meter gets to see the stream every now and then.
+    fn copy_spliced(
+        meter: &mut Meter,
+        source: &mut ChildStdout,
+        sink: &mut ChildStdin,
+    ) -> Result<u64, (u64, io::Error)> {
+        let mut transferred: u64 = 0;
+        loop {
+            match io::copy(&mut (&mut *source).take(RELAY_CHUNK_SIZE as u64), sink) {
+                Ok(0) => return Ok(transferred),
+                Ok(size) => transferred += size,
+                Err(e) if e.kind() == ErrorKind::Interrupted => {}
+                Err(e) => return Err((transferred, e)),
+            }
+            meter.sample(transferred);
+        }
+    }
+
+    /// Decouples reading from writing through a queue of chunks holding up
+    /// to `capacity` bytes, filled by a thread of its own.
+    fn copy_buffered(
+        throttle: &Throttle,
+        meter: &mut Meter,
+        capacity: usize,
+        source: &mut ChildStdout,
+        sinks: &mut [ChildStdin],
+    ) -> Result<u64, (u64, io::Error)> {
+        let chunk_size = throttle.get_chunk_size().min(capacity).max(1);
+        let (sender, receiver) = mpsc::sync_channel::<Vec<u8>>((capacity / chunk_size).max(1));
+        let fill = &AtomicUsize::new(0);
+        thread::scope(|scope| {
+            let reader = scope.spawn(move || -> io::Result<()> {
+                loop {
+                    let mut chunk = vec![0; chunk_size];
+                    let size = Self::read_chunk(source, &mut chunk)?;
+                    if size == 0 {
+                        return Ok(());
+                    }
+                    chunk.truncate(size);
+                    fill.fetch_add(size, Ordering::Relaxed);
+                    if sender.send(chunk).is_err() {
+                        return Ok(()); // writer gave up, its error is reported
+                    }
+                }
+            });
+            let written = Self::write_chunks(throttle, meter, capacity, receiver, sinks, fill);
+            let read = reader
+                .join()
+                .unwrap_or_else(|err| panic::resume_unwind(err));
+            match (written, read) {
+                (Err(error), _) => Err(error),
+                (Ok(transferred), Err(e)) => Err((transferred, e)),
+                (Ok(transferred), Ok(())) => Ok(transferred),
+            }
+        })
+    }
+
+    /// Fills `chunk` completely unless the end of the stream comes first.
+    fn read_chunk(source: &mut ChildStdout, chunk: &mut [u8]) -> io::Result<usize> {
+        let mut filled = 0;
+        while filled < chunk.len() {
+            match source.read(&mut chunk[filled..]) {
+                Ok(0) => break,
+                Ok(size) => filled += size,
+                Err(e) if e.kind() == ErrorKind::Interrupted => {}
+                Err(e) => return Err(e),
+            }
+        }
+        Ok(filled)
+    }
+
+    /// Drains the queue into `sinks`, reporting its fill level periodically.
+    fn write_chunks(
+        throttle: &Throttle,
+        meter: &mut Meter,
+        capacity: usize,
+        receiver: Receiver<Vec<u8>>,
+        sinks: &mut [ChildStdin],
+        fill: &AtomicUsize,
+    ) -> Result<u64, (u64, io::Error)> {
+        let interval = Duration::from_secs(RELAY_REPORT_INTERVAL);
+        let mut report = Instant::now();
+        let mut peak: usize = 0;
+        let mut transferred: u64 = 0;
+        for chunk in receiver {
+            let level = fill.fetch_sub(chunk.len(), Ordering::Relaxed);
+            peak = peak.max(level);
+            if report.elapsed() >= interval {
+                debug!(relay_buffer = level, relay_buffer_capacity = capacity);
+                report = Instant::now();
+            }
+            Self::write_all(sinks, &chunk).map_err(|e| (transferred, e))?;
+            transferred += chunk.len() as u64;
+            meter.sample(transferred);
+            throttle.pace(transferred);
+        }
+        debug!(relay_buffer_peak = peak, relay_buffer_capacity = capacity);
+        Ok(transferred)
+    }
+}
+
+/// Bytes moved by a relay and the highest rate, in bytes per second, seen
+/// over any report interval. Streams shorter than one interval report their
+/// average rate as peak.
+#[derive(Clone, Copy, Debug, Eq, PartialEq)]
+pub struct RelayStatistics {
+    pub bytes: u64,
+    pub peak_rate: u64,
+}
+
+/// Samples the rate of a stream once per `RELAY_REPORT_INTERVAL`.
+struct Meter {
+    start: Instant,
+    window: Instant,
+    window_bytes: u64, // transferred at the beginning of the window
+    peak_rate: u64,
+}
+
+impl Meter {
+    fn new() -> Self {
+        let start = Instant::now();
+        Self {
+            start,
+            window: start,
+            window_bytes: 0,
+            peak_rate: 0,
+        }
+    }
+
+    fn sample(&mut self, transferred: u64) {
+        let elapsed = self.window.elapsed();
+        if elapsed < Duration::from_secs(RELAY_REPORT_INTERVAL) {
+            return;
+        }
+        self.peak_rate = self
+            .peak_rate
+            .max(get_rate(transferred - self.window_bytes, elapsed));
+        self.window = Instant::now();
+        self.window_bytes = transferred;
+    }
+
+    fn finish(&self, transferred: u64) -> RelayStatistics {
+        RelayStatistics {
+            bytes: transferred,
+            peak_rate: if self.window == self.start {
+                get_rate(transferred, self.start.elapsed())
+            } else {
+                self.peak_rate
+            },
+        }
+    }
+}
+
+/// Bytes per second, zero for an empty interval.
+#[must_use]
+pub fn get_rate(bytes: u64, elapsed: Duration) -> u64 {
+    match elapsed.as_nanos() {
+        0 => 0,
+        nanos => u64::try_from(u128::from(bytes) * 1_000_000_000 / nanos).unwrap_or(u64::MAX),
+    }
+}
+
+/// Paces a stream to a rate in bytes per second, if any.
+struct Throttle {
+    rate: Option<u64>,
+    start: Instant,
+}
+
+impl Throttle {
+    fn new(rate: Option<u64>) -> Self {
+        Self {
+            rate: rate.filter(|rate| *rate > 0),
+            start: Instant::now(),
+        }
+    }
+
+    /// Chunks of at most a tenth of a second keep a limited rate smooth.
+    fn get_chunk_size(&self) -> usize {
+        self.rate.map_or(RELAY_CHUNK_SIZE, |rate| {
+            usize::try_from(rate / 10)
+                .unwrap_or(usize::MAX)
+                .clamp(4_096, RELAY_CHUNK_SIZE)
+        })
+    }
+
+    /// Sleeps until `transferred` bytes are due.
+    fn pace(&self, transferred: u64) {
+        let Some(rate) = self.rate else {
+            return;
+        };
+        let due = Duration::from_nanos(
+            u64::try_from(u128::from(transferred) * 1_000_000_000 / u128::from(rate))
+                .unwrap_or(u64::MAX),
+        );
+        if let Some(ahead) = due.checked_sub(self.start.elapsed()) {
+            thread::sleep(ahead);
+        }
+    }
+}
+
+#[allow(clippy::to_string_trait_impl)]
+impl ToString for Relay {
+    fn to_string(&self) -> String {
+        let receivers: Vec<String> = self.receivers.iter().map(ToString::to_string).collect();
+        format!("{} | {}", self.sender.to_string(), receivers.join(" & "))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::env;
+    use std::process;
+    use std::thread;
+    use std::time::{Duration, Instant};
+
+    use super::super::command::Command;
+    use super::super::outcome::OutcomeSuccess;
+    use super::{Meter, Relay, get_rate};
+
+    fn cmd(program: &str, args: &[&str]) -> Command {
+        Command::new(
+            program.to_string(),
+            args.iter().map(|s| s.to_string()).collect(),
+        )
+        .unwrap()
+    }
+
+    #[test]
+    fn relays_stream() {
+        let outcome = Relay::new(
+            cmd("head", &["-c", "1000000", "/dev/zero"]),
+            cmd("wc", &["-c"]),
+        )
+        .run()
+        .unwrap();
+        assert!(matches!(outcome.success(), OutcomeSuccess::Yes));
+        assert_eq!(
+            outcome.get_relay_statistics().map(|s| s.bytes),
+            Some(1_000_000)
+        );
+        assert_eq!(outcome.stdout_as_str_ref().unwrap().trim(), "1000000");
+    }
+
+    #[test]
+    fn rate_limit() {
+        let start = Instant::now();
+        let outcome = Relay::new(
+            cmd("head", &["-c", "300000", "/dev/zero"]),
+            cmd("wc", &["-c"]),
+        )
+        .with_rate_limit(Some(1_000_000))
+        .run()
+        .unwrap();
+        assert!(start.elapsed().as_millis() >= 250);
+        assert_eq!(
+            outcome.get_relay_statistics().map(|s| s.bytes),
+            Some(300_000)
+        );
+    }
+
+    #[test]
+    fn rates() {
+        assert_eq!(get_rate(1_000, Duration::from_millis(500)), 2_000);
+        assert_eq!(get_rate(1_000, Duration::ZERO), 0);
+        let mut meter = Meter::new();
+        meter.window -= Duration::from_secs(2);
+        meter.sample(4_000);
+        meter.window -= Duration::from_secs(1);
+        meter.sample(5_000);
+        let statistics = meter.finish(5_000);
+        assert_eq!(statistics.bytes, 5_000);
+        assert!((1_900..=2_000).contains(&statistics.peak_rate));
+    }
+
+    #[test]
+    fn fan_out() {
+        for buffer in [None, Some(100_000)] {
+            let mut relay = Relay::new(
+                cmd("head", &["-c", "1000000", "/dev/zero"]),
+                cmd("wc", &["-c"]),
+            )
+            .with_buffer(buffer);
+            relay.push_receivers(vec![cmd("wc", &["-c"])]);
+            let outcome = relay.run().unwrap();
+            assert!(matches!(outcome.success(), OutcomeSuccess::Yes));
+            assert_eq!(
+                outcome.get_relay_statistics().map(|s| s.bytes),
+                Some(1_000_000)
+            );
+            assert_eq!(
+                outcome
+                    .stdout_as_str_ref()
+                    .unwrap()
+                    .split_whitespace()
+                    .collect::<Vec<_>>(),
+                vec!["1000000", "1000000"]
+            );
+        }
+    }
+
+    #[test]
+    fn buffered() {
+        let outcome = Relay::new(
+            cmd("head", &["-c", "3000000", "/dev/zero"]),
+            cmd("wc", &["-c"]),
+        )
+        .with_buffer(Some(100_000))
+        .with_rate_limit(Some(30_000_000))
+        .run()
+        .unwrap();
+        assert!(matches!(outcome.success(), OutcomeSuccess::Yes));
+        assert_eq!(
+            outcome.get_relay_statistics().map(|s| s.bytes),
+            Some(3_000_000)
+        );
+        assert_eq!(outcome.stdout_as_str_ref().unwrap().trim(), "3000000");
+    }
+
+    #[test]
+    fn buffered_receiver_failure() {
+        let outcome = Relay::new(
+            cmd("yes", &[]),
+            cmd("sh", &["-c", "head -c 10 > /dev/null; exit 3"]),
+        )
+        .with_buffer(Some(1_000_000))
+        .run()
+        .unwrap();
+        assert!(matches!(outcome.success(), OutcomeSuccess::No(_)));
+    }
+
+    #[test]
+    fn receiver_failure() {
+        let outcome = Relay::new(
+            cmd("yes", &[]),
+            cmd("sh", &["-c", "head -c 10 > /dev/null; exit 3"]),
+        )
+        .run()
+        .unwrap();
+        assert!(matches!(outcome.success(), OutcomeSuccess::No(_)));
+    }
+
+    #[test]
+    fn sender_failure() {
+        let outcome = Relay::new(cmd("sh", &["-c", "echo partial; exit 2"]), cmd("cat", &[]))
+            .run()
+            .unwrap();
+        match outcome.success() {
+            OutcomeSuccess::No(reason) => assert_eq!(reason, "exited with code 2"),
+            OutcomeSuccess::Yes => panic!("sender failure not reported"),
+        }
+    }
+
+    #[test]
+    fn receiver_spawn_failure() {
+        let marker = env::temp_dir().join(format!("abgleich-relay-{}", process::id()));
+        let mut relay = Relay::new(
+            cmd(
+                "sh",
+                &["-c", &format!("sleep 0.2; touch {}", marker.display())],
+            ),
+            cmd("cat", &[]),
+        );
+        relay.push_receivers(vec![cmd("abgleich-missing-receiver", &[])]);
+        assert!(relay.run().is_err());
+        thread::sleep(Duration::from_millis(500));
+        assert!(!marker.exists(), "sender outlived the failed relay");
+    }
+}
@@ -0,0 +1,17 @@
+use std::env::home_dir;
+use std::path::PathBuf;
+
+use crate::consts::{NAME, VAR_XDG_CACHE_HOME};
+
+use super::env::envvar2string;
+
+/// Directory for files kept between runs, `$XDG_CACHE_HOME/abgleich` or
+/// `~/.cache/abgleich`. Not created here.
+#[must_use]
+pub fn get_cache_dir() -> Option<PathBuf> {
+    envvar2string(VAR_XDG_CACHE_HOME)
+        .filter(|path| !path.is_empty())
+        .map(PathBuf::from)
+        .or_else(|| home_dir().map(|home| home.join(".cache")))
+        .map(|path| path.join(NAME))
+}
@@ -1,9 +1,13 @@
+mod cache;
 mod env;
 mod errors;
 mod log;
+mod parallel;
 
+pub use cache::get_cache_dir;
 pub use env::{
     envvar2bool, envvar2bool_or, envvar2string, envvar2string_or, envvar2type, envvar2type_or,
 };
 pub use errors::SysError;
 pub use log::get_loglevel;
+pub use parallel::parallel_map;
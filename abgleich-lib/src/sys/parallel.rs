@@ -0,0 +1,71 @@
+use std::panic;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::thread;
+
+/// Applies `func` to all `items` on up to `workers` scoped threads.
+///
+/// Results are returned in order of `items`, i.e. identical to
+/// `items.iter().map(func).collect()`. A single worker (or a single item)
+/// runs on the calling thread.
+pub fn parallel_map<T, R, F>(items: &[T], workers: usize, func: F) -> Vec<R>
+where
+    T: Sync,
+    R: Send,
+    F: Fn(&T) -> R + Sync,
+{
+    let workers = workers.clamp(1, items.len().max(1));
+    if workers == 1 {
+        return items.iter().map(func).collect();
+    }
+    let next = AtomicUsize::new(0);
+    let mut results: Vec<Option<R>> = Vec::with_capacity(items.len());
+    results.resize_with(items.len(), || None);
+    thread::scope(|scope| {
+        let handles: Vec<_> = (0..workers)
+            .map(|_| {
+                scope.spawn(|| {
+                    let mut done = Vec::new();
+                    loop {
+                        let index = next.fetch_add(1, Ordering::Relaxed);
+                        if index >= items.len() {
+                            return done;
+                        }
+                        done.push((index, func(&items[index])));
+                    }
+                })
+            })
+            .collect();
+        for handle in handles {
+            for (index, result) in handle
+                .join()
+                .unwrap_or_else(|err| panic::resume_unwind(err))
+            {
+                results[index] = Some(result);
+            }
+        }
+    });
+    results.into_iter().flatten().collect()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::parallel_map;
+
+    #[test]
+    fn keeps_order() {
+        let items: Vec<u64> = (0..100).collect();
+        let results = parallel_map(&items, 7, |item| item * 2);
+        assert_eq!(results, (0..100).map(|item| item * 2).collect::<Vec<_>>());
+    }
+
+    #[test]
+    fn single_worker() {
+        assert_eq!(parallel_map(&[1, 2, 3], 1, |item| item + 1), vec![2, 3, 4]);
+    }
+
+    #[test]
+    fn empty() {
+        let items: Vec<u8> = Vec::new();
+        assert!(parallel_map(&items, 4, |item| *item).is_empty());
+    }
+}
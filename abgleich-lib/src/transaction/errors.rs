@@ -29,6 +29,8 @@ pub enum TransactionCliError {
 
 #[derive(ThisError, Debug)]
 pub enum TransactionRunError {
+    #[error("transaction build subsystem error")]
+    Build(#[source] TransactionBuildError),
     #[error("transaction failed, {reason}: {description}")]
     Failed { reason: String, description: String },
     #[error("{0} transaction(s) failed")]
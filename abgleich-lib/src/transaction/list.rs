@@ -1,21 +1,29 @@
+use std::panic;
+use std::thread;
+
 #[cfg(feature = "cli")]
 use inquire::Confirm;
 use serde_json::json;
-use tracing::error;
 
+use crate::config::{Concurrency, Location};
 #[cfg(feature = "cli")]
 use crate::config::{Confirmation, OutputFmt};
-use crate::output::{Alignment, Table, TableColumn};
-use crate::traits::Traverse;
+use crate::output::{Alignment, Table, TableColumn, colorized_storage_si_suffix};
+use crate::subprocess::chunk_arguments;
+
+use super::basebuilder::BaseBuilder;
 
 #[cfg(feature = "cli")]
 use super::errors::TransactionCliError;
 use super::errors::TransactionRunError;
 use super::force::Force;
+use super::schedule::Schedule;
 use super::transaction::Transaction;
+use super::variants::EstimateBuilder;
 
 pub struct TransactionList {
     transactions: Vec<Transaction>,
+    estimates: Option<Vec<Option<u64>>>, // stream sizes in bytes, by transaction
 }
 
 impl Default for TransactionList {
@@ -29,6 +37,7 @@ impl TransactionList {
     pub const fn new() -> Self {
         Self {
             transactions: Vec::new(),
+            estimates: None,
         }
     }
 
@@ -36,52 +45,142 @@ impl TransactionList {
         self.transactions.append(&mut transactions.transactions);
     }
 
+    /// Merges the lists of several targets of the same source. Transfers of
+    /// identical streams share a single `zfs send`, see `Transaction::share`.
+    /// The transactions of each target keep their order relative to each
+    /// other, so that the merged list still is a valid serial order.
+    #[must_use]
+    pub fn from_fan_out(lists: Vec<Self>) -> Self {
+        let mut transactions: Vec<Transaction> = Vec::new();
+        for list in lists {
+            let mut floor = 0; // first position after the last transaction of this target
+            for transaction in list.transactions {
+                let mut pending = Some(transaction);
+                for (offset, other) in transactions[floor..].iter_mut().enumerate() {
+                    let Some(transaction) = pending.take() else {
+                        break;
+                    };
+                    pending = other.share(transaction);
+                    if pending.is_none() {
+                        floor += offset + 1;
+                    }
+                }
+                if let Some(transaction) = pending {
+                    transactions.insert(floor, transaction);
+                    floor += 1;
+                }
+            }
+        }
+        Self {
+            transactions,
+            estimates: None,
+        }
+    }
+
+    pub fn iter(&self) -> impl Iterator<Item = &Transaction> {
+        self.transactions.iter()
+    }
+
     pub fn push(&mut self, transaction: Transaction) {
         self.transactions.push(transaction);
     }
 
-    // "assert_success", based on non-zero exit-code or signal termination,
-    // raises "transaction fail", optionally ignored with normal force.
-    // In "transaction.run", before and after, lower-level sub-process errors
-    // can occur, handled with full force if required.
-    pub fn run(&self, force: &Force) -> Result<(), TransactionRunError> {
-        let mut failures = 0usize;
-        for transaction in &self.transactions {
-            let outcome = match transaction.run() {
-                Ok(outcome) => outcome,
-                Err(err) => {
-                    if *force == Force::Full {
-                        error!(
-                            msg = "ignoring error with full force",
-                            traceback = err.traverse()
-                        );
-                        failures += 1;
-                        continue;
-                    }
-                    return Err(err);
-                }
+    /// Estimates the size of the stream of every transfer with dry runs of
+    /// `zfs send`. Dry runs are batched into one shell per source host, or a
+    /// few if arguments get too long, and all batches run in parallel.
+    /// Transfers whose dry run fails remain without estimate.
+    pub fn estimate(&mut self) -> Result<(), TransactionRunError> {
+        let mut batches: Vec<(&Location, Vec<usize>)> = Vec::new();
+        for (index, transaction) in self.transactions.iter().enumerate() {
+            let Some((location, _)) = transaction.get_send_ref() else {
+                continue;
             };
-            match outcome.assert_success() {
-                Ok(()) => {}
-                Err(TransactionRunError::Failed {
-                    reason: _,
-                    description: _,
-                }) if *force != Force::No => failures += 1, // logged by transaction already
-                Err(err) => return Err(err),
+            match batches
+                .iter_mut()
+                .find(|(other, _)| other.get_route_ref() == location.get_route_ref())
+            {
+                Some((_, indices)) => indices.push(index),
+                None => batches.push((location, vec![index])),
+            }
+        }
+        let mut jobs: Vec<(Vec<usize>, Transaction)> = Vec::new();
+        for (location, indices) in batches {
+            for chunk in chunk_arguments(indices, |index| {
+                EstimateBuilder::get_argument_length(self.get_send_args(*index))
+            }) {
+                let sends = chunk
+                    .iter()
+                    .map(|index| self.get_send_args(*index).to_vec())
+                    .collect();
+                let transaction = EstimateBuilder::new(location, sends)
+                    .build()
+                    .map_err(TransactionRunError::Build)?;
+                jobs.push((chunk, transaction));
             }
         }
-        if failures > 0 {
-            return Err(TransactionRunError::SomeFailed(failures));
+        let sizes = thread::scope(|scope| {
+            #[expect(clippy::needless_collect, reason = "spawn all batches before joining")]
+            let handles: Vec<_> = jobs
+                .iter()
+                .map(|(indices, transaction)| {
+                    scope.spawn(move || {
+                        transaction.run().map(|outcome| {
+                            EstimateBuilder::parse(
+                                outcome.get_data_ref().unwrap_or_default(),
+                                indices.len(),
+                            )
+                        })
+                    })
+                })
+                .collect();
+            handles
+                .into_iter()
+                .map(|handle| {
+                    handle
+                        .join()
+                        .unwrap_or_else(|err| panic::resume_unwind(err))
+                })
+                .collect::<Result<Vec<Vec<Option<u64>>>, TransactionRunError>>()
+        })?;
+        let mut estimates = vec![None; self.transactions.len()];
+        for ((indices, _), sizes) in jobs.iter().zip(sizes) {
+            for (index, size) in indices.iter().zip(sizes) {
+                estimates[*index] = size;
+            }
         }
+        self.estimates = Some(estimates);
         Ok(())
     }
 
+    fn get_send_args(&self, index: usize) -> &[String] {
+        self.transactions[index]
+            .get_send_ref()
+            .map_or(&[], |(_, arguments)| arguments)
+    }
+
+    /// Sum of all known estimates, if estimated.
+    #[must_use]
+    pub fn get_estimate_total(&self) -> Option<u64> {
+        self.estimates
+            .as_ref()
+            .map(|estimates| estimates.iter().flatten().sum())
+    }
+
+    pub fn run(&self, force: &Force, concurrency: &Concurrency) -> Result<(), TransactionRunError> {
+        let (summary, result) = Schedule::new(&self.transactions).run(force, concurrency);
+        if !self.transactions.is_empty() {
+            summary.print(self.transactions.iter().any(Transaction::is_mutation));
+        }
+        result
+    }
+
     #[cfg(feature = "cli")]
     pub fn run_cli(
         &self,
         outputfmt: &OutputFmt,
         confirmation: &Confirmation,
         force: &Force,
+        concurrency: &Concurrency,
     ) -> Result<(), TransactionCliError> {
         match outputfmt {
             OutputFmt::Human => self.print_table(),
@@ -99,31 +198,137 @@ impl TransactionList {
             }
             Confirmation::Yes => println!("{}", json!({"run": true})),
         }
-        self.run(force).map_err(TransactionCliError::Run)
+        self.run(force, concurrency)
+            .map_err(TransactionCliError::Run)
     }
 
     pub fn print_json(&self) {
-        for transaction in &self.transactions {
+        for (index, transaction) in self.transactions.iter().enumerate() {
             let row = transaction.to_json_row();
-            println!(
-                "{}",
-                json!({
-                    "description": row.description,
-                    "command": row.command,
-                })
-            );
+            let mut fields = json!({
+                "description": row.description,
+                "command": row.command,
+            });
+            if let Some(estimates) = &self.estimates {
+                fields["estimate"] = json!(estimates[index]);
+            }
+            println!("{fields}");
+        }
+        if let Some(total) = self.get_estimate_total() {
+            println!("{}", json!({"total": {"estimate": total}}));
         }
     }
 
     pub fn print_table(&self) {
+        let Some(estimates) = &self.estimates else {
+            let mut table = Table::new(vec![
+                TableColumn::new("description".to_string(), Alignment::Left),
+                TableColumn::new("command".to_string(), Alignment::Left),
+            ]);
+            for transaction in &self.transactions {
+                let row = transaction.to_table_row();
+                table.push_row(vec![row.description, row.command]);
+            }
+            table.print();
+            return;
+        };
         let mut table = Table::new(vec![
             TableColumn::new("description".to_string(), Alignment::Left),
+            TableColumn::new("estimate".to_string(), Alignment::Right),
             TableColumn::new("command".to_string(), Alignment::Left),
         ]);
-        for transaction in &self.transactions {
+        for (transaction, estimate) in self.transactions.iter().zip(estimates) {
             let row = transaction.to_table_row();
-            table.push_row(vec![row.description, row.command]);
+            table.push_row(vec![
+                row.description,
+                estimate.map_or_else(|| " ".to_string(), colorized_storage_si_suffix),
+                row.command,
+            ]);
         }
+        table.push_row(vec![
+            "total".to_string(),
+            colorized_storage_si_suffix(self.get_estimate_total().unwrap_or(0)),
+            " ".to_string(),
+        ]);
         table.print();
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use std::str::FromStr;
+
+    use crate::config::{Location, TransferOptions};
+
+    use super::super::basebuilder::BaseBuilder;
+    use super::super::variants::{TransferIncrementalBuilder, TransferInitialBuilder};
+    use super::{Transaction, TransactionList};
+
+    fn initial(target: &str, dataset: &str) -> Transaction {
+        TransferInitialBuilder::new(
+            &Location::from_str("a:tank").unwrap(),
+            &Location::from_str(target).unwrap(),
+            dataset.to_string(),
+            "s1".to_string(),
+            &TransferOptions::new().with_fan_out(2),
+        )
+        .build()
+        .unwrap()
+    }
+
+    fn followup(target: &str, dataset: &str, from: &str) -> Transaction {
+        TransferIncrementalBuilder::new(
+            &Location::from_str("a:tank").unwrap(),
+            &Location::from_str(target).unwrap(),
+            dataset.to_string(),
+            from.to_string(),
+            "s2".to_string(),
+            &TransferOptions::new().with_fan_out(2),
+        )
+        .build()
+        .unwrap()
+    }
+
+    fn list(transactions: Vec<Transaction>) -> TransactionList {
+        let mut list = TransactionList::new();
+        for transaction in transactions {
+            list.push(transaction);
+        }
+        list
+    }
+
+    #[test]
+    fn fan_out() {
+        let merged = TransactionList::from_fan_out(vec![
+            list(vec![
+                initial("b:backup", "/"),
+                followup("b:backup", "/", "s1"),
+                initial("b:backup", "/x"),
+            ]),
+            list(vec![
+                followup("c:backup", "/", "s0"),
+                initial("c:backup", "/x"),
+                followup("c:backup", "/x", "s1"),
+            ]),
+        ]);
+        let descriptions: Vec<String> = merged
+            .iter()
+            .map(|transaction| transaction.to_json_row().description)
+            .collect();
+        assert_eq!(
+            descriptions,
+            vec![
+                "transfer followup: a:/@s0..s2->c",
+                "transfer initial: a:/@s1->b",
+                "transfer followup: a:/@s1..s2->b",
+                "transfer initial: a:/x@s1->b,c",
+                "transfer followup: a:/x@s1..s2->c",
+            ]
+        );
+        assert_eq!(
+            merged.iter().nth(3).unwrap().to_json_row().command,
+            "ssh a 'zfs send -c tank/x@s1' | \
+             ssh b 'zfs receive -s backup/x' & ssh c 'zfs receive -s backup/x'"
+        );
+    }
+}
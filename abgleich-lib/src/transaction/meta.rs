@@ -1,17 +1,22 @@
 use super::basemeta::BaseMeta;
 use super::variants::{
-    CreateSnapshotMeta, DestroySnapshotMeta, DiffMeta, InventoryMeta, TransferIncrementalMeta,
-    TransferInitialMeta, WhichMeta, ZpoolListMeta,
+    CreateSnapshotMeta, CreateSnapshotsMeta, DestroySnapshotMeta, DestroySnapshotsMeta, DiffMeta,
+    EstimateMeta, InventoryMeta, TransferIncrementalMeta, TransferInitialMeta, TransferResumeMeta,
+    WhichMeta, ZpoolListMeta,
 };
 
 #[derive(Clone)]
 pub enum TransactionMeta {
     CreateSnapshot(CreateSnapshotMeta),
+    CreateSnapshots(CreateSnapshotsMeta),
     DestroySnapshot(DestroySnapshotMeta),
+    DestroySnapshots(DestroySnapshotsMeta),
     Diff(DiffMeta),
+    Estimate(EstimateMeta),
     Inventory(InventoryMeta),
     TransferIncremental(TransferIncrementalMeta),
     TransferInitial(TransferInitialMeta),
+    TransferResume(TransferResumeMeta),
     Which(WhichMeta),
     ZpoolList(ZpoolListMeta),
 }
@@ -20,13 +25,129 @@ impl TransactionMeta {
     pub fn to_description(&self, color: bool, si: bool) -> String {
         match self {
             Self::CreateSnapshot(meta) => meta.to_description(color, si),
+            Self::CreateSnapshots(meta) => meta.to_description(color, si),
             Self::DestroySnapshot(meta) => meta.to_description(color, si),
+            Self::DestroySnapshots(meta) => meta.to_description(color, si),
             Self::Diff(meta) => meta.to_description(color, si),
+            Self::Estimate(meta) => meta.to_description(color, si),
             Self::Inventory(meta) => meta.to_description(color, si),
             Self::TransferIncremental(meta) => meta.to_description(color, si),
             Self::TransferInitial(meta) => meta.to_description(color, si),
+            Self::TransferResume(meta) => meta.to_description(color, si),
             Self::Which(meta) => meta.to_description(color, si),
             Self::ZpoolList(meta) => meta.to_description(color, si),
         }
     }
+
+    #[must_use]
+    pub fn get_dataset_ref(&self) -> Option<&str> {
+        match self {
+            Self::CreateSnapshot(meta) => Some(&meta.dataset),
+            Self::DestroySnapshot(meta) => Some(&meta.dataset),
+            Self::DestroySnapshots(meta) => Some(&meta.dataset),
+            Self::Diff(meta) => Some(&meta.dataset),
+            Self::TransferIncremental(meta) => Some(&meta.dataset),
+            Self::TransferInitial(meta) => Some(&meta.dataset),
+            Self::TransferResume(meta) => Some(&meta.dataset),
+            Self::CreateSnapshots(_)
+            | Self::Estimate(_)
+            | Self::Inventory(_)
+            | Self::Which(_)
+            | Self::ZpoolList(_) => None,
+        }
+    }
+
+    /// Hosts touched by the transaction, without duplicates.
+    #[must_use]
+    pub fn get_hosts(&self) -> Vec<&str> {
+        let mut hosts: Vec<&str> = Vec::new();
+        for host in self.get_chains().into_iter().flatten() {
+            if !hosts.contains(&host) {
+                hosts.push(host);
+            }
+        }
+        hosts
+    }
+
+    /// Hosts of every pair of source and target the transaction transfers
+    /// between, without duplicates per pair. Transfers shared by several
+    /// targets take part in one chain per target host, all other transactions
+    /// in a single chain of their only host. Targets on the same host share
+    /// their chain, which is listed once.
+    #[must_use]
+    pub fn get_chains(&self) -> Vec<Vec<&str>> {
+        let (source, targets): (&str, Vec<&str>) = match self {
+            Self::CreateSnapshot(meta) => (meta.host.as_str(), Vec::new()),
+            Self::CreateSnapshots(meta) => (meta.host.as_str(), Vec::new()),
+            Self::DestroySnapshot(meta) => (meta.host.as_str(), Vec::new()),
+            Self::DestroySnapshots(meta) => (meta.host.as_str(), Vec::new()),
+            Self::Diff(meta) => (meta.host.as_str(), Vec::new()),
+            Self::Estimate(meta) => (meta.host.as_str(), Vec::new()),
+            Self::Inventory(meta) => (meta.host.as_str(), Vec::new()),
+            Self::TransferIncremental(meta) => (
+                meta.source_host.as_str(),
+                std::iter::once(&meta.target_host)
+                    .chain(&meta.shared_hosts)
+                    .map(String::as_str)
+                    .collect(),
+            ),
+            Self::TransferInitial(meta) => (
+                meta.source_host.as_str(),
+                std::iter::once(&meta.target_host)
+                    .chain(&meta.shared_hosts)
+                    .map(String::as_str)
+                    .collect(),
+            ),
+            Self::TransferResume(meta) => {
+                (meta.source_host.as_str(), vec![meta.target_host.as_str()])
+            }
+            Self::Which(meta) => (meta.host.as_str(), Vec::new()),
+            Self::ZpoolList(meta) => (meta.host.as_str(), Vec::new()),
+        };
+        if targets.is_empty() {
+            return vec![vec![source]];
+        }
+        let mut chains: Vec<Vec<&str>> = Vec::with_capacity(targets.len());
+        for target in targets {
+            let chain = if target == source {
+                vec![source]
+            } else {
+                vec![source, target]
+            };
+            if !chains.contains(&chain) {
+                chains.push(chain);
+            }
+        }
+        chains
+    }
+
+    /// Adds the targets of `other`, a transfer of the same stream, to the ones
+    /// of this transfer. Other transactions are left as they are.
+    pub fn push_shared(&mut self, other: Self) {
+        let (shared_hosts, target_host, others) = match (self, other) {
+            (Self::TransferIncremental(meta), Self::TransferIncremental(other)) => (
+                &mut meta.shared_hosts,
+                other.target_host,
+                other.shared_hosts,
+            ),
+            (Self::TransferInitial(meta), Self::TransferInitial(other)) => (
+                &mut meta.shared_hosts,
+                other.target_host,
+                other.shared_hosts,
+            ),
+            _ => return,
+        };
+        shared_hosts.push(target_host);
+        shared_hosts.extend(others);
+    }
+
+    /// Transactions which create a dataset on their target.
+    #[must_use]
+    pub const fn is_creating_dataset(&self) -> bool {
+        match self {
+            Self::TransferInitial(_) => true,
+            Self::TransferResume(meta) => meta.initial,
+            _ => false,
+        }
+    }
 }
@@ -5,6 +5,8 @@ mod force;
 mod list;
 mod meta;
 mod outcome;
+mod schedule;
+mod telemetry;
 mod transaction;
 mod variants;
 
@@ -14,5 +16,6 @@ pub use errors::TransactionCliError;
 pub use errors::{TransactionBuildError, TransactionRunError};
 pub use force::Force;
 pub use list::TransactionList;
+pub use telemetry::{Summary, Telemetry};
 pub use transaction::Transaction;
 pub use variants::*;
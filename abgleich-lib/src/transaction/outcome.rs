@@ -2,19 +2,27 @@ use crate::subprocess::OutcomeSuccess;
 use crate::transaction::TransactionRunError;
 
 use super::meta::TransactionMeta;
+use super::telemetry::Telemetry;
 
 pub struct TransactionOutcome {
     success: OutcomeSuccess,
     data: Option<String>,
     meta: TransactionMeta,
+    telemetry: Telemetry,
 }
 
 impl TransactionOutcome {
-    pub const fn new(success: OutcomeSuccess, data: Option<String>, meta: TransactionMeta) -> Self {
+    pub const fn new(
+        success: OutcomeSuccess,
+        data: Option<String>,
+        meta: TransactionMeta,
+        telemetry: Telemetry,
+    ) -> Self {
         Self {
             success,
             data,
             meta,
+            telemetry,
         }
     }
 
@@ -36,6 +44,10 @@ impl TransactionOutcome {
         &self.meta
     }
 
+    pub const fn get_telemetry_ref(&self) -> &Telemetry {
+        &self.telemetry
+    }
+
     pub const fn is_successful(&self) -> bool {
         match &self.success {
             OutcomeSuccess::Yes => true,
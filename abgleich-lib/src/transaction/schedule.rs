@@ -0,0 +1,397 @@
+use std::collections::HashMap;
+use std::sync::{Condvar, Mutex, MutexGuard, PoisonError};
+use std::thread;
+use std::time::Instant;
+
+use tracing::error;
+
+use crate::config::Concurrency;
+use crate::traits::Traverse;
+
+use super::errors::TransactionRunError;
+use super::force::Force;
+use super::outcome::TransactionOutcome;
+use super::telemetry::Summary;
+use super::transaction::Transaction;
+
+#[derive(Clone, Copy, PartialEq, Eq)]
+enum Status {
+    Pending,
+    Running,
+    Done,
+}
+
+struct State<'a> {
+    status: Vec<Status>,
+    cursor: usize, // first transaction which has not been started yet
+    load: HashMap<&'a str, usize>,
+    failures: usize,
+    error: Option<TransactionRunError>,
+    halt: bool,
+    summary: Summary,
+}
+
+/// Dependency graph of a list of transactions.
+///
+/// Transactions on the same dataset (and hosts) form a chain and run in list
+/// order. A transfer shared by several targets takes part in the chain of
+/// each target. A transaction creating a dataset additionally waits for the
+/// transaction creating the nearest ancestor dataset, if there is one.
+/// Dependencies always point to earlier transactions, i.e. running the
+/// transactions one by one in list order satisfies all of them.
+pub struct Schedule<'a> {
+    transactions: &'a [Transaction],
+    dependencies: Vec<Vec<usize>>,
+    hosts: Vec<Vec<&'a str>>,
+}
+
+impl<'a> Schedule<'a> {
+    pub fn new(transactions: &'a [Transaction]) -> Self {
+        let mut chains: HashMap<(Vec<&str>, &str), (usize, usize)> = HashMap::new(); // first, last
+        let mut dependencies = Vec::with_capacity(transactions.len());
+        let mut hosts = Vec::with_capacity(transactions.len());
+        for (index, transaction) in transactions.iter().enumerate() {
+            let meta = transaction.get_meta_ref();
+            let transaction_hosts = meta.get_hosts();
+            let mut transaction_dependencies = Vec::new();
+            if let Some(dataset) = meta.get_dataset_ref() {
+                for chain in meta.get_chains() {
+                    if meta.is_creating_dataset() {
+                        let mut ancestor = Self::get_parent(dataset);
+                        while let Some(name) = ancestor {
+                            if let Some((first, _)) = chains.get(&(chain.clone(), name)) {
+                                if transactions[*first].get_meta_ref().is_creating_dataset() {
+                                    transaction_dependencies.push(*first);
+                                }
+                                break;
+                            }
+                            ancestor = Self::get_parent(name);
+                        }
+                    }
+                    chains
+                        .entry((chain, dataset))
+                        .and_modify(|(_, last)| {
+                            transaction_dependencies.push(*last);
+                            *last = index;
+                        })
+                        .or_insert((index, index));
+                }
+                transaction_dependencies.sort_unstable();
+                transaction_dependencies.dedup();
+            }
+            dependencies.push(transaction_dependencies);
+            hosts.push(transaction_hosts);
+        }
+        Self {
+            transactions,
+            dependencies,
+            hosts,
+        }
+    }
+
+    fn get_parent(dataset: &str) -> Option<&str> {
+        if dataset == "/" {
+            return None;
+        }
+        match dataset.rsplit_once('/') {
+            Some(("", _)) => Some("/"),
+            Some((parent, _)) => Some(parent),
+            None => None,
+        }
+    }
+
+    fn lock<'s>(state: &'s Mutex<State<'a>>) -> MutexGuard<'s, State<'a>> {
+        state.lock().unwrap_or_else(PoisonError::into_inner)
+    }
+
+    fn pick(&self, state: &mut State<'a>, jobs_per_host: Option<usize>) -> Option<usize> {
+        while state.cursor < state.status.len() && state.status[state.cursor] != Status::Pending {
+            state.cursor += 1;
+        }
+        (state.cursor..state.status.len()).find(|index| {
+            state.status[*index] == Status::Pending
+                && self.dependencies[*index]
+                    .iter()
+                    .all(|dependency| state.status[*dependency] == Status::Done)
+                && jobs_per_host.is_none_or(|limit| {
+                    self.hosts[*index]
+                        .iter()
+                        .all(|host| state.load.get(host).copied().unwrap_or(0) < limit)
+                })
+        })
+    }
+
+    fn work(
+        &self,
+        state: &Mutex<State<'a>>,
+        signal: &Condvar,
+        force: &Force,
+        concurrency: &Concurrency,
+    ) {
+        loop {
+            let index = {
+                let mut guard = Self::lock(state);
+                loop {
+                    if guard.halt || guard.cursor >= guard.status.len() {
+                        return;
+                    }
+                    if let Some(index) = self.pick(&mut guard, concurrency.jobs_per_host) {
+                        guard.status[index] = Status::Running;
+                        for host in &self.hosts[index] {
+                            *guard.load.entry(host).or_insert(0) += 1;
+                        }
+                        break index;
+                    }
+                    guard = signal.wait(guard).unwrap_or_else(PoisonError::into_inner);
+                }
+            };
+            let result = self.transactions[index].run();
+            Self::finish(
+                &mut Self::lock(state),
+                index,
+                &self.hosts[index],
+                result,
+                force,
+            );
+            signal.notify_all();
+        }
+    }
+
+    fn finish(
+        state: &mut State<'a>,
+        index: usize,
+        hosts: &[&'a str],
+        result: Result<TransactionOutcome, TransactionRunError>,
+        force: &Force,
+    ) {
+        state.status[index] = Status::Done;
+        for host in hosts {
+            if let Some(load) = state.load.get_mut(host) {
+                *load -= 1;
+            }
+        }
+        // "assert_success", based on non-zero exit-code or signal termination,
+        // raises "transaction fail", optionally ignored with normal force.
+        // In "transaction.run", before and after, lower-level sub-process errors
+        // can occur, handled with full force if required.
+        match &result {
+            Ok(outcome) => state.summary.push(
+                outcome.get_meta_ref().to_description(false, false),
+                outcome.is_successful(),
+                outcome.get_telemetry_ref(),
+            ),
+            Err(_) => state.summary.push_error(),
+        }
+        match result {
+            Ok(outcome) => match outcome.assert_success() {
+                Ok(()) => {}
+                Err(TransactionRunError::Failed {
+                    reason: _,
+                    description: _,
+                }) if *force != Force::No => state.failures += 1, // logged by transaction already
+                Err(err) => Self::halt(state, err),
+            },
+            Err(err) if *force == Force::Full => {
+                error!(
+                    msg = "ignoring error with full force",
+                    traceback = err.traverse()
+                );
+                state.failures += 1;
+            }
+            Err(err) => Self::halt(state, err),
+        }
+    }
+
+    fn halt(state: &mut State<'a>, err: TransactionRunError) {
+        if state.error.is_none() {
+            state.error = Some(err);
+        }
+        state.halt = true;
+    }
+
+    /// Runs transactions on up to `concurrency.jobs` worker threads. After an
+    /// unhandled error no further transactions are started, while those
+    /// already running are waited for. The summary covers all transactions
+    /// which were started, regardless of the result.
+    pub fn run(
+        &self,
+        force: &Force,
+        concurrency: &Concurrency,
+    ) -> (Summary, Result<(), TransactionRunError>) {
+        let start = Instant::now();
+        let state = Mutex::new(State {
+            status: vec![Status::Pending; self.transactions.len()],
+            cursor: 0,
+            load: HashMap::new(),
+            failures: 0,
+            error: None,
+            halt: false,
+            summary: Summary::new(),
+        });
+        let signal = Condvar::new();
+        let workers = concurrency.jobs.clamp(1, self.transactions.len().max(1));
+        if workers == 1 {
+            self.work(&state, &signal, force, concurrency);
+        } else {
+            thread::scope(|scope| {
+                for _ in 0..workers {
+                    scope.spawn(|| self.work(&state, &signal, force, concurrency));
+                }
+            });
+        }
+        let mut state = state.into_inner().unwrap_or_else(PoisonError::into_inner);
+        state.summary.set_duration(start.elapsed());
+        let result = if let Some(err) = state.error {
+            Err(err)
+        } else if state.failures > 0 {
+            Err(TransactionRunError::SomeFailed(state.failures))
+        } else {
+            Ok(())
+        };
+        (state.summary, result)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::str::FromStr;
+
+    use crate::config::{Location, TransferOptions};
+
+    use super::super::basebuilder::BaseBuilder;
+    use super::super::variants::{
+        CreateSnapshotBuilder, TransferIncrementalBuilder, TransferInitialBuilder,
+    };
+    use super::*;
+
+    const NONE: Vec<usize> = Vec::new();
+
+    fn loc(s: &str) -> Location {
+        Location::from_str(s).unwrap()
+    }
+
+    fn initial(dataset: &str) -> Transaction {
+        TransferInitialBuilder::new(
+            &loc("a:tank"),
+            &loc("b:backup"),
+            dataset.to_string(),
+            "s1".to_string(),
+            &TransferOptions::new(),
+        )
+        .build()
+        .unwrap()
+    }
+
+    fn followup(dataset: &str) -> Transaction {
+        TransferIncrementalBuilder::new(
+            &loc("a:tank"),
+            &loc("b:backup"),
+            dataset.to_string(),
+            "s1".to_string(),
+            "s2".to_string(),
+            &TransferOptions::new(),
+        )
+        .build()
+        .unwrap()
+    }
+
+    fn snapshot(location: &str, dataset: &str) -> Transaction {
+        CreateSnapshotBuilder::new(&loc(location), dataset.to_string(), "s3".to_string(), 0)
+            .build()
+            .unwrap()
+    }
+
+    #[test]
+    fn chain_on_same_dataset() {
+        let transactions = vec![initial("/"), followup("/"), followup("/")];
+        let schedule = Schedule::new(&transactions);
+        assert_eq!(schedule.dependencies, vec![NONE, vec![0], vec![1]]);
+    }
+
+    #[test]
+    fn initial_waits_for_nearest_created_ancestor() {
+        let transactions = vec![
+            initial("/"),
+            followup("/"),
+            initial("/a"),
+            initial("/a/b"),
+            initial("/c"),
+        ];
+        let schedule = Schedule::new(&transactions);
+        assert_eq!(
+            schedule.dependencies,
+            vec![NONE, vec![0], vec![0], vec![2], vec![0]]
+        );
+    }
+
+    #[test]
+    fn initial_without_created_ancestor_is_independent() {
+        let transactions = vec![followup("/"), initial("/a"), followup("/b")];
+        let schedule = Schedule::new(&transactions);
+        assert_eq!(schedule.dependencies, vec![NONE, NONE, NONE]);
+    }
+
+    #[test]
+    fn chains_are_separated_by_host() {
+        let transactions = vec![snapshot("a:tank", "/"), snapshot("b:tank", "/")];
+        let schedule = Schedule::new(&transactions);
+        assert_eq!(schedule.dependencies, vec![NONE, NONE]);
+        assert_eq!(schedule.hosts, vec![vec!["a"], vec!["b"]]);
+    }
+
+    #[test]
+    fn shared_transfer_joins_chain_of_each_target() {
+        let options = TransferOptions::new().with_fan_out(2);
+        let followup = |target: &str| {
+            TransferIncrementalBuilder::new(
+                &loc("a:tank"),
+                &loc(target),
+                "/".to_string(),
+                "s1".to_string(),
+                "s2".to_string(),
+                &options,
+            )
+            .build()
+            .unwrap()
+        };
+        let mut shared = followup("b:backup");
+        assert!(shared.share(followup("c:backup")).is_none());
+        let transactions = vec![snapshot("b:backup", "/"), followup("c:backup"), shared];
+        let schedule = Schedule::new(&transactions);
+        assert_eq!(schedule.dependencies, vec![NONE, NONE, vec![1]]);
+        assert_eq!(schedule.hosts[2], vec!["a", "b", "c"]);
+    }
+
+    #[test]
+    fn shared_transfer_with_targets_on_same_host() {
+        let options = TransferOptions::new().with_fan_out(2);
+        let followup = |target: &str| {
+            TransferIncrementalBuilder::new(
+                &loc("a:tank"),
+                &loc(target),
+                "/".to_string(),
+                "s1".to_string(),
+                "s2".to_string(),
+                &options,
+            )
+            .build()
+            .unwrap()
+        };
+        let mut shared = followup("b:backup1");
+        assert!(shared.share(followup("b:backup2")).is_none());
+        assert_eq!(shared.get_meta_ref().get_chains(), vec![vec!["a", "b"]]);
+        let transactions = vec![shared, followup("b:backup1")];
+        let schedule = Schedule::new(&transactions);
+        assert_eq!(schedule.dependencies, vec![NONE, vec![0]]);
+        assert_eq!(schedule.hosts[0], vec!["a", "b"]);
+    }
+
+    #[test]
+    fn parent_of_relative_names() {
+        assert_eq!(Schedule::get_parent("/"), None);
+        assert_eq!(Schedule::get_parent("/a"), Some("/"));
+        assert_eq!(Schedule::get_parent("/a/b"), Some("/a"));
+        assert_eq!(Schedule::get_parent("a/b"), Some("a"));
+        assert_eq!(Schedule::get_parent("a"), None);
+    }
+}
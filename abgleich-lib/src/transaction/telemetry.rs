@@ -0,0 +1,212 @@
+use std::os::unix::process::ExitStatusExt;
+use std::time::Duration;
+
+use serde_json::{Value, json};
+use tracing::info;
+
+use crate::output::storage_si_suffix;
+use crate::subprocess::{Outcome, get_rate};
+
+/// Measurements of a single transaction run. Bytes and rates are only known
+/// for streams relayed by abgleich itself.
+#[derive(Clone, Debug)]
+pub struct Telemetry {
+    duration: Duration,
+    bytes: Option<u64>,
+    peak_rate: Option<u64>,
+    exit_code: Option<i32>,
+    exit_signal: Option<i32>,
+}
+
+impl Telemetry {
+    #[must_use]
+    pub fn new(duration: Duration, outcome: &Outcome) -> Self {
+        let statistics = outcome.get_relay_statistics();
+        let status = outcome.get_exitstatus_ref();
+        Self {
+            duration,
+            bytes: statistics.map(|statistics| statistics.bytes),
+            peak_rate: statistics.map(|statistics| statistics.peak_rate),
+            exit_code: status.code(),
+            exit_signal: status.signal(),
+        }
+    }
+
+    #[must_use]
+    pub const fn get_duration(&self) -> Duration {
+        self.duration
+    }
+
+    #[must_use]
+    pub const fn get_bytes(&self) -> Option<u64> {
+        self.bytes
+    }
+
+    /// Bytes per second over the entire run.
+    #[must_use]
+    pub fn get_average_rate(&self) -> Option<u64> {
+        self.bytes.map(|bytes| get_rate(bytes, self.duration))
+    }
+
+    #[must_use]
+    pub fn to_json(&self) -> Value {
+        json!({
+            "duration": self.duration.as_secs_f64(),
+            "bytes": self.bytes,
+            "average_rate": self.get_average_rate(),
+            "peak_rate": self.peak_rate,
+            "exit_code": self.exit_code,
+            "exit_signal": self.exit_signal,
+        })
+    }
+}
+
+/// Totals of a run of a list of transactions.
+#[derive(Debug, Default)]
+pub struct Summary {
+    duration: Duration, // wall time of the entire run
+    succeeded: usize,
+    failed: usize,
+    bytes: Option<u64>,
+    slowest: Option<(String, Duration)>, // description, duration
+}
+
+impl Summary {
+    #[must_use]
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Counts a transaction which ran to completion.
+    pub fn push(&mut self, description: String, success: bool, telemetry: &Telemetry) {
+        if success {
+            self.succeeded += 1;
+        } else {
+            self.failed += 1;
+        }
+        if let Some(bytes) = telemetry.get_bytes() {
+            self.bytes = Some(self.bytes.unwrap_or(0) + bytes);
+        }
+        if self
+            .slowest
+            .as_ref()
+            .is_none_or(|(_, duration)| telemetry.get_duration() > *duration)
+        {
+            self.slowest = Some((description, telemetry.get_duration()));
+        }
+    }
+
+    /// Counts a transaction which could not be run or observed.
+    pub const fn push_error(&mut self) {
+        self.failed += 1;
+    }
+
+    pub const fn set_duration(&mut self, duration: Duration) {
+        self.duration = duration;
+    }
+
+    /// Without the padding meant for tables.
+    fn format_size(value: u64) -> String {
+        storage_si_suffix(value)
+            .split_whitespace()
+            .collect::<Vec<&str>>()
+            .join(" ")
+    }
+
+    #[must_use]
+    pub fn to_description(&self) -> String {
+        let transferred = self.bytes.map_or_else(String::new, |bytes| {
+            format!(
+                ", {} at {}/s",
+                Self::format_size(bytes),
+                Self::format_size(get_rate(bytes, self.duration)),
+            )
+        });
+        format!(
+            "{} ok, {} failed in {:.1} s{transferred}",
+            self.succeeded,
+            self.failed,
+            self.duration.as_secs_f64()
+        )
+    }
+
+    #[must_use]
+    pub fn to_json(&self) -> Value {
+        json!({
+            "duration": self.duration.as_secs_f64(),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "bytes": self.bytes,
+            "average_rate": self.bytes.map(|bytes| get_rate(bytes, self.duration)),
+            "slowest": self.slowest.as_ref().map(|(description, duration)| json!({
+                "description": description,
+                "duration": duration.as_secs_f64(),
+            })),
+        })
+    }
+
+    /// Printed along with the messages of mutations, logged otherwise.
+    pub fn print(&self, mutation: bool) {
+        let message = format!("[SUMMARY] {}", self.to_description());
+        if mutation {
+            println!(
+                "{}",
+                json!({"message": message, "telemetry": self.to_json()})
+            );
+        } else {
+            info!(message = message, telemetry = self.to_json().to_string());
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::process::{Command, ExitStatus};
+    use std::time::Duration;
+
+    use crate::subprocess::Outcome;
+
+    use super::{Summary, Telemetry};
+
+    fn status(script: &str) -> ExitStatus {
+        Command::new("sh").args(["-c", script]).status().unwrap()
+    }
+
+    #[test]
+    fn exit_details() {
+        let outcome = Outcome::new(Vec::new(), Vec::new(), status("exit 3"), String::new());
+        let telemetry = Telemetry::new(Duration::from_secs(1), &outcome);
+        assert_eq!(telemetry.exit_code, Some(3));
+        assert_eq!(telemetry.exit_signal, None);
+        assert_eq!(telemetry.get_average_rate(), None);
+        let outcome = Outcome::new(Vec::new(), Vec::new(), status("kill -9 $$"), String::new());
+        let telemetry = Telemetry::new(Duration::from_secs(1), &outcome);
+        assert_eq!(telemetry.exit_code, None);
+        assert_eq!(telemetry.exit_signal, Some(9));
+    }
+
+    #[test]
+    fn summary() {
+        let telemetry = |seconds, bytes| Telemetry {
+            duration: Duration::from_secs(seconds),
+            bytes,
+            peak_rate: bytes,
+            exit_code: Some(0),
+            exit_signal: None,
+        };
+        let mut summary = Summary::new();
+        summary.push("a".to_string(), true, &telemetry(1, Some(1_024)));
+        summary.push("b".to_string(), false, &telemetry(3, None));
+        summary.push("c".to_string(), true, &telemetry(2, Some(1_024)));
+        summary.push_error();
+        summary.set_duration(Duration::from_secs(4));
+        assert_eq!(
+            summary.to_description(),
+            "2 ok, 2 failed in 4.0 s, 2.00 KiB at 512.00 B/s"
+        );
+        let json = summary.to_json();
+        assert_eq!(json["bytes"], 2_048);
+        assert_eq!(json["average_rate"], 512);
+        assert_eq!(json["slowest"]["description"], "b");
+    }
+}
@@ -1,11 +1,15 @@
+use std::time::Instant;
+
 use serde_json::json;
 use tracing::info;
 
-use crate::subprocess::{Command, OutcomeSuccess};
+use crate::config::Location;
+use crate::subprocess::{Command, Outcome, OutcomeSuccess, Proc, Relay, SubprocessError};
 
 use super::errors::TransactionRunError;
 use super::meta::TransactionMeta;
 use super::outcome::TransactionOutcome;
+use super::telemetry::Telemetry;
 
 pub struct TransactionJsonFields {
     pub description: String,
@@ -17,10 +21,28 @@ pub struct TransactionTableRow {
     pub command: String,
 }
 
+/// What a transaction runs: a single command, possibly a shell pipeline, or
+/// two commands whose streams are relayed by abgleich itself.
+enum Invocation {
+    Command(Command),
+    Relay(Relay),
+}
+
+#[allow(clippy::to_string_trait_impl)]
+impl ToString for Invocation {
+    fn to_string(&self) -> String {
+        match self {
+            Self::Command(command) => command.to_string(),
+            Self::Relay(relay) => relay.to_string(),
+        }
+    }
+}
+
 pub struct Transaction {
     meta: TransactionMeta,
-    command: Command,
+    command: Invocation,
     mutation: bool,
+    send: Option<(Location, Vec<String>)>, // source and `zfs` arguments of a transfer
 }
 
 impl Transaction {
@@ -28,12 +50,95 @@ impl Transaction {
     pub const fn new(meta: TransactionMeta, command: Command, mutation: bool) -> Self {
         Self {
             meta,
-            command,
+            command: Invocation::Command(command),
+            mutation,
+            send: None,
+        }
+    }
+
+    #[must_use]
+    pub const fn from_relay(meta: TransactionMeta, relay: Relay, mutation: bool) -> Self {
+        Self {
+            meta,
+            command: Invocation::Relay(relay),
             mutation,
+            send: None,
         }
     }
 
+    /// Remembers the `zfs send` of a transfer, i.e. its arguments starting
+    /// with `send`, for estimating the size of its stream.
+    #[must_use]
+    pub fn with_send(mut self, location: &Location, arguments: Vec<String>) -> Self {
+        self.send = Some((location.clone(), arguments));
+        self
+    }
+
+    /// Tees the stream of this transfer into the receivers of `other` if both
+    /// are relayed transfers of the identical `zfs send`, e.g. of the same
+    /// snapshots to different targets. Hands `other` back otherwise.
+    #[must_use]
+    pub fn share(&mut self, other: Self) -> Option<Self> {
+        let shareable = matches!(
+            (&self.meta, &other.meta),
+            (
+                TransactionMeta::TransferIncremental(_),
+                TransactionMeta::TransferIncremental(_)
+            ) | (
+                TransactionMeta::TransferInitial(_),
+                TransactionMeta::TransferInitial(_)
+            )
+        ) && self.send.is_some()
+            && self.send == other.send;
+        if !shareable {
+            return Some(other);
+        }
+        let Invocation::Relay(relay) = &mut self.command else {
+            return Some(other);
+        };
+        let Self {
+            meta,
+            command: Invocation::Relay(receivers),
+            ..
+        } = other
+        else {
+            return Some(other);
+        };
+        relay.push_receivers(receivers.into_receivers());
+        self.meta.push_shared(meta);
+        None
+    }
+
     pub fn run(&self) -> Result<TransactionOutcome, TransactionRunError> {
+        self.run_with(Proc::communicate)
+    }
+
+    /// Like `run`, but the command is stopped as soon as it produced its first
+    /// non-empty line of output, which then is the only data of the outcome.
+    pub fn run_first_line(&self) -> Result<TransactionOutcome, TransactionRunError> {
+        self.run_with(Proc::communicate_first_line)
+    }
+
+    /// Like `run`, but stdout is handed to `on_line` line by line while the
+    /// command is running instead of being collected. Inventory output
+    /// concerning the parent of a root with trailing slash is skipped. If
+    /// `on_line` returns `false`, the command is stopped.
+    pub fn run_lines(
+        &self,
+        mut on_line: impl FnMut(&str) -> bool,
+    ) -> Result<TransactionOutcome, TransactionRunError> {
+        match &self.meta {
+            TransactionMeta::Inventory(meta) => self.run_with(|proc| {
+                proc.communicate_lines(|line| meta.is_root_line(line) || on_line(line))
+            }),
+            _ => self.run_with(|proc| proc.communicate_lines(on_line)),
+        }
+    }
+
+    fn run_with(
+        &self,
+        communicate: impl FnOnce(Proc) -> Result<Outcome, SubprocessError>,
+    ) -> Result<TransactionOutcome, TransactionRunError> {
         if self.mutation {
             println!(
                 "{}",
@@ -48,39 +153,33 @@ impl Transaction {
                 command = self.command.to_string(),
             );
         }
-        let outcome = self
-            .command
-            .run()
-            .map_err(TransactionRunError::Subprocess)?
-            .communicate()
-            .map_err(TransactionRunError::Subprocess)?;
-        let success = outcome.success();
-        match &success {
-            OutcomeSuccess::Yes => {
-                if self.mutation {
-                    println!(
-                        "{}",
-                        json!({"message": format!("[OK] {}", self.meta.to_description(false, false))})
-                    );
-                } else {
-                    info!(message = format!("[OK] {}", self.meta.to_description(false, false)));
-                }
-            }
-            OutcomeSuccess::No(reason) => {
-                if self.mutation {
-                    println!(
-                        "{}",
-                        json!({"message": format!("[FAILED: {reason}] {}", self.meta.to_description(false, false))})
-                    );
-                } else {
-                    info!(
-                        message = format!(
-                            "[FAILED: {reason}] {}",
-                            self.meta.to_description(false, false)
-                        )
-                    );
-                }
+        let start = Instant::now();
+        let outcome = match &self.command {
+            Invocation::Command(command) => {
+                communicate(command.run().map_err(TransactionRunError::Subprocess)?)
             }
+            Invocation::Relay(relay) => relay.run(),
+        }
+        .map_err(TransactionRunError::Subprocess)?;
+        let telemetry = Telemetry::new(start.elapsed(), &outcome);
+        let success = outcome.success();
+        let message = match &success {
+            OutcomeSuccess::Yes => format!("[OK] {}", self.meta.to_description(false, false)),
+            OutcomeSuccess::No(reason) => format!(
+                "[FAILED: {reason}] {}",
+                self.meta.to_description(false, false)
+            ),
+        };
+        if self.mutation {
+            println!(
+                "{}",
+                json!({"message": message, "telemetry": telemetry.to_json()})
+            );
+        } else {
+            info!(
+                message = message,
+                telemetry = telemetry.to_json().to_string()
+            );
         }
         let data = outcome
             .stdout_as_str_ref()
@@ -94,9 +193,27 @@ impl Transaction {
             success,
             Some(data),
             self.meta.clone(),
+            telemetry,
         ))
     }
 
+    #[must_use]
+    pub const fn get_meta_ref(&self) -> &TransactionMeta {
+        &self.meta
+    }
+
+    #[must_use]
+    pub fn get_send_ref(&self) -> Option<(&Location, &[String])> {
+        self.send
+            .as_ref()
+            .map(|(location, arguments)| (location, arguments.as_slice()))
+    }
+
+    #[must_use]
+    pub const fn is_mutation(&self) -> bool {
+        self.mutation
+    }
+
     #[must_use]
     pub fn to_json_row(&self) -> TransactionJsonFields {
         TransactionJsonFields {
@@ -0,0 +1,120 @@
+use crate::config::Location;
+use crate::output::{colorized_storage_si_suffix, storage_si_suffix, storage_suffix};
+use crate::subprocess::Command;
+
+use super::super::basebuilder::BaseBuilder;
+use super::super::basemeta::BaseMeta;
+use super::super::errors::TransactionBuildError;
+use super::super::meta::TransactionMeta;
+use super::super::transaction::Transaction;
+
+#[derive(Clone)]
+pub struct CreateSnapshotsMeta {
+    pub host: String,
+    pub written: u64,
+    pub snapshots: Vec<(String, String)>,
+}
+
+impl BaseMeta for CreateSnapshotsMeta {
+    fn to_description(&self, color: bool, si: bool) -> String {
+        format!(
+            "create snapshots: {}:{} ({})",
+            self.host,
+            self.snapshots
+                .iter()
+                .map(|(dataset, snapshot)| format!("{dataset}@{snapshot}"))
+                .collect::<Vec<String>>()
+                .join(","),
+            if si {
+                if color {
+                    colorized_storage_si_suffix(self.written)
+                } else {
+                    storage_si_suffix(self.written)
+                }
+            } else {
+                storage_suffix(self.written)
+            },
+        )
+    }
+}
+
+/// Creates snapshots of several datasets on one location with a single
+/// `zfs snapshot` call, i.e. atomically within one transaction group.
+pub struct CreateSnapshotsBuilder<'a> {
+    location: &'a Location,
+    snapshots: Vec<(String, String)>,
+    written: u64,
+    recursive: bool,
+}
+
+impl<'a> CreateSnapshotsBuilder<'a> {
+    /// `snapshots` holds pairs of dataset and snapshot name.
+    #[must_use]
+    pub const fn new(
+        location: &'a Location,
+        snapshots: Vec<(String, String)>,
+        written: u64,
+    ) -> Self {
+        Self {
+            location,
+            snapshots,
+            written,
+            recursive: false,
+        }
+    }
+
+    /// Snapshot the first dataset with `-r` instead of listing all datasets.
+    /// Only valid if the datasets form the complete subtree below the first
+    /// one and share one snapshot name.
+    #[must_use]
+    pub const fn with_recursive(mut self, recursive: bool) -> Self {
+        self.recursive = recursive;
+        self
+    }
+
+    /// Length of the argument naming `snapshot` of `dataset` on `location`.
+    #[must_use]
+    pub fn get_argument_length(location: &Location, dataset: &str, snapshot: &str) -> usize {
+        Self::get_argument(location, dataset, snapshot).len()
+    }
+
+    fn get_argument(location: &Location, dataset: &str, snapshot: &str) -> String {
+        let dataset_name = if dataset == "/" { "" } else { dataset };
+        format!(
+            "{}{}@{}",
+            location.get_root_ref().as_str(),
+            dataset_name,
+            snapshot
+        )
+    }
+}
+
+impl BaseBuilder for CreateSnapshotsBuilder<'_> {
+    fn build(self) -> Result<Transaction, TransactionBuildError> {
+        let mut arguments = vec!["snapshot".to_string()];
+        if self.recursive {
+            arguments.push("-r".to_string());
+            if let Some((dataset, snapshot)) = self.snapshots.first() {
+                arguments.push(Self::get_argument(self.location, dataset, snapshot));
+            }
+        } else {
+            arguments.extend(
+                self.snapshots.iter().map(|(dataset, snapshot)| {
+                    Self::get_argument(self.location, dataset, snapshot)
+                }),
+            );
+        }
+        Ok(Transaction::new(
+            TransactionMeta::CreateSnapshots(CreateSnapshotsMeta {
+                host: self.location.get_route_ref().get_host_ref().to_string(),
+                written: self.written,
+                snapshots: self.snapshots,
+            }),
+            Command::new("zfs".to_string(), arguments)
+                .map_err(TransactionBuildError::Subprocess)?
+                .on_route(self.location.get_route_ref())
+                .map_err(TransactionBuildError::Subprocess)?,
+            true,
+        ))
+    }
+}
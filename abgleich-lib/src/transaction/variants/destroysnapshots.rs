@@ -0,0 +1,121 @@
+use crate::config::Location;
+use crate::subprocess::Command;
+
+use super::super::basebuilder::BaseBuilder;
+use super::super::basemeta::BaseMeta;
+use super::super::errors::TransactionBuildError;
+use super::super::meta::TransactionMeta;
+use super::super::transaction::Transaction;
+
+#[derive(Clone)]
+pub struct DestroySnapshotsMeta {
+    pub host: String,
+    pub dataset: String,
+    pub snapshots: Vec<String>,
+}
+
+impl BaseMeta for DestroySnapshotsMeta {
+    fn to_description(&self, _color: bool, _si: bool) -> String {
+        format!(
+            "destroy snapshots: {}:{}@{}",
+            self.host,
+            self.dataset,
+            self.snapshots.join(","),
+        )
+    }
+}
+
+/// Destroys several snapshots of one dataset with a single `zfs destroy`
+/// call. Each entry is either a snapshot name or a range `first%last`
+/// covering all snapshots in between.
+pub struct DestroySnapshotsBuilder<'a> {
+    location: &'a Location,
+    dataset: String,
+    snapshots: Vec<String>,
+}
+
+impl<'a> DestroySnapshotsBuilder<'a> {
+    #[must_use]
+    pub const fn new(location: &'a Location, dataset: String, snapshots: Vec<String>) -> Self {
+        Self {
+            location,
+            dataset,
+            snapshots,
+        }
+    }
+
+    /// Collapse consecutive runs of `snapshots`, given as pairs of name and
+    /// position within their dataset, into `first%last` ranges.
+    #[must_use]
+    pub fn get_ranges(snapshots: &[(&str, usize)]) -> Vec<String> {
+        let mut ranges: Vec<(&str, &str, usize)> = Vec::new();
+        for &(name, position) in snapshots {
+            match ranges.last_mut() {
+                Some((_, last, last_position)) if *last_position + 1 == position => {
+                    *last = name;
+                    *last_position = position;
+                }
+                _ => ranges.push((name, name, position)),
+            }
+        }
+        ranges
+            .into_iter()
+            .map(|(first, last, _)| {
+                if first == last {
+                    first.to_string()
+                } else {
+                    format!("{first}%{last}")
+                }
+            })
+            .collect()
+    }
+}
+
+impl BaseBuilder for DestroySnapshotsBuilder<'_> {
+    fn build(self) -> Result<Transaction, TransactionBuildError> {
+        let dataset_name = if self.dataset == "/" {
+            ""
+        } else {
+            &self.dataset
+        };
+        let argument = format!(
+            "{}{}@{}",
+            self.location.get_root_ref().as_str(),
+            dataset_name,
+            self.snapshots.join(",")
+        );
+        Ok(Transaction::new(
+            TransactionMeta::DestroySnapshots(DestroySnapshotsMeta {
+                host: self.location.get_route_ref().get_host_ref().to_string(),
+                dataset: self.dataset,
+                snapshots: self.snapshots,
+            }),
+            Command::new("zfs".to_string(), vec!["destroy".to_string(), argument])
+                .map_err(TransactionBuildError::Subprocess)?
+                .on_route(self.location.get_route_ref())
+                .map_err(TransactionBuildError::Subprocess)?,
+            true,
+        ))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::DestroySnapshotsBuilder;
+
+    #[test]
+    fn ranges() {
+        assert!(DestroySnapshotsBuilder::get_ranges(&[]).is_empty());
+        assert_eq!(
+            DestroySnapshotsBuilder::get_ranges(&[
+                ("a", 0),
+                ("b", 1),
+                ("c", 2),
+                ("e", 4),
+                ("g", 6),
+                ("h", 7)
+            ]),
+            vec!["a%c", "e", "g%h"]
+        );
+    }
+}
@@ -0,0 +1,154 @@
+use crate::config::Location;
+use crate::subprocess::Command;
+
+use super::super::basebuilder::BaseBuilder;
+use super::super::basemeta::BaseMeta;
+use super::super::errors::TransactionBuildError;
+use super::super::meta::TransactionMeta;
+use super::super::transaction::Transaction;
+
+const MARKER: &str = "estimate";
+
+#[derive(Clone)]
+pub struct EstimateMeta {
+    pub host: String,
+    pub count: usize,
+}
+
+impl BaseMeta for EstimateMeta {
+    fn to_description(&self, _color: bool, _si: bool) -> String {
+        format!("estimate: {} ({} transfers)", self.host, self.count)
+    }
+}
+
+/// Dry runs of several `zfs send` calls on one location within a single
+/// shell, each announced by a marker line so that failures of individual
+/// sends do not shift the sizes of the others.
+pub struct EstimateBuilder<'a> {
+    location: &'a Location,
+    sends: Vec<Vec<String>>,
+}
+
+impl<'a> EstimateBuilder<'a> {
+    /// `sends` holds the arguments of `zfs`, starting with `send`.
+    #[must_use]
+    pub const fn new(location: &'a Location, sends: Vec<Vec<String>>) -> Self {
+        Self { location, sends }
+    }
+
+    fn get_dry_run(send: &[String]) -> Result<Command, TransactionBuildError> {
+        let mut arguments = send.to_vec();
+        arguments.insert(1.min(arguments.len()), "-nP".to_string());
+        Command::new("zfs".to_string(), arguments).map_err(TransactionBuildError::Subprocess)
+    }
+
+    /// Approximate length of the shell fragment running the dry run of
+    /// `send`, i.e. its arguments plus quoting, marker and redirection.
+    #[must_use]
+    pub fn get_argument_length(send: &[String]) -> usize {
+        send.iter()
+            .map(|argument| argument.len() + 3)
+            .sum::<usize>()
+            + MARKER.len()
+            + 32
+    }
+
+    /// Sizes in bytes in order of the sends, `None` where a send failed.
+    #[must_use]
+    pub fn parse(data: &str, count: usize) -> Vec<Option<u64>> {
+        let mut sizes = vec![None; count];
+        let mut current = None;
+        for line in data.lines() {
+            let mut fields = line.split_whitespace();
+            match (fields.next(), fields.next()) {
+                (Some(MARKER), Some(index)) => current = index.parse::<usize>().ok(),
+                (Some("size"), Some(size)) => {
+                    if let Some(index) = current
+                        && index < count
+                    {
+                        sizes[index] = size.parse().ok();
+                    }
+                }
+                _ => {}
+            }
+        }
+        sizes
+    }
+}
+
+impl BaseBuilder for EstimateBuilder<'_> {
+    fn build(self) -> Result<Transaction, TransactionBuildError> {
+        let script = self
+            .sends
+            .iter()
+            .enumerate()
+            .map(|(index, send)| {
+                Ok(format!(
+                    "echo {MARKER} {index}; {} 2>&1",
+                    Self::get_dry_run(send)?.to_string()
+                ))
+            })
+            .collect::<Result<Vec<String>, TransactionBuildError>>()?
+            .join("; ");
+        Ok(Transaction::new(
+            TransactionMeta::Estimate(EstimateMeta {
+                host: self.location.get_route_ref().get_host_ref().to_string(),
+                count: self.sends.len(),
+            }),
+            Command::new("sh".to_string(), vec!["-c".to_string(), script])
+                .map_err(TransactionBuildError::Subprocess)?
+                .on_route(self.location.get_route_ref())
+                .map_err(TransactionBuildError::Subprocess)?,
+            false,
+        ))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::str::FromStr;
+
+    use crate::config::Location;
+
+    use super::super::super::basebuilder::BaseBuilder;
+    use super::EstimateBuilder;
+
+    fn send(args: &[&str]) -> Vec<String> {
+        args.iter().map(|s| s.to_string()).collect()
+    }
+
+    #[test]
+    fn command() {
+        let transaction = EstimateBuilder::new(
+            &Location::from_str("tank").unwrap(),
+            vec![
+                send(&["send", "-c", "tank@a"]),
+                send(&["send", "-t", "token"]),
+            ],
+        )
+        .build()
+        .unwrap();
+        assert_eq!(
+            transaction.to_json_row().command,
+            "sh -c 'echo estimate 0; zfs send -nP -c tank@a 2>&1; \
+             echo estimate 1; zfs send -nP -t token 2>&1'"
+        );
+    }
+
+    #[test]
+    fn parse() {
+        let data = "estimate 0\n\
+                    full\ttank@a\t1024\n\
+                    size\t1024\n\
+                    estimate 1\n\
+                    cannot open 'tank/b@x': dataset does not exist\n\
+                    estimate 2\n\
+                    incremental\ta\ttank/c@b\t2048\n\
+                    incremental\tb\ttank/c@c\t512\n\
+                    size\t2560\n";
+        assert_eq!(
+            EstimateBuilder::parse(data, 3),
+            vec![Some(1_024), None, Some(2_560)]
+        );
+    }
+}
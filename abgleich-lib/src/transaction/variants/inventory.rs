@@ -1,4 +1,5 @@
 use crate::config::Location;
+use crate::property::Projection;
 use crate::subprocess::Command;
 
 use super::super::basebuilder::BaseBuilder;
@@ -7,10 +8,25 @@ use super::super::errors::TransactionBuildError;
 use super::super::meta::TransactionMeta;
 use super::super::transaction::Transaction;
 
+/// Extent of an inventory.
+///
+/// The entire tree with all requested properties, a cheap listing of change
+/// indicators, selected datasets only, selected subtrees up to an optional
+/// depth, or just the names of those datasets among candidates which exist.
+#[derive(Clone)]
+pub enum InventoryScope {
+    Full,
+    Index,
+    Datasets(Vec<String>),
+    Subtrees(Vec<String>, Option<usize>),
+    Existing(Vec<String>),
+}
+
 #[derive(Clone)]
 pub struct InventoryMeta {
     pub host: String,
     pub root: String,
+    pub scope: InventoryScope,
 }
 
 impl InventoryMeta {
@@ -19,52 +35,271 @@ impl InventoryMeta {
         if !self.root.ends_with('/') {
             return data;
         }
-        let pattern = format!("{}\t", &self.root[..self.root.len() - 1]);
         let lines: Vec<&str> = data
             .split('\n')
-            .filter(|line| !line.starts_with(&pattern))
+            .filter(|line| !self.is_root_line(line))
             .collect();
         lines.join("\n")
     }
+
+    /// With a trailing slash, the root itself is not part of the inventory,
+    /// neither the dataset nor its snapshots, only its descendants.
+    #[must_use]
+    pub fn is_root_line(&self, line: &str) -> bool {
+        self.root.strip_suffix('/').is_some_and(|root| {
+            line.strip_prefix(root)
+                .is_some_and(|rest| rest.starts_with('\t') || rest.starts_with('@'))
+        })
+    }
 }
 
 impl BaseMeta for InventoryMeta {
     fn to_description(&self, _color: bool, _si: bool) -> String {
-        format!("inventory: {}:{}", self.host, self.root)
+        match &self.scope {
+            InventoryScope::Full => format!("inventory: {}:{}", self.host, self.root),
+            InventoryScope::Index => format!("inventory: {}:{} (index)", self.host, self.root),
+            InventoryScope::Datasets(names) => format!(
+                "inventory: {}:{} ({} datasets)",
+                self.host,
+                self.root,
+                names.len()
+            ),
+            InventoryScope::Subtrees(names, _) => format!(
+                "inventory: {}:{} ({} subtrees)",
+                self.host,
+                self.root,
+                names.len()
+            ),
+            InventoryScope::Existing(names) => format!(
+                "inventory: {}:{} ({} candidates)",
+                self.host,
+                self.root,
+                names.len()
+            ),
+        }
     }
 }
 
 pub struct InventoryBuilder<'a> {
     location: &'a Location,
+    projection: Projection,
+    scope: InventoryScope,
 }
 
 impl<'a> InventoryBuilder<'a> {
     #[must_use]
-    pub const fn new(location: &'a Location) -> Self {
-        Self { location }
+    pub const fn new(location: &'a Location, projection: Projection) -> Self {
+        Self {
+            location,
+            projection,
+            scope: InventoryScope::Full,
+        }
+    }
+
+    /// Lists the change indicators of all datasets and snapshots below the
+    /// root via `zfs list`, one line each, see `get_index_columns`.
+    #[must_use]
+    pub fn with_index(mut self) -> Self {
+        self.scope = InventoryScope::Index;
+        self
+    }
+
+    /// Restricts the inventory to `names`, absolute dataset names, and their
+    /// snapshots. Output concerning their children must be dropped by the caller.
+    #[must_use]
+    pub fn with_datasets(mut self, names: Vec<String>) -> Self {
+        self.scope = InventoryScope::Datasets(names);
+        self
+    }
+
+    /// Restricts the inventory to the subtrees below `names`, absolute dataset
+    /// names, with `depth` as in `zfs get -d` or entirely.
+    #[must_use]
+    pub fn with_subtrees(mut self, names: Vec<String>, depth: Option<usize>) -> Self {
+        self.scope = InventoryScope::Subtrees(names, depth);
+        self
+    }
+
+    /// Lists those of `names`, absolute dataset names, which exist, one per
+    /// line. Fails if any of them is missing, with all others still listed.
+    #[must_use]
+    pub fn with_existing(mut self, names: Vec<String>) -> Self {
+        self.scope = InventoryScope::Existing(names);
+        self
+    }
+
+    /// Columns of an index: name, creation txg and guid identify entities and
+    /// order snapshots, `written` plus all projected properties which may
+    /// change over time reveal modified datasets.
+    #[must_use]
+    pub fn get_index_columns(projection: Projection) -> Vec<&'static str> {
+        let mut columns = vec!["name", "createtxg", "guid", "written"];
+        columns.extend(
+            projection
+                .get_names()
+                .iter()
+                .filter(|name| !matches!(**name, "type" | "creation" | "guid" | "written")),
+        );
+        columns
+    }
+
+    fn get_arguments(&self) -> Vec<String> {
+        let root = self.location.get_root_ref().to_clean_string();
+        match &self.scope {
+            InventoryScope::Full => vec![
+                "get".to_string(),
+                "-rHp".to_string(),
+                self.projection.to_argument(),
+                root,
+            ],
+            InventoryScope::Index => vec![
+                "list".to_string(),
+                "-rHp".to_string(),
+                "-t".to_string(),
+                "filesystem,volume,snapshot".to_string(),
+                "-o".to_string(),
+                Self::get_index_columns(self.projection).join(","),
+                root,
+            ],
+            InventoryScope::Datasets(names) => {
+                let mut arguments = vec![
+                    "get".to_string(),
+                    "-Hp".to_string(),
+                    "-d".to_string(),
+                    "1".to_string(),
+                    self.projection.to_argument(),
+                ];
+                arguments.extend(names.iter().cloned());
+                arguments
+            }
+            InventoryScope::Subtrees(names, depth) => {
+                let mut arguments = vec!["get".to_string()];
+                match depth {
+                    Some(depth) => {
+                        arguments.extend(["-Hp".to_string(), "-d".to_string(), depth.to_string()]);
+                    }
+                    None => arguments.push("-rHp".to_string()),
+                }
+                arguments.push(self.projection.to_argument());
+                arguments.extend(names.iter().cloned());
+                arguments
+            }
+            InventoryScope::Existing(names) => {
+                let mut arguments = vec![
+                    "list".to_string(),
+                    "-H".to_string(),
+                    "-t".to_string(),
+                    "filesystem,volume".to_string(),
+                    "-o".to_string(),
+                    "name".to_string(),
+                ];
+                arguments.extend(names.iter().cloned());
+                arguments
+            }
+        }
     }
 }
 
 impl BaseBuilder for InventoryBuilder<'_> {
     fn build(self) -> Result<Transaction, TransactionBuildError> {
+        let arguments = self.get_arguments();
         Ok(Transaction::new(
             TransactionMeta::Inventory(InventoryMeta {
                 host: self.location.get_route_ref().get_host_ref().to_string(),
                 root: self.location.get_root_ref().to_string(),
+                scope: self.scope,
             }),
-            Command::new(
-                "zfs".to_string(),
-                vec![
-                    "get".to_string(),
-                    "-rHp".to_string(),
-                    "all".to_string(),
-                    self.location.get_root_ref().to_clean_string(),
-                ],
-            )
-            .map_err(TransactionBuildError::Subprocess)?
-            .on_route(self.location.get_route_ref())
-            .map_err(TransactionBuildError::Subprocess)?,
+            Command::new("zfs".to_string(), arguments)
+                .map_err(TransactionBuildError::Subprocess)?
+                .on_route(self.location.get_route_ref())
+                .map_err(TransactionBuildError::Subprocess)?,
             false,
         ))
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use std::str::FromStr;
+
+    use crate::config::Location;
+    use crate::property::Projection;
+
+    use super::super::super::basebuilder::BaseBuilder;
+    use super::{InventoryBuilder, InventoryMeta, InventoryScope};
+
+    fn meta(root: &str) -> InventoryMeta {
+        InventoryMeta {
+            host: "localhost".to_string(),
+            root: root.to_string(),
+            scope: InventoryScope::Full,
+        }
+    }
+
+    #[test]
+    fn root_without_slash_is_kept() {
+        assert!(!meta("tank").is_root_line("tank\ttype\tfilesystem\t-"));
+        assert!(!meta("tank").is_root_line("tank@a\ttype\tsnapshot\t-"));
+    }
+
+    #[test]
+    fn root_with_slash_is_dropped() {
+        assert!(meta("tank/").is_root_line("tank\ttype\tfilesystem\t-"));
+        assert!(meta("tank/").is_root_line("tank@a\ttype\tsnapshot\t-"));
+        assert!(!meta("tank/").is_root_line("tank/one\ttype\tfilesystem\t-"));
+        assert!(!meta("tank/").is_root_line("tanker\ttype\tfilesystem\t-"));
+    }
+
+    #[test]
+    fn handle_root_output_filters_lines() {
+        let data =
+            "tank\ttype\tfilesystem\t-\ntank@a\ttype\tsnapshot\t-\ntank/one\ttype\tfilesystem\t-";
+        assert_eq!(
+            meta("tank/").handle_root_output(data.to_string()),
+            "tank/one\ttype\tfilesystem\t-"
+        );
+    }
+
+    #[test]
+    fn scopes() {
+        let location = Location::from_str("tank/").unwrap();
+        let command = |builder: InventoryBuilder| builder.build().unwrap().to_json_row().command;
+        assert_eq!(
+            command(InventoryBuilder::new(&location, Projection::Sync)),
+            "zfs get -rHp 'type,creation,guid,abgleich:send,abgleich:sync' tank"
+        );
+        assert_eq!(
+            command(InventoryBuilder::new(&location, Projection::Sync).with_index()),
+            "zfs list -rHp -t 'filesystem,volume,snapshot' \
+             -o 'name,createtxg,guid,written,abgleich:send,abgleich:sync' tank"
+        );
+        assert_eq!(
+            command(
+                InventoryBuilder::new(&location, Projection::Sync)
+                    .with_datasets(vec!["tank/a".to_string(), "tank/b".to_string()])
+            ),
+            "zfs get -Hp -d 1 'type,creation,guid,abgleich:send,abgleich:sync' tank/a tank/b"
+        );
+        assert_eq!(
+            command(
+                InventoryBuilder::new(&location, Projection::Sync)
+                    .with_subtrees(vec!["tank/a".to_string()], Some(3))
+            ),
+            "zfs get -Hp -d 3 'type,creation,guid,abgleich:send,abgleich:sync' tank/a"
+        );
+        assert_eq!(
+            command(
+                InventoryBuilder::new(&location, Projection::Sync)
+                    .with_subtrees(vec!["tank/a".to_string(), "tank/b".to_string()], None)
+            ),
+            "zfs get -rHp 'type,creation,guid,abgleich:send,abgleich:sync' tank/a tank/b"
+        );
+        assert_eq!(
+            command(
+                InventoryBuilder::new(&location, Projection::Sync)
+                    .with_existing(vec!["tank/a".to_string()])
+            ),
+            "zfs list -H -t 'filesystem,volume' -o name tank/a"
+        );
+    }
+}
@@ -1,17 +1,26 @@
 mod createsnapshot;
+mod createsnapshots;
 mod destroysnapshot;
+mod destroysnapshots;
 mod diff;
+mod estimate;
 mod inventory;
+mod transfer;
 mod transferincremental;
 mod transferinitial;
+mod transferresume;
 mod which;
 mod zpoollist;
 
 pub use createsnapshot::{CreateSnapshotBuilder, CreateSnapshotMeta};
+pub use createsnapshots::{CreateSnapshotsBuilder, CreateSnapshotsMeta};
 pub use destroysnapshot::{DestroySnapshotBuilder, DestroySnapshotMeta};
+pub use destroysnapshots::{DestroySnapshotsBuilder, DestroySnapshotsMeta};
 pub use diff::{DiffBuilder, DiffMeta};
-pub use inventory::{InventoryBuilder, InventoryMeta};
+pub use estimate::{EstimateBuilder, EstimateMeta};
+pub use inventory::{InventoryBuilder, InventoryMeta, InventoryScope};
 pub use transferincremental::{TransferIncrementalBuilder, TransferIncrementalMeta};
 pub use transferinitial::{TransferInitialBuilder, TransferInitialMeta};
+pub use transferresume::{TransferResumeBuilder, TransferResumeMeta};
 pub use which::{WhichBuilder, WhichMeta};
 pub use zpoollist::{ZpoolListBuilder, ZpoolListMeta};
@@ -0,0 +1,223 @@
+use crate::config::{InsecureHost, Location, Route, TransferOptions};
+use crate::property::SendValue;
+use crate::subprocess::{Command, CommandChain, Relay};
+
+use super::super::errors::TransactionBuildError;
+use super::super::meta::TransactionMeta;
+use super::super::transaction::Transaction;
+
+/// Pipeline shared by all transfers: `zfs send`, optional compression codec and
+/// rate limit on the source, `zfs receive` on the target. The receiving side
+/// always runs with `-s` so that interrupted transfers leave a resume token.
+pub struct TransferPipeline<'a> {
+    source: &'a Location,
+    target: &'a Location,
+    dataset: &'a str,
+    options: &'a TransferOptions,
+}
+
+impl<'a> TransferPipeline<'a> {
+    #[must_use]
+    pub const fn new(
+        source: &'a Location,
+        target: &'a Location,
+        dataset: &'a str,
+        options: &'a TransferOptions,
+    ) -> Self {
+        Self {
+            source,
+            target,
+            dataset,
+            options,
+        }
+    }
+
+    /// `zfs send` including flags shared by all full and incremental streams
+    /// and those of the send profile of the dataset.
+    #[must_use]
+    pub fn get_send_args(&self, send: SendValue) -> Vec<String> {
+        let mut args = vec!["send".to_string()];
+        // -c (send compressed blocks) is mutually exclusive with any codec:
+        // feeding already-compressed data into it degrades its efficiency.
+        if self.options.codec.is_none() {
+            args.push("-c".to_string());
+        }
+        args.extend(send.to_args());
+        args
+    }
+
+    #[must_use]
+    pub fn get_source_snapshot(&self, snapshot: &str) -> String {
+        format!(
+            "{}{}@{}",
+            self.source.get_root_ref().as_str(),
+            self.dataset,
+            snapshot
+        )
+    }
+
+    pub fn build(
+        self,
+        meta: TransactionMeta,
+        zfs_send_args: Vec<String>,
+    ) -> Result<Transaction, TransactionBuildError> {
+        let source = self.source;
+        let send = zfs_send_args.clone();
+        self.build_pipeline(meta, zfs_send_args)
+            .map(|transaction| transaction.with_send(source, send))
+    }
+
+    fn build_pipeline(
+        self,
+        meta: TransactionMeta,
+        zfs_send_args: Vec<String>,
+    ) -> Result<Transaction, TransactionBuildError> {
+        let mut send_cmds = vec![
+            Command::new("zfs".to_string(), zfs_send_args)
+                .map_err(TransactionBuildError::Subprocess)?,
+        ];
+        if let Some(codec) = self.options.codec.get_command() {
+            send_cmds.push(
+                Command::new(codec.to_string(), self.options.codec.get_compress_args())
+                    .map_err(TransactionBuildError::Subprocess)?,
+            );
+        }
+        if let Some(rate) = self.options.rate_limit
+            && !self.options.relay
+        {
+            send_cmds.push(
+                Command::new(
+                    "pv".to_string(),
+                    vec!["-q".to_string(), "-L".to_string(), rate.to_string()],
+                )
+                .map_err(TransactionBuildError::Subprocess)?,
+            );
+        }
+        let mut recv_cmds = Vec::new();
+        if let Some(codec) = self.options.codec.get_command() {
+            recv_cmds.push(
+                Command::new(codec.to_string(), self.options.codec.get_decompress_args())
+                    .map_err(TransactionBuildError::Subprocess)?,
+            );
+        }
+        recv_cmds.push(
+            Command::new(
+                "zfs".to_string(),
+                vec![
+                    "receive".to_string(),
+                    "-s".to_string(),
+                    format!("{}{}", self.target.get_root_ref().as_str(), self.dataset),
+                ],
+            )
+            .map_err(TransactionBuildError::Subprocess)?,
+        );
+        // Relay path: both ends spawned separately, streams connected in-process.
+        if self.options.relay {
+            return self.relay(meta, send_cmds, recv_cmds);
+        }
+        // nc (insecure) path: receiver listens with nc, sender connects with nc.
+        if let Some(insecure) = &self.options.insecure {
+            return self.insecure(insecure, meta, send_cmds, recv_cmds);
+        }
+        // SSH pipe path (direct or default).
+        self.secure(meta, send_cmds, recv_cmds)
+    }
+
+    fn check_direct_route(route: &Route) -> Result<(), TransactionBuildError> {
+        if route.has_consecutive_duplicates() {
+            return Err(TransactionBuildError::DirectConsecutiveDuplicateHosts(
+                route.to_string(),
+            ));
+        }
+        Ok(())
+    }
+
+    fn insecure(
+        &self,
+        insecure: &InsecureHost,
+        meta: TransactionMeta,
+        mut send_cmds: Vec<Command>,
+        recv_cmds: Vec<Command>,
+    ) -> Result<Transaction, TransactionBuildError> {
+        send_cmds.push(
+            Command::new(
+                "nc".to_string(),
+                vec![insecure.hostname.clone(), insecure.port.to_string()],
+            )
+            .map_err(TransactionBuildError::Subprocess)?,
+        );
+        let mut listen_cmds = vec![
+            Command::new(
+                "nc".to_string(),
+                vec!["-l".to_string(), insecure.port.to_string()],
+            )
+            .map_err(TransactionBuildError::Subprocess)?,
+        ];
+        listen_cmds.extend(recv_cmds);
+        Ok(Transaction::new(
+            meta,
+            CommandChain::begin_group(self.source, send_cmds)
+                .with_background_group(self.target, listen_cmds)
+                .to_command()
+                .map_err(TransactionBuildError::Subprocess)?,
+            true,
+        ))
+    }
+
+    fn relay(
+        &self,
+        meta: TransactionMeta,
+        send_cmds: Vec<Command>,
+        recv_cmds: Vec<Command>,
+    ) -> Result<Transaction, TransactionBuildError> {
+        Ok(Transaction::from_relay(
+            meta,
+            Relay::new(
+                CommandChain::group_to_command(self.source, send_cmds)
+                    .map_err(TransactionBuildError::Subprocess)?,
+                CommandChain::group_to_command(self.target, recv_cmds)
+                    .map_err(TransactionBuildError::Subprocess)?,
+            )
+            .with_rate_limit(self.options.rate_limit)
+            .with_buffer(self.options.buffer),
+            true,
+        ))
+    }
+
+    fn secure(
+        &self,
+        meta: TransactionMeta,
+        send_cmds: Vec<Command>,
+        recv_cmds: Vec<Command>,
+    ) -> Result<Transaction, TransactionBuildError> {
+        let (entry_route, source_relative, target_relative) = if self.options.direct {
+            Self::check_direct_route(self.source.get_route_ref())?;
+            Self::check_direct_route(self.target.get_route_ref())?;
+            let (entry_route, source_route, target_route) = Route::split_common_prefix(
+                self.source.get_route_ref(),
+                self.target.get_route_ref(),
+            );
+            (
+                entry_route,
+                self.source.with_route(source_route),
+                self.target.with_route(target_route),
+            )
+        } else {
+            (
+                Route::from_localhost(None),
+                self.source.clone(),
+                self.target.clone(),
+            )
+        };
+        Ok(Transaction::new(
+            meta,
+            CommandChain::begin_group(&source_relative, send_cmds)
+                .pipe_group(&target_relative, recv_cmds)
+                .with_entry_route(entry_route)
+                .map_err(TransactionBuildError::Subprocess)?
+                .to_command()
+                .map_err(TransactionBuildError::Subprocess)?,
+            true,
+        ))
+    }
+}
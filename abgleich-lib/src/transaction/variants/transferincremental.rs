@@ -1,5 +1,5 @@
-use crate::config::{InsecureHost, Location, Route, TransferOptions};
-use crate::subprocess::{Command, CommandChain};
+use crate::config::{Location, TransferOptions};
+use crate::property::SendValue;
 
 use super::super::basebuilder::BaseBuilder;
 use super::super::basemeta::BaseMeta;
@@ -7,6 +7,8 @@ use super::super::errors::TransactionBuildError;
 use super::super::meta::TransactionMeta;
 use super::super::transaction::Transaction;
 
+use super::transfer::TransferPipeline;
+
 #[derive(Clone)]
 pub struct TransferIncrementalMeta {
     pub source_host: String,
@@ -14,13 +16,33 @@ pub struct TransferIncrementalMeta {
     pub dataset: String,
     pub from_snapshot: String,
     pub to_snapshot: String,
+    pub range: bool,
+    pub shared_hosts: Vec<String>, // further targets receiving the same stream
+}
+
+impl TransferIncrementalMeta {
+    /// All targets, separated by commas.
+    #[must_use]
+    pub fn get_target_hosts(&self) -> String {
+        let mut hosts = self.target_host.clone();
+        for host in &self.shared_hosts {
+            hosts.push(',');
+            hosts.push_str(host);
+        }
+        hosts
+    }
 }
 
 impl BaseMeta for TransferIncrementalMeta {
     fn to_description(&self, _color: bool, _si: bool) -> String {
         format!(
-            "transfer followup: {}:{}@{}..{}->{}",
-            self.source_host, self.dataset, self.from_snapshot, self.to_snapshot, self.target_host,
+            "transfer {}: {}:{}@{}..{}->{}",
+            if self.range { "range" } else { "followup" },
+            self.source_host,
+            self.dataset,
+            self.from_snapshot,
+            self.to_snapshot,
+            self.get_target_hosts(),
         )
     }
 }
@@ -32,6 +54,7 @@ pub struct TransferIncrementalBuilder<'a> {
     from_snapshot: String,
     to_snapshot: String,
     options: &'a TransferOptions,
+    send: SendValue,
 }
 
 impl<'a> TransferIncrementalBuilder<'a> {
@@ -51,207 +74,43 @@ impl<'a> TransferIncrementalBuilder<'a> {
             from_snapshot,
             to_snapshot,
             options,
+            send: SendValue::new(),
         }
     }
 
-    fn check_direct_route(route: &Route) -> Result<(), TransactionBuildError> {
-        if route.has_consecutive_duplicates() {
-            return Err(TransactionBuildError::DirectConsecutiveDuplicateHosts(
-                route.to_string(),
-            ));
-        }
-        Ok(())
+    /// Send profile of the dataset, see `Dataset::get_send_option`.
+    #[must_use]
+    pub const fn with_send(mut self, send: SendValue) -> Self {
+        self.send = send;
+        self
     }
 
-    fn insecure(self, insecure: &InsecureHost) -> Result<Transaction, TransactionBuildError> {
-        let mut zfs_send_args = vec!["send".to_string()];
-        if self.options.compress.is_none() {
-            zfs_send_args.push("-c".to_string());
-        }
-        zfs_send_args.extend([
-            "-i".to_string(),
-            format!(
-                "{}{}@{}",
-                self.source.get_root_ref().as_str(),
-                self.dataset,
-                self.from_snapshot
-            ),
-            format!(
-                "{}{}@{}",
-                self.source.get_root_ref().as_str(),
-                self.dataset,
-                self.to_snapshot
-            ),
-        ]);
-        let mut send_cmds = vec![
-            Command::new("zfs".to_string(), zfs_send_args)
-                .map_err(TransactionBuildError::Subprocess)?,
-        ];
-        if let Some(level) = self.options.compress {
-            send_cmds.push(
-                Command::new("xz".to_string(), vec![format!("-{level}")])
-                    .map_err(TransactionBuildError::Subprocess)?,
-            );
-        }
-        if let Some(rate) = self.options.rate_limit {
-            send_cmds.push(
-                Command::new(
-                    "pv".to_string(),
-                    vec!["-q".to_string(), "-L".to_string(), rate.to_string()],
-                )
-                .map_err(TransactionBuildError::Subprocess)?,
-            );
-        }
-        send_cmds.push(
-            Command::new(
-                "nc".to_string(),
-                vec![insecure.hostname.clone(), insecure.port.to_string()],
-            )
-            .map_err(TransactionBuildError::Subprocess)?,
-        );
-
-        let mut recv_cmds = vec![
-            Command::new(
-                "nc".to_string(),
-                vec!["-l".to_string(), insecure.port.to_string()],
-            )
-            .map_err(TransactionBuildError::Subprocess)?,
-        ];
-        if self.options.compress.is_some() {
-            recv_cmds.push(
-                Command::new("xz".to_string(), vec!["-d".to_string()])
-                    .map_err(TransactionBuildError::Subprocess)?,
-            );
-        }
-        recv_cmds.push(
-            Command::new(
-                "zfs".to_string(),
-                vec![
-                    "receive".to_string(),
-                    format!("{}{}", self.target.get_root_ref().as_str(), self.dataset),
-                ],
-            )
-            .map_err(TransactionBuildError::Subprocess)?,
-        );
-        Ok(Transaction::new(
-            TransactionMeta::TransferIncremental(TransferIncrementalMeta {
-                source_host: self.source.get_route_ref().get_host_ref().to_string(),
-                target_host: self.target.get_route_ref().get_host_ref().to_string(),
-                dataset: self.dataset,
-                from_snapshot: self.from_snapshot,
-                to_snapshot: self.to_snapshot,
-            }),
-            CommandChain::begin_group(self.source, send_cmds)
-                .with_background_group(self.target, recv_cmds)
-                .to_command()
-                .map_err(TransactionBuildError::Subprocess)?,
-            true,
-        ))
+    /// `-I` sends all intermediary snapshots between both ends as one stream.
+    const fn get_incremental_flag(&self) -> &'static str {
+        if self.options.range { "-I" } else { "-i" }
     }
+}
 
-    fn secure(self) -> Result<Transaction, TransactionBuildError> {
-        let (entry_route, source_relative, target_relative) = if self.options.direct {
-            Self::check_direct_route(self.source.get_route_ref())?;
-            Self::check_direct_route(self.target.get_route_ref())?;
-            let (entry_route, source_route, target_route) = Route::split_common_prefix(
-                self.source.get_route_ref(),
-                self.target.get_route_ref(),
-            );
-            (
-                entry_route,
-                self.source.with_route(source_route),
-                self.target.with_route(target_route),
-            )
-        } else {
-            (
-                Route::from_localhost(None),
-                self.source.clone(),
-                self.target.clone(),
-            )
-        };
-        let mut zfs_send_args = vec!["send".to_string()];
-        // -c (send compressed blocks) is mutually exclusive with xz: feeding
-        // already-compressed data into xz degrades its efficiency.
-        if self.options.compress.is_none() {
-            zfs_send_args.push("-c".to_string());
-        }
+impl BaseBuilder for TransferIncrementalBuilder<'_> {
+    fn build(self) -> Result<Transaction, TransactionBuildError> {
+        let pipeline = TransferPipeline::new(self.source, self.target, &self.dataset, self.options);
+        let mut zfs_send_args = pipeline.get_send_args(self.send);
         zfs_send_args.extend([
-            "-i".to_string(),
-            format!(
-                "{}{}@{}",
-                self.source.get_root_ref().as_str(),
-                self.dataset,
-                self.from_snapshot
-            ),
-            format!(
-                "{}{}@{}",
-                self.source.get_root_ref().as_str(),
-                self.dataset,
-                self.to_snapshot
-            ),
+            self.get_incremental_flag().to_string(),
+            pipeline.get_source_snapshot(&self.from_snapshot),
+            pipeline.get_source_snapshot(&self.to_snapshot),
         ]);
-        let mut src_cmds = vec![
-            Command::new("zfs".to_string(), zfs_send_args)
-                .map_err(TransactionBuildError::Subprocess)?,
-        ];
-        if let Some(level) = self.options.compress {
-            src_cmds.push(
-                Command::new("xz".to_string(), vec![format!("-{level}")])
-                    .map_err(TransactionBuildError::Subprocess)?,
-            );
-        }
-        if let Some(rate) = self.options.rate_limit {
-            src_cmds.push(
-                Command::new(
-                    "pv".to_string(),
-                    vec!["-q".to_string(), "-L".to_string(), rate.to_string()],
-                )
-                .map_err(TransactionBuildError::Subprocess)?,
-            );
-        }
-        let mut tgt_cmds = Vec::new();
-        if self.options.compress.is_some() {
-            tgt_cmds.push(
-                Command::new("xz".to_string(), vec!["-d".to_string()])
-                    .map_err(TransactionBuildError::Subprocess)?,
-            );
-        }
-        tgt_cmds.push(
-            Command::new(
-                "zfs".to_string(),
-                vec![
-                    "receive".to_string(),
-                    format!("{}{}", self.target.get_root_ref().as_str(), self.dataset),
-                ],
-            )
-            .map_err(TransactionBuildError::Subprocess)?,
-        );
-        Ok(Transaction::new(
+        pipeline.build(
             TransactionMeta::TransferIncremental(TransferIncrementalMeta {
                 source_host: self.source.get_route_ref().get_host_ref().to_string(),
                 target_host: self.target.get_route_ref().get_host_ref().to_string(),
-                dataset: self.dataset,
-                from_snapshot: self.from_snapshot,
-                to_snapshot: self.to_snapshot,
+                shared_hosts: Vec::new(),
+                dataset: self.dataset.clone(),
+                from_snapshot: self.from_snapshot.clone(),
+                to_snapshot: self.to_snapshot.clone(),
+                range: self.options.range,
             }),
-            CommandChain::begin_group(&source_relative, src_cmds)
-                .pipe_group(&target_relative, tgt_cmds)
-                .with_entry_route(entry_route)
-                .map_err(TransactionBuildError::Subprocess)?
-                .to_command()
-                .map_err(TransactionBuildError::Subprocess)?,
-            true,
-        ))
-    }
-}
-
-impl BaseBuilder for TransferIncrementalBuilder<'_> {
-    fn build(self) -> Result<Transaction, TransactionBuildError> {
-        // nc (insecure) path: receiver listens with nc, sender connects with nc.
-        if let Some(insecure) = &self.options.insecure {
-            return self.insecure(insecure);
-        }
-        // SSH pipe path (direct or default).
-        self.secure()
+            zfs_send_args,
+        )
     }
 }
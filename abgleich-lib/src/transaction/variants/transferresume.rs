@@ -0,0 +1,82 @@
+use crate::config::{Location, TransferOptions};
+
+use super::super::basebuilder::BaseBuilder;
+use super::super::basemeta::BaseMeta;
+use super::super::errors::TransactionBuildError;
+use super::super::meta::TransactionMeta;
+use super::super::transaction::Transaction;
+
+use super::transfer::TransferPipeline;
+
+#[derive(Clone)]
+pub struct TransferResumeMeta {
+    pub source_host: String,
+    pub target_host: String,
+    pub dataset: String,
+    pub initial: bool,
+}
+
+impl BaseMeta for TransferResumeMeta {
+    fn to_description(&self, _color: bool, _si: bool) -> String {
+        format!(
+            "transfer resume: {}:{}->{}",
+            self.source_host, self.dataset, self.target_host,
+        )
+    }
+}
+
+/// Continues an interrupted transfer from the `receive_resume_token` of the
+/// partially received dataset on the target.
+pub struct TransferResumeBuilder<'a> {
+    source: &'a Location,
+    target: &'a Location,
+    dataset: String,
+    token: String,
+    initial: bool,
+    options: &'a TransferOptions,
+}
+
+impl<'a> TransferResumeBuilder<'a> {
+    #[must_use]
+    pub const fn new(
+        source: &'a Location,
+        target: &'a Location,
+        dataset: String,
+        token: String,
+        options: &'a TransferOptions,
+    ) -> Self {
+        Self {
+            source,
+            target,
+            dataset,
+            token,
+            initial: false,
+            options,
+        }
+    }
+
+    /// Marks the interrupted transfer as an initial one, i.e. the dataset
+    /// only becomes usable on the target once the transfer completes.
+    #[must_use]
+    pub const fn with_initial(mut self, initial: bool) -> Self {
+        self.initial = initial;
+        self
+    }
+}
+
+impl BaseBuilder for TransferResumeBuilder<'_> {
+    fn build(self) -> Result<Transaction, TransactionBuildError> {
+        let pipeline = TransferPipeline::new(self.source, self.target, &self.dataset, self.options);
+        // The token carries the flags of the original stream, -c included,
+        // and `zfs send -t` does not accept them again.
+        pipeline.build(
+            TransactionMeta::TransferResume(TransferResumeMeta {
+                source_host: self.source.get_route_ref().get_host_ref().to_string(),
+                target_host: self.target.get_route_ref().get_host_ref().to_string(),
+                dataset: self.dataset.clone(),
+                initial: self.initial,
+            }),
+            vec!["send".to_string(), "-t".to_string(), self.token.clone()],
+        )
+    }
+}
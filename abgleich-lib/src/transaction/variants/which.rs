@@ -10,24 +10,43 @@ use super::super::transaction::Transaction;
 #[derive(Clone)]
 pub struct WhichMeta {
     pub host: String,
-    pub command: String,
+    pub commands: Vec<String>,
 }
 
 impl BaseMeta for WhichMeta {
     fn to_description(&self, _color: bool, _si: bool) -> String {
-        format!("which: {} ({})", self.command, self.host)
+        format!("which: {} ({})", self.commands.join(","), self.host)
     }
 }
 
+/// Looks up several executables on a route with a single `which` call.
 pub struct WhichBuilder<'a> {
     route: &'a Route,
-    command: String,
+    commands: Vec<String>,
 }
 
 impl<'a> WhichBuilder<'a> {
     #[must_use]
-    pub const fn new(route: &'a Route, command: String) -> Self {
-        Self { route, command }
+    pub const fn new(route: &'a Route, commands: Vec<String>) -> Self {
+        Self { route, commands }
+    }
+
+    /// Commands found according to the output of `which`, which lists the
+    /// paths of found commands only, regardless of its exit status.
+    #[must_use]
+    pub fn get_found(data: &str, commands: &[String]) -> Vec<String> {
+        commands
+            .iter()
+            .filter(|command| {
+                data.lines().map(str::trim).any(|line| {
+                    line == command.as_str()
+                        || line
+                            .rsplit_once('/')
+                            .is_some_and(|(_, name)| name == command.as_str())
+                })
+            })
+            .cloned()
+            .collect()
     }
 }
 
@@ -36,9 +55,9 @@ impl BaseBuilder for WhichBuilder<'_> {
         Ok(Transaction::new(
             TransactionMeta::Which(WhichMeta {
                 host: self.route.get_host_ref().to_string(),
-                command: self.command.clone(),
+                commands: self.commands.clone(),
             }),
-            Command::new("which".to_string(), vec![self.command])
+            Command::new("which".to_string(), self.commands)
                 .map_err(TransactionBuildError::Subprocess)?
                 .on_route(self.route)
                 .map_err(TransactionBuildError::Subprocess)?,
@@ -46,3 +65,18 @@ impl BaseBuilder for WhichBuilder<'_> {
         ))
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::WhichBuilder;
+
+    #[test]
+    fn found() {
+        let commands = vec!["zfs".to_string(), "pv".to_string(), "xz".to_string()];
+        assert_eq!(
+            WhichBuilder::get_found("/usr/sbin/zfs\n/usr/bin/xz\n", &commands),
+            vec!["zfs".to_string(), "xz".to_string()]
+        );
+        assert!(WhichBuilder::get_found("/usr/bin/pvx\n", &commands).is_empty());
+    }
+}
@@ -3,6 +3,7 @@ from ._command import Command  # noqa
 from ._config import (
     Apool,  # noqa
     Config,  # noqa
+    Job,  # noqa
 )
 from ._const import (
     CONFIG_FN,  # noqa
@@ -56,12 +57,16 @@ from ._testconfig import (
 from ._threads import threads  # noqa
 from ._transaction import (  # noqa
     CreateSnapshotTransaction,  # noqa
+    CreateSnapshotsTransaction,  # noqa
     DestroySnapshotTransaction,  # noqa
+    DestroySnapshotsTransaction,  # noqa
     Transaction,  # noqa
     DiffTransaction,  # noqa
     InventoryTransaction,  # noqa
     TransferIncrementalTransaction,  # noqa
     TransferInitialTransaction,  # noqa
+    TransferRangeTransaction,  # noqa
+    TransferResumeTransaction,  # noqa
     WhichTransaction,  # noqa
     ZpoolListTransaction,  # noqa
 )
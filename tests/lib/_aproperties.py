@@ -48,7 +48,8 @@ class AProperties:
         diff: Optional[bool] = None,
         threshold: Optional[int] = None,  # bytes
         snap: Optional[Snap] = None,
-        sync: Optional[bool] = None
+        sync: Optional[bool] = None,
+        send: Optional[str] = None,  # comma-separated profile, e.g. "large-block,embedded"
     ):
         """
         init
@@ -60,6 +61,7 @@ class AProperties:
         self._prop_threshold = threshold
         self._prop_snap = snap
         self._prop_sync = sync
+        self._prop_send = send
 
     @property
     def format_(self) -> Optional[str]:
@@ -109,6 +111,14 @@ class AProperties:
 
         return self._prop_sync
 
+    @property
+    def send(self) -> Optional[str]:
+        """
+        send property
+        """
+
+        return self._prop_send
+
     def _set_deserialized(self, attr: str, value: str):
         """
         set property by attr name as correct type
@@ -61,6 +61,52 @@ class Apool:
         return f"{'/'.join(self._route):s}:{user:s}{self._root:s}"
 
 
+@typechecked
+class Job:
+    """
+    represent a replication of a source into one or more targets
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source: str,
+        targets: List[str],
+    ):
+        """
+        init
+        """
+
+        self._name = name
+        self._source = source
+        self._targets = targets
+
+    def __repr__(self) -> str:
+        """
+        interactive representation
+        """
+
+        return f"<Job name={self._name:s} source={self._source:s} targets={','.join(self._targets):s}>"
+
+    @property
+    def name(self) -> str:
+        """
+        name
+        """
+
+        return self._name
+
+    def to_serializable(self) -> dict:
+        """
+        to serializable data
+        """
+
+        return dict(
+            source = self._source,
+            targets = list(self._targets),
+        )
+
+
 @typechecked
 class Config:
     """
@@ -70,12 +116,14 @@ class Config:
     def __init__(
         self,
         apools: Optional[List[Apool]] = None,
+        jobs: Optional[List[Job]] = None,
     ):
         """
         init
         """
 
         self._apools = {} if apools is None else {apool.alias: apool for apool in apools}
+        self._jobs = {} if jobs is None else {job.name: job for job in jobs}
 
     def __repr__(self) -> str:
         """
@@ -129,9 +177,15 @@ class Config:
         to serializable data
         """
 
-        return dict(
+        serializable = dict(
             apools = {
                 alias: apool.to_serializable()
                 for alias, apool in self._apools.items()
             },
         )
+        if len(self._jobs) > 0:
+            serializable["jobs"] = {
+                name: job.to_serializable()
+                for name, job in self._jobs.items()
+            }
+        return serializable
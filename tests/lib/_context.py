@@ -249,7 +249,28 @@ class Context:
         raw = raw.split(b'{"run":true}\n')[0]
 
         data = cls.parse_raw_json(raw) if json else cls.parse_raw_table(raw)
-        return [Transaction.from_fields(**entry) for entry in data]
+        return [Transaction.from_fields(**entry) for entry in data if not cls._is_total(entry)]
+
+    @classmethod
+    def parse_estimate_total(cls, raw: bytes, json: bool = False) -> Union[int, str]:
+        """
+        parse total of estimated transfer sizes from output of `abgleich sync --estimate`
+        """
+
+        raw = raw.split(b'{"run":true}\n')[0]
+
+        data = cls.parse_raw_json(raw) if json else cls.parse_raw_table(raw)
+        totals = [entry for entry in data if cls._is_total(entry)]
+        assert len(totals) == 1
+        return totals[0]["total"]["estimate"] if json else totals[0]["estimate"]
+
+    @staticmethod
+    def _is_total(entry: Dict[str, Any]) -> bool:
+        """
+        json line or table row holding totals instead of a transaction
+        """
+
+        return "total" in entry or entry.get("description") == "total"
 
     def _print_test_close(self, *args: str, res: Result, width: int):
         """
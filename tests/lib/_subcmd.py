@@ -10,10 +10,12 @@ class Subcmd(Enum):
 
     free = auto()
     ls = auto()
+    run = auto()
     snap = auto()
     sync = auto()
 
     version = auto()
+    watch = auto()
 
     @classmethod
     def all(cls):
@@ -1,6 +1,6 @@
 import re
 from abc import ABC, abstractmethod
-from typing import Self
+from typing import Optional, Self, Union
 
 from typeguard import typechecked
 
@@ -20,27 +20,36 @@ class Transaction(ABC):
         Transaction._ALL.append(cls)
 
     @abstractmethod
-    def __init__(self, command: str):
+    def __init__(self, command: str, estimate: Optional[Union[int, str]] = None):
         self._command = command
+        self._estimate = estimate
 
     @property
     def command(self) -> str:
         return self._command
 
+    @property
+    def estimate(self) -> Optional[Union[int, str]]:
+        """
+        estimated stream size, bytes in json, formatted in tables
+        """
+
+        return self._estimate
+
     @classmethod
     @abstractmethod
     def matches(cls, description: str):
         raise NotImplementedError
 
     @classmethod
-    def from_fields(cls, description: str, command: str) -> Self:
+    def from_fields(cls, description: str, command: str, **kwargs) -> Self:
         """
         dispatch a description string to the matching transaction class
         """
 
         matched = [cls for cls in cls._ALL if cls.matches(description)]
         if len(matched) == 1:
-            return matched[0](description = description, command = command)
+            return matched[0](description = description, command = command, **kwargs)
         raise ValueError(f"no unique match for description: {description!r}")
 
 
@@ -86,6 +95,49 @@ class CreateSnapshotTransaction(Transaction):
         return self._written
 
 
+@typechecked
+class CreateSnapshotsTransaction(Transaction):
+    """
+    format: "create snapshots: HOST:DATASET@SNAPSHOT,DATASET@SNAPSHOT,... (WRITTEN)"
+    """
+
+    _PREFIX = "create snapshots: "
+    _PATTERN = re.compile(
+        r"^create snapshots: (?P<host>[^:]+):(?P<snapshots>[^ ]+) \((?P<written>[^)]+)\)$"
+    )
+
+    def __init__(self, description: str, **kwargs):
+        super().__init__(**kwargs)
+        m = self._PATTERN.fullmatch(description)
+        if m is None:
+            raise ValueError(f"unexpected description: {description!r}")
+        self._host = m.group("host")
+        self._snapshots = [
+            tuple(entry.split("@", 1)) for entry in m.group("snapshots").split(",")
+        ]
+        self._written = m.group("written")
+
+    @classmethod
+    def matches(cls, description: str) -> bool:
+        return description.startswith(cls._PREFIX)
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def snapshots(self) -> list[tuple[str, str]]:
+        """
+        pairs of dataset and snapshot name
+        """
+
+        return self._snapshots
+
+    @property
+    def written(self) -> str:
+        return self._written
+
+
 @typechecked
 class DestroySnapshotTransaction(Transaction):
     """
@@ -123,6 +175,47 @@ class DestroySnapshotTransaction(Transaction):
         return self._snapshot
 
 
+@typechecked
+class DestroySnapshotsTransaction(Transaction):
+    """
+    format: "destroy snapshots: HOST:DATASET@SNAPSHOT,FIRST%LAST,..."
+    """
+
+    _PREFIX = "destroy snapshots: "
+    _PATTERN = re.compile(
+        r"^destroy snapshots: (?P<host>[^:]+):(?P<dataset>[^@]*)@(?P<snapshots>\S+)$"
+    )
+
+    def __init__(self, description: str, **kwargs):
+        super().__init__(**kwargs)
+        m = self._PATTERN.fullmatch(description)
+        if m is None:
+            raise ValueError(f"unexpected description: {description!r}")
+        self._host = m.group("host")
+        self._dataset = m.group("dataset")
+        self._snapshots = m.group("snapshots").split(",")
+
+    @classmethod
+    def matches(cls, description: str) -> bool:
+        return description.startswith(cls._PREFIX)
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def dataset(self) -> str:
+        return self._dataset
+
+    @property
+    def snapshots(self) -> list[str]:
+        """
+        snapshot names and ranges of the form ``FIRST%LAST``
+        """
+
+        return self._snapshots
+
+
 @typechecked
 class DiffTransaction(Transaction):
     """
@@ -239,6 +332,18 @@ class TransferIncrementalTransaction(Transaction):
         return self._target_host
 
 
+@typechecked
+class TransferRangeTransaction(TransferIncrementalTransaction):
+    """
+    format: "transfer range: SOURCE_HOST:DATASET@FROM_SNAPSHOT..TO_SNAPSHOT->TARGET_HOST"
+    """
+
+    _PREFIX = "transfer range: "
+    _PATTERN = re.compile(
+        r"^transfer range: (?P<source_host>[^:]+):(?P<dataset>[^@]*)@(?P<from_snapshot>.+?)\.\.(?P<to_snapshot>.+?)->(?P<target_host>.+)$"
+    )
+
+
 @typechecked
 class TransferInitialTransaction(Transaction):
     """
@@ -281,6 +386,43 @@ class TransferInitialTransaction(Transaction):
         return self._target_host
 
 
+@typechecked
+class TransferResumeTransaction(Transaction):
+    """
+    format: "transfer resume: SOURCE_HOST:DATASET->TARGET_HOST"
+    """
+
+    _PREFIX = "transfer resume: "
+    _PATTERN = re.compile(
+        r"^transfer resume: (?P<source_host>[^:]+):(?P<dataset>.*?)->(?P<target_host>.+)$"
+    )
+
+    def __init__(self, description: str, **kwargs):
+        super().__init__(**kwargs)
+        m = self._PATTERN.fullmatch(description)
+        if m is None:
+            raise ValueError(f"unexpected description: {description!r}")
+        self._source_host = m.group("source_host")
+        self._dataset = m.group("dataset")
+        self._target_host = m.group("target_host")
+
+    @classmethod
+    def matches(cls, description: str) -> bool:
+        return description.startswith(cls._PREFIX)
+
+    @property
+    def source_host(self) -> str:
+        return self._source_host
+
+    @property
+    def dataset(self) -> str:
+        return self._dataset
+
+    @property
+    def target_host(self) -> str:
+        return self._target_host
+
+
 @typechecked
 class WhichTransaction(Transaction):
     """
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    DatasetDescription,
+    Environment,
+    Filesystem,
+    Host,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_SNAP = SnapshotFormat.format_(dt = datetime.now())
+
+
+def _zpools():
+    return [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "vm", snapshots = [Snapshot(_SNAP)], datasets = [
+                    Filesystem(name = "web-a", snapshots = [Snapshot(_SNAP)], datasets = [
+                        Filesystem(name = "disk", snapshots = [Snapshot(_SNAP)]),
+                    ]),
+                    Filesystem(name = "web-test", snapshots = [Snapshot(_SNAP)]),
+                    Filesystem(name = "db", snapshots = [Snapshot(_SNAP)]),
+                ]),
+                Filesystem(name = "home", snapshots = [Snapshot(_SNAP)]),
+            ],
+            snapshots = [Snapshot(_SNAP)],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ]
+
+
+@pytest.mark.parametrize("json", (False, True))
+@Environment(TestConfig(zpools = _zpools()))
+def test_ls_filter(ctx: Context, json: bool):
+    """
+    ``abgleich ls`` lists only the selected datasets and those leading to them.
+    """
+
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(
+        Subcmd.ls, *json_args,
+        "--include", "vm/web-*", "--exclude", "vm/web-test", "--max-depth", "2",
+        f"root%{_ZPOOL_SRC:s}",
+    )
+    res.assert_exitcode(0)
+
+    entries = ctx.parse_ls_tree(res.stdout, json = json)
+    datasets = {entry.path for entry in entries if isinstance(entry, DatasetDescription)}
+    assert datasets == {"/", "/vm", "/vm/web-a"}
+
+
+@Environment(TestConfig(zpools = _zpools()))
+def test_sync_filter(ctx: Context):
+    """
+    ``abgleich sync`` transfers only the selected datasets.
+    """
+
+    res = ctx.abgleich(
+        Subcmd.sync, "-j", "-y", "--include", "vm/web-*", "--exclude", "vm/web-test",
+        f"root%{_ZPOOL_SRC:s}", f"root%{_ZPOOL_TGT:s}",
+    )
+    res.assert_exitcode(0)
+
+    ctx.reload()
+
+    tgt = ctx[Host.localhost][_ZPOOL_TGT]
+    assert {dataset.name for dataset in tgt.datasets} == {"vm"}
+    assert {dataset.name for dataset in (tgt / "vm").datasets} == {"web-a"}
+    assert {dataset.name for dataset in (tgt / "vm" / "web-a").datasets} == {"disk"}
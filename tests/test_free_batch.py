@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    DestroySnapshotsTransaction,
+    Environment,
+    Filesystem,
+    Host,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "foo"
+_ZPOOL_TGT = "bar"
+_DT = datetime.now()
+_SNAP_A = SnapshotFormat.format_(dt = _DT)
+_SNAP_B = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 1))
+_SNAP_C = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 2))
+_SNAP_D = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 3))
+
+
+@pytest.mark.parametrize("json", (False, True))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(name = _ZPOOL_SRC, aproperties = AProperties.from_defaults(overlap = 1), datasets = [
+            Filesystem(
+                name = "one",
+                aproperties = AProperties.from_defaults(overlap = 1),
+                snapshots = [
+                    Snapshot(_SNAP_A),
+                    Snapshot(_SNAP_B),
+                    Snapshot(_SNAP_C),
+                    Snapshot(_SNAP_D),
+                ],
+            ),
+        ]),
+        Zpool(name = _ZPOOL_TGT),
+    ]
+))
+def test_free_batch(ctx: Context, json: bool):
+    """
+    ``abgleich free --batch`` destroys all freeable snapshots of a dataset in
+    a single ``zfs destroy`` call.
+
+    After an initial sync of [snap_a, snap_b, snap_c, snap_d] with overlap=1,
+    snap_a to snap_c are freeable.  Being consecutive on the source, they
+    collapse into one ``snap_a%snap_c`` range within a single transaction.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+    json_args = ("-j",) if json else tuple()
+
+    res_sync = ctx.abgleich(Subcmd.sync, *json_args, "-y", src, tgt)
+    res_sync.assert_exitcode(0)
+
+    res_free = ctx.abgleich(Subcmd.free, *json_args, "--batch", "-y", src, tgt)
+    res_free.assert_exitcode(0)
+
+    free_transactions = ctx.parse_transactions(res_free.stdout, json = json)
+    assert len(free_transactions) == 1
+    assert isinstance(free_transactions[0], DestroySnapshotsTransaction)
+    assert free_transactions[0].dataset == "/one"
+    assert free_transactions[0].snapshots == [f"{_SNAP_A:s}%{_SNAP_C:s}"]
+
+    ctx.reload()
+
+    src_snaps = list((ctx[Host.localhost][_ZPOOL_SRC] / "one").snapshots)
+    assert [snapshot.name for snapshot in src_snaps] == [_SNAP_D]
+
+    tgt_snaps = list((ctx[Host.localhost][_ZPOOL_TGT] / "one").snapshots)
+    assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP_A, _SNAP_B, _SNAP_C, _SNAP_D]
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import List, Tuple
+from uuid import uuid4
+
+from .lib import (
+    AProperties,
+    Context,
+    DatasetDescription,
+    EntryDescription,
+    Environment,
+    Filesystem,
+    Snapshot,
+    SnapshotDescription,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_SNAP_A = SnapshotFormat.format_(dt = datetime.now())
+
+
+def _get_names(entries: List[EntryDescription]) -> Tuple[List[str], List[str]]:
+    return (
+        [entry.path for entry in entries if isinstance(entry, DatasetDescription)],
+        [entry.snapshot for entry in entries if isinstance(entry, SnapshotDescription)],
+    )
+
+
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A)]),
+                Filesystem(name = "two", snapshots = [Snapshot(_SNAP_A)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_inventory_cache(ctx: Context):
+    """
+    With ``ABGLEICH_INVENTORY_CACHE``, a cold run fills the cache with a full
+    inventory, a warm run without changes only lists the change indicators
+    and changed datasets are fetched again selectively.
+    """
+
+    env = {
+        "ABGLEICH_LOGLEVEL": "20",
+        "ABGLEICH_INVENTORY_CACHE": "1",
+        "XDG_CACHE_HOME": f"/tmp/abgleich-test-{uuid4().hex:s}",
+    }
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+
+    res = ctx.abgleich(Subcmd.ls, "-j", src, env = env)
+    res.assert_exitcode(0)
+    assert b"(index)" in res.stderr
+    assert b" datasets)" not in res.stderr
+    cold = _get_names(ctx.parse_ls_tree(res.stdout, json = True))
+
+    res = ctx.abgleich(Subcmd.ls, "-j", src, env = env)
+    res.assert_exitcode(0)
+    assert b"(index)" in res.stderr
+    assert b" datasets)" not in res.stderr
+    assert _get_names(ctx.parse_ls_tree(res.stdout, json = True)) == cold
+
+    res = ctx.abgleich(Subcmd.ls, "-j", tgt, env = env)
+    res.assert_exitcode(0)
+
+    res = ctx.abgleich(Subcmd.sync, "-j", "-y", src, tgt)
+    res.assert_exitcode(0)
+
+    res = ctx.abgleich(Subcmd.ls, "-j", tgt, env = env)
+    res.assert_exitcode(0)
+    assert b" datasets)" in res.stderr
+    paths, snapshots = _get_names(ctx.parse_ls_tree(res.stdout, json = True))
+    assert paths == ["/", "/one", "/two"]
+    assert snapshots == [_SNAP_A, _SNAP_A]
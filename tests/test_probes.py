@@ -0,0 +1,60 @@
+from datetime import datetime
+from uuid import uuid4
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_SNAP_A = SnapshotFormat.format_(dt = datetime.now())
+
+
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_probes(ctx: Context):
+    """
+    All executables required on a route are looked up with a single
+    ``which`` call: ``zfs`` on source and target plus ``pv`` and ``xz`` on
+    both ends collapse into one probe for localhost.
+
+    With ``ABGLEICH_PROBE_TTL``, found executables are remembered in the
+    cache directory, so that a second run within the TTL skips probing.
+    """
+
+    env = {
+        "ABGLEICH_LOGLEVEL": "20",
+        "ABGLEICH_PROBE_TTL": "3600",
+        "XDG_CACHE_HOME": f"/tmp/abgleich-test-{uuid4().hex:s}",
+    }
+    args = ("-j", "-y", "-x", "1", "-r", "10m")
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+
+    res = ctx.abgleich(Subcmd.sync, *args, src, tgt, env = env)
+    res.assert_exitcode(0)
+    assert res.stderr.count(b"[RUN] which: ") == 1
+    assert b"which: zfs,pv,xz (localhost)" in res.stderr
+
+    res = ctx.abgleich(Subcmd.sync, *args, src, tgt, env = env)
+    res.assert_exitcode(0)
+    assert b"[RUN] which: " not in res.stderr
@@ -0,0 +1,146 @@
+from datetime import datetime
+
+import pytest
+
+from .lib import (
+    Apool,
+    AProperties,
+    Config,
+    Context,
+    Environment,
+    Filesystem,
+    Host,
+    Job,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    TransferInitialTransaction,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT1 = "tgt1"
+_ZPOOL_TGT2 = "tgt2"
+_SNAP = SnapshotFormat.format_(dt = datetime.now())
+
+
+@pytest.mark.parametrize("json", (False, True))
+@Environment(TestConfig(
+    abgleich = Config(
+        apools = [
+            Apool(alias = "source", root = _ZPOOL_SRC, user = "root"),
+            Apool(alias = "backup", root = _ZPOOL_TGT1, user = "root"),
+        ],
+        jobs = [
+            Job(name = "backup", source = "source", targets = ["backup"]),
+            Job(name = "offsite", source = f"root%{_ZPOOL_SRC:s}", targets = [f"root%{_ZPOOL_TGT2:s}"]),
+        ],
+    ),
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP)]),
+                Filesystem(name = "two", snapshots = [Snapshot(_SNAP)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT1),
+        Zpool(name = _ZPOOL_TGT2),
+    ],
+))
+def test_run(ctx: Context, json: bool):
+    """
+    ``abgleich run`` syncs all jobs of the configuration as a single plan
+    with a single summary. A source shared by both jobs is inventoried once.
+    """
+
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(Subcmd.run, *json_args, "-y", "--jobs", "2", env = dict(ABGLEICH_LOGLEVEL = "20"))
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+    assert len(transactions) == 4
+    assert all(isinstance(transaction, TransferInitialTransaction) for transaction in transactions)
+    assert res.stdout.count("[SUMMARY]") + res.stderr.count("[SUMMARY]") == 1
+    assert res.stderr.count(f"[RUN] inventory: localhost:{_ZPOOL_SRC:s}") == 1
+
+    ctx.reload()
+
+    for tgt in (_ZPOOL_TGT1, _ZPOOL_TGT2):
+        for dataset in ("one", "two"):
+            tgt_snaps = list((ctx[Host.localhost][tgt] / dataset).snapshots)
+            assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP]
+
+
+@Environment(TestConfig(
+    abgleich = Config(
+        jobs = [
+            Job(name = "one", source = f"root%{_ZPOOL_SRC:s}", targets = [f"root%{_ZPOOL_TGT1:s}"]),
+        ],
+    ),
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [Filesystem(name = "one", snapshots = [Snapshot(_SNAP)])],
+        ),
+        Zpool(name = _ZPOOL_TGT1),
+    ],
+))
+def test_run_unknown(ctx: Context):
+    """
+    ``abgleich run`` fails on jobs which are not configured.
+    """
+
+    res = ctx.abgleich(Subcmd.run, "-y", "two")
+    assert res.exitcode != 0
+
+    res = ctx.abgleich(Subcmd.run, "-j", "-y", "one")
+    res.assert_exitcode(0)
+
+    ctx.reload()
+
+    tgt_snaps = list((ctx[Host.localhost][_ZPOOL_TGT1] / "one").snapshots)
+    assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP]
+
+
+@Environment(TestConfig(
+    abgleich = Config(
+        jobs = [
+            Job(name = "one", source = f"root%{_ZPOOL_SRC:s}", targets = [f"root%{_ZPOOL_TGT1:s}"]),
+            Job(name = "two", source = f"root%{_ZPOOL_SRC:s}", targets = [f"root%{_ZPOOL_TGT1:s}"]),
+        ],
+    ),
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [Filesystem(name = "one", snapshots = [Snapshot(_SNAP)])],
+        ),
+        Zpool(name = _ZPOOL_TGT1),
+    ],
+))
+def test_run_duplicate(ctx: Context):
+    """
+    ``abgleich run`` plans a job named more than once only once and rejects
+    jobs transferring between the same source and target.
+    """
+
+    res = ctx.abgleich(Subcmd.run, "-y", "one", "two")
+    assert res.exitcode != 0
+    assert b"both transfer from" in res.stderr
+
+    res = ctx.abgleich(Subcmd.run, "-j", "-y", "one", "one")
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = True)
+    assert len(transactions) == 1
+
+    ctx.reload()
+
+    tgt_snaps = list((ctx[Host.localhost][_ZPOOL_TGT1] / "one").snapshots)
+    assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP]
@@ -0,0 +1,83 @@
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    CreateSnapshotsTransaction,
+    Environment,
+    Filesystem,
+    Host,
+    Snap,
+    Subcmd,
+    TestConfig,
+    Zpool,
+)
+
+
+_ZPOOL_A = "foo"
+_ZPOOL_B = "bar"
+
+
+@pytest.mark.parametrize("json", (False, True))
+@Environment(*(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_A,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one"),
+                Filesystem(
+                    name = "two",
+                    aproperties = aproperties,
+                ),
+            ],
+        ),
+        Zpool(
+            name = _ZPOOL_B,
+            datasets = [
+                Filesystem(name = "three"),
+            ],
+        ),
+    ],
+) for aproperties in (
+    AProperties.from_defaults(),
+    AProperties(snap = Snap.never),  # breaks up the subtree
+)))
+def test_snap_batch(ctx: Context, json: bool):
+    """
+    ``abgleich snap --batch`` creates all snapshots of a location in a single
+    ``zfs snapshot`` call, sharing one timestamp.
+
+    If every dataset below the root is intended, ``zfs snapshot -r`` replaces
+    the list of datasets.  If one dataset is suppressed, the remaining ones are
+    listed explicitly.
+    """
+
+    partial = (ctx[Host.localhost][_ZPOOL_A] / "two").aproperties.snap is Snap.never
+    expected = {"/", "/one"} if partial else {"/", "/one", "/two"}
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(Subcmd.snap, *json_args, "--batch", "-y", f"root%{_ZPOOL_A:s}")
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+
+    assert len(transactions) == 1
+    transaction = transactions[0]
+    assert isinstance(transaction, CreateSnapshotsTransaction)
+    assert {dataset for dataset, _ in transaction.snapshots} == expected
+    assert len({snapshot for _, snapshot in transaction.snapshots}) == 1  # shared timestamp
+    assert (" -r " in transaction.command) is not partial
+
+    snapshot = transaction.snapshots[0][1]
+    assert ctx[Host.localhost][_ZPOOL_A].aproperties.matches_snapshot_name(snapshot)
+
+    ctx.reload()
+
+    for name in ("one", "two"):
+        snaps = [snap.name for snap in (ctx[Host.localhost][_ZPOOL_A] / name).snapshots]
+        assert snaps == ([] if partial and name == "two" else [snapshot])
+    assert [snap.name for snap in ctx[Host.localhost][_ZPOOL_A].snapshots] == [snapshot]
+
+    assert len(set(ctx[Host.localhost][_ZPOOL_B].snapshots)) == 0  # nothing
+    assert len(set((ctx[Host.localhost][_ZPOOL_B] / "three").snapshots)) == 0  # nothing
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    CreateSnapshotTransaction,
+    Environment,
+    Filesystem,
+    Host,
+    Path,
+    Platform,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    Zpool,
+)
+
+
+_ZPOOL_A = "foo"
+_SNAP = SnapshotFormat.format_(dt = datetime.now())
+_NAMES = ("one", "two", "three", "four", "five")
+_CHANGED = ("two", "four")
+
+
+@pytest.mark.skipif(Platform.current is Platform.freebsd, reason = "See https://github.com/openzfs/zfs/issues/18325")
+@pytest.mark.parametrize("json", (False, True))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_A,
+            aproperties = AProperties.from_defaults(),
+            snapshots = [
+                Snapshot(_SNAP),
+            ],
+            datasets = [
+                Filesystem(
+                    name = name,
+                    aproperties = AProperties(threshold = 0),
+                    snapshots = [
+                        Snapshot(_SNAP),
+                    ],
+                )
+                for name in _NAMES
+            ],
+        ),
+    ],
+))
+def test_snap_jobs_diff(ctx: Context, json: bool):
+    """
+    ``abgleich snap --jobs N`` runs change detection via ``zfs diff`` in
+    parallel while producing the same transactions as the serial path: only
+    the touched datasets get a new snapshot.
+    """
+
+    for name in _CHANGED:
+        _ = Path((ctx[Host.localhost][_ZPOOL_A] / name).mountpoint_abs).listdir(Host.localhost)  # force atime change
+    ctx[Host.localhost].sync()  # flush changes to make sure test works deterministically
+
+    query = f'root%{_ZPOOL_A:s}'
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(Subcmd.snap, *json_args, "--jobs", "4", "-y", query)  # yes to all
+    res.assert_exitcode(0)
+
+    ctx.reload()
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+
+    assert all(isinstance(transaction, CreateSnapshotTransaction) for transaction in transactions)
+    assert {transaction.dataset for transaction in transactions} == {f"/{name:s}" for name in _CHANGED}
+
+    for name in _NAMES:
+        snaps = set((ctx[Host.localhost][_ZPOOL_A] / name).snapshots)
+        assert len(snaps) == (2 if name in _CHANGED else 1)
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Host,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    TransferIncrementalTransaction,
+    TransferInitialTransaction,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_DT = datetime.now()
+_SNAP_A = SnapshotFormat.format_(dt = _DT)
+_SNAP_B = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 1))
+
+
+@pytest.mark.parametrize("json", (False, True))
+@pytest.mark.parametrize("size", ("64k", "16m"))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A), Snapshot(_SNAP_B)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_sync_buffer(ctx: Context, size: str, json: bool):
+    """
+    ``abgleich sync --buffer SIZE`` relays the stream in-process through an
+    in-memory buffer of up to SIZE bytes, implying ``--relay``.
+
+    Both transfers must arrive on the target, and the debug log must report
+    the peak fill level of the buffer.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(
+        Subcmd.sync, *json_args, "--buffer", size, "-y", src, tgt,
+        env = {"ABGLEICH_LOGLEVEL": "10"},
+    )
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+    assert len(transactions) == 2
+    assert isinstance(transactions[0], TransferInitialTransaction)
+    assert isinstance(transactions[1], TransferIncrementalTransaction)
+    for transaction in transactions:
+        assert not transaction.command.startswith("bash")
+
+    assert b"relay_buffer_peak" in res.stderr
+
+    ctx.reload()
+
+    tgt_snaps = list((ctx[Host.localhost][_ZPOOL_TGT] / "one").snapshots)
+    assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP_A, _SNAP_B]
+
+
+@Environment(TestConfig(
+    zpools = [
+        Zpool(name = _ZPOOL_SRC, aproperties = AProperties.from_defaults()),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_sync_buffer_conflicts(ctx: Context):
+    """
+    ``--buffer`` cannot be combined with ``--direct`` or ``--insecure``.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+
+    res = ctx.abgleich(Subcmd.sync, "--buffer", "1m", "--direct", "-y", src, tgt)
+    assert res.exitcode != 0
+
+    res = ctx.abgleich(Subcmd.sync, "--buffer", "1m", "--insecure", "localhost:18432", "-y", src, tgt)
+    assert res.exitcode != 0
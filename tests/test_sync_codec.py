@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Host,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    TransferIncrementalTransaction,
+    TransferInitialTransaction,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_DT = datetime.now()
+_SNAP_A = SnapshotFormat.format_(dt = _DT)
+_SNAP_B = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 1))
+
+
+@pytest.mark.parametrize("json", (False, True))
+@pytest.mark.parametrize("codec, threads, command", (
+    ("none", None, None),
+    ("lz4", None, "lz4"),
+    ("xz:1", "0", "xz"),
+    ("zstd", None, "zstd"),
+    ("zstd:9", "2", "zstd"),
+))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A), Snapshot(_SNAP_B)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_sync_codec(ctx: Context, codec: str, threads: Optional[str], command: Optional[str], json: bool):
+    """
+    ``abgleich sync --codec NAME[:LEVEL]`` pipes ``zfs send`` through the
+    chosen compressor on the sending host and its decompressor on the
+    receiving host.  Any codec but ``none`` suppresses ``zfs send -c``.
+
+    Source carries one child dataset with two snapshots, so that both the
+    initial and the incremental transfer pass through the codec.  Both
+    snapshots must arrive on the target.
+
+    Requires ``lz4``, ``xz`` and ``zstd`` on both source and target hosts.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+    json_args = ("-j",) if json else tuple()
+    threads_args = ("--codec-threads", threads) if threads is not None else tuple()
+
+    res = ctx.abgleich(Subcmd.sync, *json_args, "--codec", codec, *threads_args, "-y", src, tgt)
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+    assert len(transactions) == 2
+    assert isinstance(transactions[0], TransferInitialTransaction)
+    assert isinstance(transactions[1], TransferIncrementalTransaction)
+
+    for transaction in transactions:
+        if command is None:
+            assert "send -c" in transaction.command
+        else:
+            assert "send -c" not in transaction.command
+            assert f"| {command:s} " in transaction.command
+        if threads is not None:
+            assert f"-T{threads:s}" in transaction.command
+
+    ctx.reload()
+
+    tgt_snaps = list((ctx[Host.localhost][_ZPOOL_TGT] / "one").snapshots)
+    assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP_A, _SNAP_B]
+
+
+@Environment(TestConfig(
+    zpools = [
+        Zpool(name = _ZPOOL_SRC, aproperties = AProperties.from_defaults()),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_sync_codec_conflicts(ctx: Context):
+    """
+    ``-x`` is a shorthand for ``--codec xz`` and cannot be combined with
+    ``--codec``, and ``--codec-threads`` requires xz or zstd.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+
+    res = ctx.abgleich(Subcmd.sync, "-x", "--codec", "zstd", "-y", src, tgt)
+    assert res.exitcode != 0
+
+    res = ctx.abgleich(Subcmd.sync, "--codec", "lz4", "--codec-threads", "2", "-y", src, tgt)
+    assert res.exitcode != 0
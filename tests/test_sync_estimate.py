@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    TransferIncrementalTransaction,
+    TransferInitialTransaction,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_DT = datetime.now()
+_SNAP_A = SnapshotFormat.format_(dt = _DT)
+_SNAP_B = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 1))
+
+
+@pytest.mark.parametrize("json", (False, True))
+@pytest.mark.parametrize("route", (None, "remotehost"))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A), Snapshot(_SNAP_B)]),
+                Filesystem(name = "two", snapshots = [Snapshot(_SNAP_A)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_sync_estimate(ctx: Context, route: Optional[str], json: bool):
+    """
+    ``abgleich sync --estimate`` runs a dry ``zfs send -nP`` for every
+    planned transfer and shows its size in the plan, plus the total.
+
+    Transfers of initial snapshots are never empty.  In JSON, the total
+    equals the sum of all estimates.  Estimating does not alter the plan.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+    if route is not None:
+        src = f"{route:s}:{src:s}"
+        tgt = f"{route:s}:{tgt:s}"
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(Subcmd.sync, *json_args, "--estimate", "-y", src, tgt)
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+    assert len(transactions) == 3
+    assert sum(isinstance(transaction, TransferInitialTransaction) for transaction in transactions) == 2
+    assert sum(isinstance(transaction, TransferIncrementalTransaction) for transaction in transactions) == 1
+    for transaction in transactions:
+        assert transaction.estimate is not None
+        if json and isinstance(transaction, TransferInitialTransaction):
+            assert transaction.estimate > 0
+
+    total = ctx.parse_estimate_total(res.stdout, json = json)
+    if json:
+        assert total == sum(transaction.estimate for transaction in transactions)
+    else:
+        assert total.endswith("B")
+
+
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_sync_estimate_off(ctx: Context):
+    """
+    Without ``--estimate``, the plan carries neither estimates nor a total.
+    """
+
+    res = ctx.abgleich(Subcmd.sync, "-j", "-y", f"root%{_ZPOOL_SRC:s}", f"root%{_ZPOOL_TGT:s}")
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = True)
+    assert len(transactions) == 1
+    assert all(transaction.estimate is None for transaction in transactions)
+    assert b'"total"' not in res.stdout
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Host,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    TransferIncrementalTransaction,
+    TransferInitialTransaction,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT1 = "tgt1"
+_ZPOOL_TGT2 = "tgt2"
+_DT = datetime.now()
+_SNAP_A = SnapshotFormat.format_(dt = _DT)
+_SNAP_B = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 1))
+
+
+@pytest.mark.parametrize("json", (False, True))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A), Snapshot(_SNAP_B)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT1),
+        Zpool(name = _ZPOOL_TGT2),
+    ],
+))
+def test_sync_fanout(ctx: Context, json: bool):
+    """
+    ``abgleich sync`` with several targets sends identical streams only once,
+    relayed by abgleich into the receivers of all targets.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt1 = f"root%{_ZPOOL_TGT1:s}"
+    tgt2 = f"root%{_ZPOOL_TGT2:s}"
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(Subcmd.sync, *json_args, "-y", src, tgt1, tgt2)
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+    assert len(transactions) == 2
+    assert isinstance(transactions[0], TransferInitialTransaction)
+    assert isinstance(transactions[1], TransferIncrementalTransaction)
+    for transaction in transactions:
+        assert transaction.target_host == "localhost,localhost"
+        assert transaction.command.count("zfs send") == 1
+        assert transaction.command.count("zfs receive") == 2
+
+    ctx.reload()
+
+    for tgt in (_ZPOOL_TGT1, _ZPOOL_TGT2):
+        tgt_snaps = list((ctx[Host.localhost][tgt] / "one").snapshots)
+        assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP_A, _SNAP_B]
+
+
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A), Snapshot(_SNAP_B)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT1),
+        Zpool(name = _ZPOOL_TGT2),
+    ],
+))
+def test_sync_fanout_direct(ctx: Context):
+    """
+    With ``--direct``, streams are piped and every target gets its own
+    ``zfs send``.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt1 = f"root%{_ZPOOL_TGT1:s}"
+    tgt2 = f"root%{_ZPOOL_TGT2:s}"
+
+    res = ctx.abgleich(Subcmd.sync, "-j", "--direct", "-y", src, tgt1, tgt2)
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = True)
+    assert len(transactions) == 4
+    for transaction in transactions:
+        assert transaction.target_host == "localhost"
+
+    ctx.reload()
+
+    for tgt in (_ZPOOL_TGT1, _ZPOOL_TGT2):
+        tgt_snaps = list((ctx[Host.localhost][tgt] / "one").snapshots)
+        assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP_A, _SNAP_B]
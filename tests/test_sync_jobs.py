@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Host,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    TransferInitialTransaction,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_SNAP = SnapshotFormat.format_(dt = datetime.now())
+
+
+@pytest.mark.parametrize("json", (False, True))
+@pytest.mark.parametrize("jobs", (("--jobs", "4"), ("--jobs", "4", "--jobs-per-host", "2")))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP)], datasets = [
+                    Filesystem(name = "two", snapshots = [Snapshot(_SNAP)], datasets = [
+                        Filesystem(name = "three", snapshots = [Snapshot(_SNAP)]),
+                    ]),
+                ]),
+                Filesystem(name = "four", snapshots = [Snapshot(_SNAP)]),
+                Filesystem(name = "five", snapshots = [Snapshot(_SNAP)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_sync_jobs_initial(ctx: Context, jobs: tuple, json: bool):
+    """
+    ``abgleich sync --jobs N`` runs independent transfers in parallel.
+
+    Nested datasets must still be created parent first: each initial transfer
+    of a child waits for the initial transfer of its parent, otherwise
+    ``zfs receive`` would fail for the missing parent.  The plan itself is
+    identical to a serial run, so all five datasets must arrive on the target.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(Subcmd.sync, *json_args, *jobs, "-y", src, tgt)
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+    assert len(transactions) == 5
+    assert all(isinstance(transaction, TransferInitialTransaction) for transaction in transactions)
+    assert {transaction.dataset for transaction in transactions} == {
+        "/one", "/one/two", "/one/two/three", "/four", "/five",
+    }
+
+    ctx.reload()
+
+    tgt = ctx[Host.localhost][_ZPOOL_TGT]
+    for dataset in (
+        tgt / "one",
+        tgt / "one" / "two",
+        tgt / "one" / "two" / "three",
+        tgt / "four",
+        tgt / "five",
+    ):
+        tgt_snaps = list(dataset.snapshots)
+        assert len(tgt_snaps) == 1
+        assert tgt_snaps[0].name == _SNAP
@@ -0,0 +1,86 @@
+from datetime import datetime
+from glob import glob
+import os
+from tempfile import gettempdir
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Host,
+    NAME,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    TransferInitialTransaction,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "foo"
+_ZPOOL_TGT = "bar"
+_SNAP = SnapshotFormat.format_(dt = datetime.now())
+
+
+@pytest.mark.parametrize("json", (False, True))
+@Environment(TestConfig(
+    nodes = dict(
+        other_a = dict(
+            required = True,
+            zpools = [
+                Zpool(name = _ZPOOL_SRC, aproperties = AProperties.from_defaults(), datasets = [
+                    Filesystem(name = "one", snapshots = [
+                        Snapshot(_SNAP),
+                    ]),
+                ]),
+            ],
+        ),
+        other_b = dict(
+            required = True,
+            zpools = [
+                Zpool(name = _ZPOOL_TGT),
+            ],
+        ),
+    ),
+))
+def test_sync_multiplex(ctx: Context, json: bool):
+    """
+    ``ABGLEICH_MULTIPLEX=1`` shares one ssh connection per hop across a run.
+
+    Every ssh call carries ``ControlMaster=auto``.  Hops reached from
+    localhost keep their control sockets in a private temporary directory,
+    hops reached from a remote host keep them in ``~/.ssh`` of that host.
+    The transfer must succeed as usual and the private socket directory must
+    be gone once abgleich exits.
+    """
+
+    other_a = Host.other_a.to_host_name()
+    other_b = Host.other_b.to_host_name()
+
+    src = f"{other_a:s}:root%{_ZPOOL_SRC:s}"
+    tgt = f"{other_a:s}/{other_b:s}:root%{_ZPOOL_TGT:s}"
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(Subcmd.sync, *json_args, "-y", src, tgt, env = {"ABGLEICH_MULTIPLEX": "1"})
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+    assert len(transactions) == 1
+    assert isinstance(transactions[0], TransferInitialTransaction)
+
+    cmd = transactions[0].command
+    assert "ControlMaster=auto" in cmd
+    assert f"ControlPath={os.path.join(gettempdir(), NAME)}-" in cmd
+    assert f"ControlPath=~/.ssh/{NAME:s}-" in cmd
+
+    assert glob(os.path.join(gettempdir(), f"{NAME:s}-*")) == []
+
+    ctx.reload()
+
+    tgt_snaps = list((ctx[Host.other_b][_ZPOOL_TGT] / "one").snapshots)
+    assert len(tgt_snaps) == 1
+    assert tgt_snaps[0].name == _SNAP
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Host,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    TransferInitialTransaction,
+    TransferRangeTransaction,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "foo"
+_ZPOOL_TGT = "bar"
+_DT = datetime.now()
+_SNAP_A = SnapshotFormat.format_(dt = _DT)
+_SNAP_B = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 1))
+_SNAP_C = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 2))
+
+
+@pytest.mark.parametrize("json", (False, True))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(name = _ZPOOL_SRC, aproperties = AProperties.from_defaults(), datasets = [
+            Filesystem(name = "one", snapshots = [
+                Snapshot(_SNAP_A),
+                Snapshot(_SNAP_B),
+                Snapshot(_SNAP_C),
+            ]),
+        ]),
+        Zpool(name = _ZPOOL_TGT),
+    ]
+))
+def test_sync_range_initial(ctx: Context, json: bool):
+    """
+    ``abgleich sync --range`` collapses all snapshots following the initial
+    transfer into a single ``zfs send -I`` transaction per dataset.
+
+    Without ``--range``, three snapshots would require one initial and two
+    incremental transfers.  With it, the plan holds exactly one initial
+    transfer of the oldest snapshot and one range spanning the remaining
+    snapshots, and all intermediary snapshots must still arrive on the target.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(Subcmd.sync, *json_args, "--range", "-y", src, tgt)
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+    assert len(transactions) == 2
+    assert isinstance(transactions[0], TransferInitialTransaction)
+    assert transactions[0].dataset == "/one"
+    assert transactions[0].snapshot == _SNAP_A
+    assert isinstance(transactions[1], TransferRangeTransaction)
+    assert transactions[1].dataset == "/one"
+    assert transactions[1].from_snapshot == _SNAP_A
+    assert transactions[1].to_snapshot == _SNAP_C
+
+    ctx.reload()
+
+    tgt_snaps = list((ctx[Host.localhost][_ZPOOL_TGT] / "one").snapshots)
+    assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP_A, _SNAP_B, _SNAP_C]
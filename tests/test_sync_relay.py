@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Host,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    TransferIncrementalTransaction,
+    TransferInitialTransaction,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_DT = datetime.now()
+_SNAP_A = SnapshotFormat.format_(dt = _DT)
+_SNAP_B = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 1))
+
+
+@pytest.mark.parametrize("json", (False, True))
+@pytest.mark.parametrize("rate_limit", (None, "10m"))
+@pytest.mark.parametrize("route", (None, "localhost", "remotehost"))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A), Snapshot(_SNAP_B)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_sync_relay(ctx: Context, route: Optional[str], rate_limit: Optional[str], json: bool):
+    """
+    ``abgleich sync --relay`` spawns sender and receiver as separate
+    processes and moves the stream between them within abgleich.
+
+    Neither a local ``bash`` pipeline nor ``pv`` is involved: the rate limit
+    is applied in-process.  Both the initial and the incremental transfer
+    must arrive on the target.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+    if route is not None:
+        src = f"{route:s}:{src:s}"
+        tgt = f"{route:s}:{tgt:s}"
+    json_args = ("-j",) if json else tuple()
+    rate_args = ("-r", rate_limit) if rate_limit is not None else tuple()
+
+    res = ctx.abgleich(Subcmd.sync, *json_args, "--relay", *rate_args, "-y", src, tgt)
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+    assert len(transactions) == 2
+    assert isinstance(transactions[0], TransferInitialTransaction)
+    assert isinstance(transactions[1], TransferIncrementalTransaction)
+    for transaction in transactions:
+        assert not transaction.command.startswith("bash")
+        assert "pv " not in transaction.command
+
+    ctx.reload()
+
+    tgt_snaps = list((ctx[Host.localhost][_ZPOOL_TGT] / "one").snapshots)
+    assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP_A, _SNAP_B]
+
+
+@Environment(TestConfig(
+    zpools = [
+        Zpool(name = _ZPOOL_SRC, aproperties = AProperties.from_defaults()),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_sync_relay_conflicts(ctx: Context):
+    """
+    ``--relay`` cannot be combined with ``--direct`` or ``--insecure``.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+
+    res = ctx.abgleich(Subcmd.sync, "--relay", "--direct", "-y", src, tgt)
+    assert res.exitcode != 0
+
+    res = ctx.abgleich(Subcmd.sync, "--relay", "--insecure", "localhost:18432", "-y", src, tgt)
+    assert res.exitcode != 0
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Command,
+    Context,
+    Environment,
+    Filesystem,
+    Host,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    TransferIncrementalTransaction,
+    TransferResumeTransaction,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "foo"
+_ZPOOL_TGT = "bar"
+_DT = datetime.now()
+_SNAP_A = SnapshotFormat.format_(dt = _DT)
+_SNAP_B = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 1))
+
+
+@pytest.mark.parametrize("json", (False, True))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(name = _ZPOOL_SRC, aproperties = AProperties.from_defaults(), datasets = [
+            Filesystem(name = "one"),
+        ]),
+        Zpool(name = _ZPOOL_TGT),
+    ]
+))
+def test_sync_resume_initial(ctx: Context, json: bool):
+    """
+    ``abgleich sync`` resumes an interrupted initial transfer.
+
+    The initial stream of the oldest snapshot is cut off after 1 MiB and
+    received with ``zfs receive -s``, exactly like an interrupted transfer of
+    abgleich itself would leave the target behind: a dataset without
+    snapshots carrying a ``receive_resume_token``.  The next sync must resume
+    that stream instead of starting over and then continue incrementally.
+    """
+
+    Command(
+        "bash", "-c",
+        f"dd if=/dev/urandom of=$(zfs get -H -o value mountpoint {_ZPOOL_SRC:s}/one)/data bs=1M count=8"
+        f" && zfs snapshot {_ZPOOL_SRC:s}/one@{_SNAP_A:s}"
+        f" && zfs snapshot {_ZPOOL_SRC:s}/one@{_SNAP_B:s}",
+    ).with_sudo().on_host(Host.localhost).run().assert_exitcode(0)
+    Command(
+        "bash", "-c",
+        f"zfs send {_ZPOOL_SRC:s}/one@{_SNAP_A:s} | head -c 1048576 | zfs receive -s {_ZPOOL_TGT:s}/one",
+    ).with_sudo().on_host(Host.localhost).run()  # fails by design
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+    json_args = ("-j",) if json else tuple()
+
+    res = ctx.abgleich(Subcmd.sync, *json_args, "-y", src, tgt)
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = json)
+    assert len(transactions) == 2
+    assert isinstance(transactions[0], TransferResumeTransaction)
+    assert transactions[0].dataset == "/one"
+    assert isinstance(transactions[1], TransferIncrementalTransaction)
+    assert transactions[1].from_snapshot == _SNAP_A
+    assert transactions[1].to_snapshot == _SNAP_B
+
+    ctx.reload()
+
+    tgt_snaps = list((ctx[Host.localhost][_ZPOOL_TGT] / "one").snapshots)
+    assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP_A, _SNAP_B]
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Host,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_DT = datetime.now()
+_SNAP_A = SnapshotFormat.format_(dt = _DT)
+_SNAP_B = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 1))
+
+
+def _zpools():
+    return [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(
+                    name = "large",
+                    aproperties = AProperties(send = "large-block,embedded"),
+                    snapshots = [Snapshot(_SNAP_A), Snapshot(_SNAP_B)],
+                ),
+                Filesystem(name = "plain", snapshots = [Snapshot(_SNAP_A), Snapshot(_SNAP_B)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ]
+
+
+@Environment(TestConfig(zpools = _zpools()))
+def test_sync_send_property(ctx: Context):
+    """
+    ``abgleich:send`` adds flags to ``zfs send`` for the datasets it is set on.
+    """
+
+    res = ctx.abgleich(Subcmd.sync, "-j", "-y", f"root%{_ZPOOL_SRC:s}", f"root%{_ZPOOL_TGT:s}")
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = True)
+    large = [transaction for transaction in transactions if f"{_ZPOOL_SRC:s}/large@" in transaction.command]
+    plain = [transaction for transaction in transactions if f"{_ZPOOL_SRC:s}/plain@" in transaction.command]
+    assert len(large) == 2
+    assert len(plain) == 2
+    for transaction in large:
+        assert "zfs send -c -L -e " in transaction.command
+    for transaction in plain:
+        assert " -L " not in transaction.command
+
+    ctx.reload()
+
+    for name in ("large", "plain"):
+        tgt_snaps = list((ctx[Host.localhost][_ZPOOL_TGT] / name).snapshots)
+        assert [snapshot.name for snapshot in tgt_snaps] == [_SNAP_A, _SNAP_B]
+
+
+@pytest.mark.parametrize("profile", ("none", "properties"))
+@Environment(TestConfig(zpools = _zpools()))
+def test_sync_send_flag(ctx: Context, profile: str):
+    """
+    ``--send`` overrides ``abgleich:send`` for all datasets.
+    """
+
+    res = ctx.abgleich(
+        Subcmd.sync, "-j", "-y", "--send", profile,
+        f"root%{_ZPOOL_SRC:s}", f"root%{_ZPOOL_TGT:s}",
+    )
+    res.assert_exitcode(0)
+
+    transactions = ctx.parse_transactions(res.stdout, json = True)
+    assert len(transactions) > 0
+    for transaction in transactions:
+        if "zfs send" not in transaction.command:
+            continue
+        assert " -L " not in transaction.command
+        assert (" -p " in transaction.command) == (profile == "properties")
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from json import loads
+from typing import Any, Dict, List
+
+import pytest
+
+from .lib import (
+    AProperties,
+    Context,
+    Environment,
+    Filesystem,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_DT = datetime.now()
+_SNAP_A = SnapshotFormat.format_(dt = _DT)
+_SNAP_B = SnapshotFormat.format_(dt = _DT + timedelta(seconds = 1))
+
+
+def _parse_messages(raw: bytes) -> List[Dict[str, Any]]:
+    """
+    messages printed while running transactions, i.e. after the plan
+    """
+
+    raw = raw.split(b'{"run":true}\n')[1]
+    return [loads(line) for line in raw.decode("utf-8").splitlines() if line.strip()]
+
+
+@pytest.mark.parametrize("relay", (False, True))
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A), Snapshot(_SNAP_B)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_sync_telemetry(ctx: Context, relay: bool):
+    """
+    Every finished transaction reports its telemetry alongside ``[OK]``, and
+    the run closes with a ``[SUMMARY]`` message totalling all of them.
+
+    Bytes and rates are only measured if abgleich relays the stream itself,
+    otherwise they are ``null`` while durations and exit codes are present.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+    relay_args = ("--relay",) if relay else tuple()
+
+    res = ctx.abgleich(Subcmd.sync, "-j", *relay_args, "-y", src, tgt)
+    res.assert_exitcode(0)
+
+    messages = _parse_messages(res.stdout)
+    finished = [msg for msg in messages if msg["message"].startswith("[OK] ")]
+    assert len(finished) == 2
+    for msg in finished:
+        telemetry = msg["telemetry"]
+        assert telemetry["duration"] >= 0
+        assert telemetry["exit_code"] == 0
+        assert telemetry["exit_signal"] is None
+        if relay:
+            assert telemetry["bytes"] > 0
+            assert telemetry["average_rate"] > 0
+            assert telemetry["peak_rate"] > 0
+        else:
+            assert telemetry["bytes"] is None
+            assert telemetry["average_rate"] is None
+
+    summary = messages[-1]
+    assert summary["message"].startswith("[SUMMARY] 2 ok, 0 failed")
+    assert summary["telemetry"]["succeeded"] == 2
+    assert summary["telemetry"]["failed"] == 0
+    assert summary["telemetry"]["slowest"]["description"] in (
+        msg["message"][len("[OK] "):] for msg in finished
+    )
+    if relay:
+        assert summary["telemetry"]["bytes"] == sum(msg["telemetry"]["bytes"] for msg in finished)
+    else:
+        assert summary["telemetry"]["bytes"] is None
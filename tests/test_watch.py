@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from .lib import (
+    AProperties,
+    Context,
+    DatasetDescription,
+    Environment,
+    Filesystem,
+    Snapshot,
+    SnapshotFormat,
+    Subcmd,
+    TestConfig,
+    Zpool,
+)
+
+
+_ZPOOL_SRC = "src"
+_ZPOOL_TGT = "tgt"
+_SNAP_A = SnapshotFormat.format_(dt = datetime.now())
+
+
+@Environment(TestConfig(
+    zpools = [
+        Zpool(
+            name = _ZPOOL_SRC,
+            aproperties = AProperties.from_defaults(),
+            datasets = [
+                Filesystem(name = "one", snapshots = [Snapshot(_SNAP_A)]),
+            ],
+        ),
+        Zpool(name = _ZPOOL_TGT),
+    ],
+))
+def test_watch_sync(ctx: Context):
+    """
+    ``watch`` runs its cycles until terminated. The first sync cycle
+    transfers all snapshots, later ones only refresh the inventories kept in
+    memory and find nothing to do.
+    """
+
+    src = f"root%{_ZPOOL_SRC:s}"
+    tgt = f"root%{_ZPOOL_TGT:s}"
+
+    res = ctx.abgleich(
+        Subcmd.watch, "-j", "--snap-every", "0", "--sync-every", "3s", src, tgt,
+        env = {"ABGLEICH_LOGLEVEL": "20"},
+        timeout = 8,
+    )
+    assert res.timeout
+    assert res.stderr.count(b"[CYCLE] sync") >= 2
+    assert b"[CYCLE] snap" not in res.stderr
+    assert b"(index)" in res.stderr
+
+    res = ctx.abgleich(Subcmd.ls, "-j", tgt)
+    res.assert_exitcode(0)
+    datasets = [
+        entry for entry in ctx.parse_ls_tree(res.stdout, json = True)
+        if isinstance(entry, DatasetDescription)
+    ]
+    assert {dataset.path for dataset in datasets} == {"/", "/one"}
+
+
+@Environment()
+def test_watch_unpaired(ctx: Context):
+    """
+    Locations come in pairs of source and target.
+    """
+
+    res = ctx.abgleich(Subcmd.watch, "a", "b", "c")
+    res.assert_exitcode(1)
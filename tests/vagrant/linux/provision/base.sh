@@ -7,12 +7,14 @@ export DEBIAN_FRONTEND=noninteractive
 echo ">>> Updating package index ..."
 apt-get update -qq
 
-echo ">>> Installing ZFS utilities, Python venv support, just, pv, and xz-utils ..."
+echo ">>> Installing ZFS utilities, Python venv support, just, pv, xz-utils, zstd and lz4 ..."
 apt-get install -y -qq --no-install-recommends \
   zfsutils-linux \
   python3-venv \
   pv \
   xz-utils \
+  zstd \
+  lz4 \
   > /dev/null
 curl --proto '=https' --tlsv1.2 -sSf https://just.systems/install.sh | bash -s -- --to /usr/bin
 